@@ -4,8 +4,11 @@
 from .searchers import *
 from .savers import *
 from .loggers import *
-from .slune import submit_job, sbatchit, lsargs, get_csv_saver
+from .executors import *
+from .slune import submit_job, submit_array_job, sbatchit, get_pack_size, lsargs, get_csv_saver
 from .utils import *
+from .workqueue import WorkQueue
+from .resultsindex import ResultsIndex
 from . import base
 
 # __all__ = ['submit_job', 'sbatchit', 'lsargs', 'get_csv_saver',
@@ -1,4 +1,8 @@
 import abc 
+import json
+import os
+from typing import Optional
+from slune.utils import write_json
 
 class BaseSearcher(metaclass=abc.ABCMeta):
     """ Base class for all Searchers. 
@@ -11,7 +15,14 @@ class BaseSearcher(metaclass=abc.ABCMeta):
     """
     @abc.abstractmethod
     def __init__(self, *args, **kwargs):
-        """ Initialises the searcher. """
+        """ Initialises the searcher.
+
+        Searchers should accept 'shard_index' and 'num_shards' arguments where possible,
+        and then only return their shard's share of the configurations (see slune.utils.get_shard).
+        This lets several launchers each drive a disjoint part of the same search.
+        A shard's share should only depend on its index, so a restarted shard resumes exactly its own remaining work.
+
+        """
 
         pass
     
@@ -64,6 +75,78 @@ class BaseSearcher(metaclass=abc.ABCMeta):
         except:
             raise StopIteration
 
+    def get_state(self) -> dict:
+        """ Returns the state of the searcher, so it can be resumed later with set_state.
+
+        The state should hold everything needed to carry on from the next configuration,
+        eg. the position of the searcher in its search space (which also tells us which configurations were already returned),
+        and the state of any random number generator it uses. It must be serialisable with json and should be small.
+        Only needed to save the state of the searcher (eg. with sbatchit's state_path), so searchers that don't need to can leave it out.
+        Feel free to override this method if needed.
+
+        Returns:
+            - state (dict): The state of the searcher.
+
+        """
+
+        raise NotImplementedError(f"{type(self).__name__} can't save its state, please implement the get_state method.")
+
+    def set_state(self, state: dict):
+        """ Restores the state of the searcher, as returned by get_state, so the next configuration is the one after the last returned.
+
+        Only needed to restore the state of the searcher (eg. with sbatchit's state_path), so searchers that don't need to can leave it out.
+        Feel free to override this method if needed.
+
+        Args:
+            - state (dict): The state of the searcher.
+
+        """
+
+        raise NotImplementedError(f"{type(self).__name__} can't restore its state, please implement the set_state method.")
+
+    def save_state(self, path: str, state: Optional[dict] = None):
+        """ Saves the state of the searcher to a json file.
+
+        Writes to a temporary file first then renames it, so the file always holds a complete state even if we are killed while saving.
+
+        Args:
+            - path (str): Path to the file.
+            - state (dict, optional): State to save, as returned by get_state earlier, default is None (the current state).
+
+        """
+
+        write_json(self.get_state() if state is None else state, path)
+
+    def load_state(self, path: str) -> bool:
+        """ Restores the state of the searcher from a json file saved by save_state, if the file exists.
+
+        Args:
+            - path (str): Path to the file.
+
+        Returns:
+            - loaded (bool): True if the state was restored, False if there is no file.
+
+        """
+
+        if not os.path.exists(path):
+            return False
+        with open(path, 'r') as f:
+            self.set_state(json.load(f))
+        return True
+
+    def remove_state(self, path: str):
+        """ Removes the state file saved by save_state, if there is one.
+
+        Feel free to override this method if needed, eg. if save_state writes more than one file.
+
+        Args:
+            - path (str): Path to the file.
+
+        """
+
+        if os.path.exists(path):
+            os.remove(path)
+
 class BaseLogger(metaclass=abc.ABCMeta):
     """ Base class for all Loggers. 
     
@@ -95,6 +178,16 @@ class BaseLogger(metaclass=abc.ABCMeta):
 
         pass
 
+    def reset(self):
+        """ Clears everything logged so far, so the logger can be reused for another configuration.
+
+        Needed to run many configurations in one process, eg. with ExecutorCallable.
+        Does nothing by default, loggers that keep what they log should override this method to clear it.
+
+        """
+
+        pass
+
 class BaseSaver(metaclass=abc.ABCMeta):
     """ Base class for all savers. 
     
@@ -142,3 +235,76 @@ class BaseSaver(metaclass=abc.ABCMeta):
         """
 
         pass
+
+    def exists_snapshot(self):
+        """ Returns a function that behaves like exists, but may answer from a snapshot of storage taken when this is called.
+
+        Searchers use this to check for existing runs of every configuration in a search space,
+        so savers where calling exists is expensive should override this to read storage once and answer each check from memory.
+        By default simply returns the exists method.
+        Feel free to override this method if needed.
+
+        """
+
+        return self.exists
+
+
+class BaseExecutor(metaclass=abc.ABCMeta):
+    """ Base class for all Executors.
+
+    This must be subclassed to implement different Executor classes.
+    Please name your executor class Executor<ExecutorName>.
+    Outlines a protocol for running the job for a configuration somewhere, eg. submitting it to SLURM or running it locally.
+    Methods document what they should do once implemented.
+
+    """
+
+    @abc.abstractmethod
+    def __init__(self, *args, **kwargs):
+        """ Initialises the executor. """
+
+        pass
+
+    @abc.abstractmethod
+    def submit(self, sh_path: str, script_path: str = None, args: dict = {}):
+        """ Submits a job for one configuration.
+
+        Should return as soon as the job has been handed off where possible, 
+        so that many jobs can be submitted without waiting for each one to finish.
+
+        Args:
+            - sh_path (str): Path to the Bash script used to launch the job.
+            - script_path (str, optional): Path to the script (of the model) to be run by the job, default is None.
+            - args (dict, optional): Contains (key, value) pairs for all the arguments to be passed to the job.
+
+        """
+
+        pass
+
+    def get_handed_off(self) -> int:
+        """ Returns the number of jobs submitted since the last call to wait that have been handed off, counting from the first job.
+
+        A job is handed off once it no longer depends on this process, eg. once sbatch has accepted (or rejected) it,
+        or once it has finished running if it runs on the local machine.
+        Only jobs before the first job that hasn't been handed off are counted,
+        sbatchit uses this to only save the searcher's state up to jobs that would survive the launcher being killed.
+        By default no jobs are counted until wait returns, which is always safe but means sbatchit can't save any progress before then.
+        Feel free to override this method if needed.
+
+        Returns:
+            - num_jobs (int): Number of jobs handed off.
+
+        """
+
+        return 0
+
+    @abc.abstractmethod
+    def wait(self):
+        """ Blocks until every job submitted so far has been handed off or has finished.
+
+        Should return a SubmissionReport (see slune.executors.report) with the outcome of each job submitted since the last call to wait,
+        in the order they were submitted.
+
+        """
+
+        pass
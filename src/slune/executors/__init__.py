@@ -0,0 +1,8 @@
+from .report import SubmissionReport
+from .slurm import ExecutorSlurm
+from .window import ExecutorSlurmWindow
+from .local import ExecutorLocal
+from .aio import ExecutorAsync
+from .callable import ExecutorCallable
+
+# __all__ = ['SubmissionReport', 'ExecutorSlurm', 'ExecutorSlurmWindow', 'ExecutorLocal', 'ExecutorAsync', 'ExecutorCallable']
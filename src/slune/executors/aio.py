@@ -0,0 +1,134 @@
+from typing import List, Optional, Tuple
+import asyncio
+import sys
+import threading
+from slune.base import BaseExecutor
+from .local import LAUNCH_FAILED, get_local_command
+from .report import SubmissionReport
+
+class ExecutorAsync(BaseExecutor):
+    """ Runs each job on the local machine as an asyncio subprocess.
+
+    Jobs are run by an event loop in a background thread, so submit returns straight away and jobs start running immediately.
+    Unlike ExecutorLocal there are no worker processes, each job is just a child process,
+    which makes this executor cheap for running lots of short jobs (or commands that mostly wait).
+    See get_local_command for how the command for each job is created.
+
+    Attributes:
+        - max_workers (int): Maximum number of jobs to run at once, if None there is no limit.
+        - interpreter (str): Interpreter used to run the script (of the model).
+        - report (SubmissionReport): Report of the jobs submitted since the last call to wait.
+
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, interpreter: str = sys.executable):
+        """ Initialises the asyncio executor.
+
+        Args:
+            - max_workers (int, optional): Maximum number of jobs to run at once, default is None (no limit).
+            - interpreter (str, optional): Interpreter used to run the script (of the model), default is the interpreter running slune.
+
+        """
+
+        super(ExecutorAsync, self).__init__()
+        if (max_workers is not None) and (max_workers < 1):
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+        self.max_workers = max_workers
+        self.interpreter = interpreter
+        self.report = SubmissionReport()
+        self._pending = []
+        self._handed_off = 0
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+
+    def _start_loop(self):
+        """ Starts the event loop in a background thread. """
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        if self.max_workers is not None:
+            self._semaphore = asyncio.run_coroutine_threadsafe(self._make_semaphore(), self._loop).result()
+
+    async def _make_semaphore(self) -> asyncio.Semaphore:
+        """ Creates the semaphore limiting the number of running jobs, from inside the event loop. """
+
+        return asyncio.Semaphore(self.max_workers)
+
+    async def _run(self, command: List[str]) -> Tuple[int, Optional[str]]:
+        """ Runs a command as a subprocess and returns its exit code, and a message if the command couldn't be started. """
+
+        if self._semaphore is None:
+            return await self._run_process(command)
+        async with self._semaphore:
+            return await self._run_process(command)
+
+    async def _run_process(self, command: List[str]) -> Tuple[int, Optional[str]]:
+        """ Starts a command as a subprocess and waits for it, see _run. """
+
+        try:
+            process = await asyncio.create_subprocess_exec(*command)
+        except OSError as e:
+            # Eg. a missing interpreter or script, reported for this job rather than stopping the others
+            return LAUNCH_FAILED, f"Couldn't run {command[0]}: {e}"
+        return await process.wait(), None
+
+    def submit(self, sh_path: str, script_path: str = None, args: dict = {}):
+        """ Starts running a job, returns without waiting for it to finish.
+
+        Args:
+            - sh_path (str): Path to the Bash script, only run if script_path is None.
+            - script_path (str, optional): Path to the script (of the model) to be run, default is None.
+            - args (dict, optional): Contains (key, value) pairs for all the arguments to be passed to the script.
+
+        """
+
+        if self._loop is None:
+            self._start_loop()
+        command = get_local_command(sh_path, script_path, args, self.interpreter)
+        self.report.start()
+        self._pending.append((args, asyncio.run_coroutine_threadsafe(self._run(command), self._loop)))
+
+    def get_handed_off(self) -> int:
+        """ Returns the number of jobs submitted since the last call to wait that have finished, counting from the first job.
+
+        Jobs run on the local machine stop if this process is killed, so a job is only handed off once it has finished.
+
+        Returns:
+            - num_jobs (int): Number of jobs handed off.
+
+        """
+
+        while (self._handed_off < len(self._pending)) and self._pending[self._handed_off][1].done():
+            self._handed_off += 1
+        return self._handed_off
+
+    def wait(self) -> SubmissionReport:
+        """ Blocks until all submitted jobs have finished, then stops the event loop.
+
+        A job whose command couldn't be started is reported as failed with exit code LAUNCH_FAILED (see ExecutorLocal) and the error as its message,
+        the other jobs are still run and reported.
+
+        Returns:
+            - report (SubmissionReport): Outcome of each job, in the order they were submitted.
+
+        """
+
+        pending, self._pending, self._handed_off = self._pending, [], 0
+        report, self.report = self.report, SubmissionReport()
+        try:
+            for args, future in pending:
+                try:
+                    exit_code, message = future.result()
+                except Exception as e:
+                    exit_code, message = LAUNCH_FAILED, f"Couldn't run the job: {e!r}"
+                report.add(args, exit_code, message)
+        finally:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join()
+                self._loop.close()
+                self._loop, self._thread, self._semaphore = None, None, None
+        report.finish()
+        return report
@@ -0,0 +1,87 @@
+from typing import Callable, Optional
+import traceback
+from slune.base import BaseExecutor
+from slune.savers.ext import SaverExt
+from .report import SubmissionReport
+
+class ExecutorCallable(BaseExecutor):
+    """ Runs each configuration by calling a Python function in the current process.
+
+    Launching a new interpreter for every configuration means re-importing libraries and reloading data every time,
+    which can take longer than the training itself for small models.
+    This executor is instead given a function, eg. 'train(config, saver)', in place of the script (of the model),
+    and calls it for each configuration one after the other, so anything loaded once (eg. at module level) stays warm.
+
+    Before each call the saver is re-targeted at the configuration using getset_current_path and its logger is reset,
+    so the function only needs to log its metrics with saver.log, they are saved once the function returns.
+    If the function raises an exception the configuration is recorded as failed in the report (with the traceback as its message)
+    and we carry on with the next one.
+
+    For example:
+        sbatchit(train, None, searcher, executor=ExecutorCallable(get_csv_saver()))
+
+    Attributes:
+        - saver (SaverExt): Saver passed to the function and used to save its results, None if the function handles saving itself.
+        - report (SubmissionReport): Report of the configurations run since the last call to wait.
+
+    """
+
+    def __init__(self, saver: Optional[SaverExt] = None):
+        """ Initialises the callable executor.
+
+        Args:
+            - saver (SaverExt, optional): Saver passed to the function and used to save its results, default is None.
+                If None the function is called with None as the saver.
+
+        """
+
+        super(ExecutorCallable, self).__init__()
+        self.saver = saver
+        self.report = SubmissionReport()
+
+    def submit(self, sh_path: str, script_path: Callable, args: dict = {}):
+        """ Runs the function for one configuration, blocks until it returns.
+
+        Args:
+            - sh_path (str): Not used, jobs are run in the current process.
+            - script_path (callable): Function to call for the configuration, as fn(args, saver).
+            - args (dict, optional): Contains (key, value) pairs for all the arguments of the configuration.
+
+        """
+
+        if not callable(script_path):
+            raise TypeError(f"ExecutorCallable must be given a function in place of the script path, got {script_path}")
+        self.report.start()
+        if self.saver is not None:
+            self.saver.logger.reset()
+            self.saver.getset_current_path(dict(args), save=False)
+        try:
+            script_path(dict(args), self.saver)
+        except Exception:
+            self.report.add(args, 1, traceback.format_exc())
+            return
+        if (self.saver is not None) and (len(self.saver.logger.results) > 0):
+            self.saver.save_collated()
+        self.report.add(args, 0)
+
+    def get_handed_off(self) -> int:
+        """ Returns the number of configurations run since the last call to wait, they have all finished as they run in submit.
+
+        Returns:
+            - num_jobs (int): Number of configurations run.
+
+        """
+
+        return len(self.report)
+
+    def wait(self) -> SubmissionReport:
+        """ Returns the report of the configurations run since the last call to wait, they have all finished as they run in submit.
+
+        Returns:
+            - report (SubmissionReport): Outcome of each configuration, in the order they were run.
+
+        """
+
+        report, self.report = self.report, SubmissionReport()
+        report.finish()
+        return report
@@ -0,0 +1,132 @@
+from typing import List, Optional, Tuple
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from slune.base import BaseExecutor
+from slune.utils import dict_to_strings
+from .report import SubmissionReport
+
+def get_local_command(sh_path: str, script_path: str = None, args: dict = {}, interpreter: str = sys.executable) -> List[str]:
+    """ Creates the command used to run a job on the local machine.
+
+    The sbatch scripts only make sense to SLURM, so if we are given a script (of the model) we run it directly with the interpreter,
+    ie. 'interpreter script_path --argument_name=argument_value ...'.
+    If we are not given a script we run the Bash script itself with the arguments.
+
+    Args:
+        - sh_path (str): Path to the Bash script, only run if script_path is None.
+        - script_path (str, optional): Path to the script (of the model) to be run, default is None.
+        - args (dict, optional): Contains (key, value) pairs for all the arguments to be passed to the script.
+        - interpreter (str, optional): Interpreter used to run the script, default is the interpreter running slune.
+
+    Returns:
+        - command (list of str): The command to run.
+
+    """
+
+    args = dict_to_strings(args, ready_for_cl=True)
+    if script_path == None:
+        return [sh_path] + args
+    return [interpreter, script_path] + args
+
+# Exit code recorded for a job whose command couldn't be started, as used by shells for a command that can't be found
+LAUNCH_FAILED = 127
+
+def _run_command(command: List[str]) -> Tuple[int, Optional[str]]:
+    """ Runs a command in a subprocess and returns its exit code, and a message if the command couldn't be started. """
+
+    try:
+        return subprocess.run(command).returncode, None
+    except OSError as e:
+        # Eg. a missing interpreter or script, reported for this job rather than stopping the others
+        return LAUNCH_FAILED, f"Couldn't run {command[0]}: {e}"
+
+class ExecutorLocal(BaseExecutor):
+    """ Runs each job on the local machine in a pool of worker processes.
+
+    Lets the same sweep be run without a scheduler, eg. on a workstation or inside an existing SLURM allocation.
+    Each worker runs one job at a time as a subprocess, see get_local_command for how the command is created,
+    so running max_workers jobs at once keeps that many cores busy.
+    submit returns straight away, call wait to block until all the jobs have finished.
+
+    Attributes:
+        - max_workers (int): Maximum number of jobs to run at once, if None uses the number of processors on the machine.
+        - interpreter (str): Interpreter used to run the script (of the model).
+        - report (SubmissionReport): Report of the jobs submitted since the last call to wait.
+
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, interpreter: str = sys.executable):
+        """ Initialises the local executor.
+
+        Args:
+            - max_workers (int, optional): Maximum number of jobs to run at once, default is None (the number of processors on the machine).
+            - interpreter (str, optional): Interpreter used to run the script (of the model), default is the interpreter running slune.
+
+        """
+
+        super(ExecutorLocal, self).__init__()
+        self.max_workers = max_workers
+        self.interpreter = interpreter
+        self.report = SubmissionReport()
+        self._pending = []
+        self._handed_off = 0
+        self._pool = None
+
+    def submit(self, sh_path: str, script_path: str = None, args: dict = {}):
+        """ Queues a job to be run by the pool, returns without waiting for it to run.
+
+        Args:
+            - sh_path (str): Path to the Bash script, only run if script_path is None.
+            - script_path (str, optional): Path to the script (of the model) to be run, default is None.
+            - args (dict, optional): Contains (key, value) pairs for all the arguments to be passed to the script.
+
+        """
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        command = get_local_command(sh_path, script_path, args, self.interpreter)
+        self.report.start()
+        self._pending.append((args, self._pool.submit(_run_command, command)))
+
+    def get_handed_off(self) -> int:
+        """ Returns the number of jobs submitted since the last call to wait that have finished, counting from the first job.
+
+        Jobs run on the local machine stop if this process is killed, so a job is only handed off once it has finished.
+
+        Returns:
+            - num_jobs (int): Number of jobs handed off.
+
+        """
+
+        while (self._handed_off < len(self._pending)) and self._pending[self._handed_off][1].done():
+            self._handed_off += 1
+        return self._handed_off
+
+    def wait(self) -> SubmissionReport:
+        """ Blocks until all submitted jobs have finished, then shuts down the pool.
+
+        A job whose command couldn't be started is reported as failed with exit code LAUNCH_FAILED and the error as its message,
+        the other jobs are still run and reported.
+
+        Returns:
+            - report (SubmissionReport): Outcome of each job, in the order they were submitted.
+
+        """
+
+        pending, self._pending, self._handed_off = self._pending, [], 0
+        report, self.report = self.report, SubmissionReport()
+        try:
+            for args, future in pending:
+                try:
+                    exit_code, message = future.result()
+                except Exception as e:
+                    # Eg. the worker process running the job died
+                    exit_code, message = LAUNCH_FAILED, f"Couldn't run the job: {e!r}"
+                report.add(args, exit_code, message)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+        report.finish()
+        return report
@@ -0,0 +1,86 @@
+from typing import List, Optional, Tuple
+import time
+
+class SubmissionReport:
+    """ Collects the outcome of each job handed to an executor.
+
+    Executors add an entry for each job as it is submitted (or run), 
+    then return the report from their wait method, so failed configurations can be inspected and resubmitted
+    instead of being lost in the job's output.
+    Also records when the first job was submitted and when the last one was handed off, so submission throughput can be measured.
+
+    Attributes:
+        - configs (list of dict): The arguments given for each job, in the order they were submitted.
+        - exit_codes (list of int): Exit code for each job, 0 indicates success.
+        - messages (list of str): Message for each job, eg. the output of sbatch, None if there is no message.
+        - start_time (float): Time the first job was submitted, None if no jobs have been submitted.
+        - end_time (float): Time the report was finished, None if the report hasn't been finished.
+
+    """
+
+    def __init__(self):
+        """ Initialises an empty report. """
+
+        self.configs = []
+        self.exit_codes = []
+        self.messages = []
+        self.start_time = None
+        self.end_time = None
+
+    def __len__(self) -> int:
+        """ Returns the number of jobs in the report. """
+
+        return len(self.configs)
+
+    def start(self):
+        """ Records the time the first job was submitted, does nothing if already started. """
+
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+
+    def add(self, config: dict, exit_code: int, message: Optional[str] = None):
+        """ Adds the outcome of a job to the report.
+
+        Args:
+            - config (dict): The arguments given for the job.
+            - exit_code (int): Exit code for the job, 0 indicates success.
+            - message (str, optional): Message for the job, default is None.
+
+        """
+
+        self.start()
+        self.configs.append(config)
+        self.exit_codes.append(exit_code)
+        self.messages.append(message)
+
+    def finish(self):
+        """ Records the time the last job was handed off. """
+
+        self.start()
+        self.end_time = time.perf_counter()
+
+    def get_succeeded(self) -> List[dict]:
+        """ Returns the arguments of each job that succeeded. """
+
+        return [c for c, e in zip(self.configs, self.exit_codes) if e == 0]
+
+    def get_failed(self) -> List[Tuple[dict, int, Optional[str]]]:
+        """ Returns the arguments, exit code and message of each job that failed. """
+
+        return [(c, e, m) for c, e, m in zip(self.configs, self.exit_codes, self.messages) if e != 0]
+
+    def get_elapsed(self) -> float:
+        """ Returns the time in seconds between the first job being submitted and the report being finished. """
+
+        if self.start_time is None:
+            return 0.0
+        end_time = self.end_time if self.end_time is not None else time.perf_counter()
+        return end_time - self.start_time
+
+    def get_throughput(self) -> float:
+        """ Returns the number of jobs handed off per second. """
+
+        elapsed = self.get_elapsed()
+        if elapsed == 0:
+            return 0.0
+        return len(self) / elapsed
@@ -0,0 +1,140 @@
+from typing import List, Tuple
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from slune.base import BaseExecutor
+from slune.utils import dict_to_strings
+from .report import SubmissionReport
+
+class ExecutorSlurm(BaseExecutor):
+    """ Submits each job to SLURM using sbatch.
+
+    This is the executor used by submit_job and sbatchit when no other executor is given.
+    Each call to submit runs sbatch once with the Bash script, the script (of the model) and the arguments,
+    ie. 'sbatch sh_path script_path --argument_name=argument_value ...'.
+
+    Each sbatch call can take a good fraction of a second on a busy controller,
+    so if max_workers > 1 up to that many sbatch calls are run at once in a pool of threads and submit returns straight away.
+    Otherwise submit blocks until sbatch returns.
+    The outcome of every submission, including the error given by sbatch if it fails, is recorded in the report returned by wait,
+    so one failed submission doesn't stop a sweep.
+
+    Attributes:
+        - max_workers (int): Maximum number of sbatch calls to run at once.
+        - report (SubmissionReport): Report of the jobs submitted since the last call to wait.
+
+    """
+
+    def __init__(self, max_workers: int = 1):
+        """ Initialises the SLURM executor.
+
+        Args:
+            - max_workers (int, optional): Maximum number of sbatch calls to run at once, default is 1.
+
+        """
+
+        super(ExecutorSlurm, self).__init__()
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+        self.max_workers = max_workers
+        self.report = SubmissionReport()
+        self._pending = []
+        self._handed_off = 0
+        self._pool = None
+
+    def get_command(self, sh_path: str, script_path: str = None, args: dict = {}) -> List[str]:
+        """ Creates the sbatch command for a job.
+
+        Args:
+            - sh_path (str): Path to the sbatch script to be submitted.
+            - script_path (str, optional): Path to the script (of the model) to be run by the job, default is None.
+            - args (dict, optional): Contains (key, value) pairs for all the arguments to be passed to the job.
+
+        Returns:
+            - command (list of str): The sbatch command.
+
+        """
+
+        args = dict_to_strings(args, ready_for_cl=True)
+        if script_path == None:
+            command = [sh_path] + args
+        else:
+            command = [sh_path, script_path] + args
+        return ['sbatch'] + command
+
+    def sbatch(self, command: List[str]) -> Tuple[int, str]:
+        """ Runs an sbatch command.
+
+        Args:
+            - command (list of str): The sbatch command, see get_command.
+
+        Returns:
+            - exit_code (int): Exit code of sbatch, 0 indicates success.
+            - message (str): Output of sbatch if it succeeded, otherwise the error.
+
+        """
+
+        try:
+            result = subprocess.run(command, capture_output=True, text=True)
+        except OSError as e:
+            # eg. sbatch is not installed
+            return 127, str(e)
+        if result.returncode == 0:
+            return 0, result.stdout.strip()
+        return result.returncode, result.stderr.strip()
+
+    def submit(self, sh_path: str, script_path: str = None, args: dict = {}):
+        """ Submits a job to SLURM.
+
+        Blocks until sbatch returns if max_workers is 1, otherwise returns straight away.
+
+        Args:
+            - sh_path (str): Path to the sbatch script to be submitted.
+            - script_path (str, optional): Path to the script (of the model) to be run by the job, default is None.
+            - args (dict, optional): Contains (key, value) pairs for all the arguments to be passed to the job.
+
+        """
+
+        command = self.get_command(sh_path, script_path, args)
+        self.report.start()
+        if self.max_workers == 1:
+            self._pending.append((args, self.sbatch(command)))
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            self._pending.append((args, self._pool.submit(self.sbatch, command)))
+
+    def get_handed_off(self) -> int:
+        """ Returns the number of jobs submitted since the last call to wait that sbatch has returned for, counting from the first job.
+
+        Returns:
+            - num_jobs (int): Number of jobs handed off.
+
+        """
+
+        # Jobs are handed off in order when sbatch is run in submit, so only the jobs since the last check need to be looked at
+        while self._handed_off < len(self._pending):
+            outcome = self._pending[self._handed_off][1]
+            if not (isinstance(outcome, tuple) or outcome.done()):
+                break
+            self._handed_off += 1
+        return self._handed_off
+
+    def wait(self) -> SubmissionReport:
+        """ Blocks until sbatch has returned for every job submitted since the last call to wait.
+
+        Returns:
+            - report (SubmissionReport): Outcome of each submission, in the order they were submitted.
+
+        """
+
+        pending, self._pending, self._handed_off = self._pending, [], 0
+        report, self.report = self.report, SubmissionReport()
+        for args, outcome in pending:
+            if not isinstance(outcome, tuple):
+                outcome = outcome.result()
+            report.add(args, *outcome)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        report.finish()
+        return report
@@ -0,0 +1,182 @@
+from typing import List, Optional, Set
+import subprocess
+import getpass
+import time
+from .slurm import ExecutorSlurm
+
+# Parts of sbatch errors that retrying won't fix, eg. a missing script, an invalid option, account or partition
+PERMANENT_ERRORS = ['invalid', 'unrecognized option', 'unable to open file', 'no such file', 'not found', 'permission denied']
+
+class ExecutorSlurmWindow(ExecutorSlurm):
+    """ Submits jobs to SLURM keeping at most max_queued of them in the queue at once.
+
+    Clusters often limit how many jobs a user can have in the queue (MaxSubmitJobs), 
+    and sbatch rejects any job submitted past that limit.
+    This executor keeps a sliding window of our jobs in the queue instead:
+    submit blocks while the window is full, checking which of our jobs are still queued (in any state squeue lists by default,
+    eg. pending, running, completing or suspended) with a single squeue call, and tops the window up as jobs finish.
+    If squeue keeps failing (max_poll_failures times in a row), or the window stays full for longer than max_wait,
+    the job is recorded as failed in the report rather than blocking forever.
+    If sbatch still rejects a job (eg. because of jobs submitted from elsewhere) it is retried with exponential backoff,
+    so a long sweep can be left to flow through the queue unattended without losing configurations.
+    Errors retrying won't fix (eg. a missing script or an invalid option, see PERMANENT_ERRORS) are not retried.
+    Only jobs that fail on every retry are recorded as failed in the report.
+
+    Job IDs are read from the output of 'sbatch --parsable', so the sbatch script must not be run with another output format.
+
+    Attributes:
+        - max_queued (int): Maximum number of our jobs that can be in the queue at once.
+        - max_retries (int): Number of times to retry a rejected submission before recording it as failed.
+        - backoff (float): Seconds to wait before the first retry, doubled for each retry after that.
+        - max_backoff (float): Maximum number of seconds to wait between retries.
+        - poll_interval (float): Seconds to wait between checks of the queue while the window is full.
+        - max_poll_failures (int): Number of squeue calls in a row that can fail while the window is full before giving up on a job.
+        - max_wait (float): Maximum number of seconds to wait for space in the window for a job, None if there is no limit.
+        - user (str): User whose jobs are checked with squeue.
+        - queued (set of str): IDs of our jobs that were in the queue when we last checked.
+
+    """
+
+    def __init__(self, max_queued: int = 100, max_retries: int = 5, backoff: float = 1.0, max_backoff: float = 300.0,
+                 poll_interval: float = 30.0, user: Optional[str] = None, max_poll_failures: int = 10, max_wait: Optional[float] = None):
+        """ Initialises the sliding window SLURM executor.
+
+        Args:
+            - max_queued (int, optional): Maximum number of our jobs that can be in the queue at once, default is 100.
+            - max_retries (int, optional): Number of times to retry a rejected submission, default is 5.
+            - backoff (float, optional): Seconds to wait before the first retry, doubled for each retry after that, default is 1.
+            - max_backoff (float, optional): Maximum number of seconds to wait between retries, default is 300.
+            - poll_interval (float, optional): Seconds to wait between checks of the queue while the window is full, default is 30.
+            - user (str, optional): User whose jobs are checked with squeue, default is None (the current user).
+            - max_poll_failures (int, optional): Number of squeue calls in a row that can fail while the window is full
+                before the job is recorded as failed, default is 10.
+            - max_wait (float, optional): Maximum number of seconds to wait for space in the window for a job,
+                default is None (no limit).
+
+        """
+
+        super(ExecutorSlurmWindow, self).__init__(max_workers=1)
+        if max_queued < 1:
+            raise ValueError(f"max_queued must be at least 1, got {max_queued}")
+        if max_retries < 0:
+            raise ValueError(f"max_retries must be non-negative, got {max_retries}")
+        if max_poll_failures < 1:
+            raise ValueError(f"max_poll_failures must be at least 1, got {max_poll_failures}")
+        self.max_queued = max_queued
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.max_poll_failures = max_poll_failures
+        self.max_wait = max_wait
+        self.user = user if user is not None else getpass.getuser()
+        self.queued = set()
+
+    def get_command(self, sh_path: str, script_path: str = None, args: dict = {}) -> List[str]:
+        """ Creates the sbatch command for a job, asking sbatch to only print the job ID.
+
+        Args:
+            - sh_path (str): Path to the sbatch script to be submitted.
+            - script_path (str, optional): Path to the script (of the model) to be run by the job, default is None.
+            - args (dict, optional): Contains (key, value) pairs for all the arguments to be passed to the job.
+
+        Returns:
+            - command (list of str): The sbatch command.
+
+        """
+
+        command = super(ExecutorSlurmWindow, self).get_command(sh_path, script_path, args)
+        return command[:1] + ['--parsable'] + command[1:]
+
+    def get_queued(self) -> Optional[Set[str]]:
+        """ Returns the IDs of all the user's jobs in the queue, using one squeue call.
+
+        squeue's default states are used, so jobs that are pending, running, configuring, completing, suspended or requeued
+        all take up space in the window.
+
+        Returns:
+            - job_ids (set of str): IDs of the user's queued jobs, None if squeue failed.
+
+        """
+
+        try:
+            result = subprocess.run(['squeue', '-h', '-u', self.user, '-o', '%A'], capture_output=True, text=True)
+        except OSError:
+            return None
+        if result.returncode != 0:
+            return None
+        return set(line.strip() for line in result.stdout.splitlines() if line.strip() != '')
+
+    def refresh(self) -> bool:
+        """ Drops our jobs that are no longer in the queue from the window.
+
+        Returns:
+            - checked (bool): True if the queue was checked, False if squeue failed (the window is left as it was).
+
+        """
+
+        job_ids = self.get_queued()
+        if job_ids is None:
+            return False
+        self.queued &= job_ids
+        return True
+
+    def wait_for_space(self) -> Optional[str]:
+        """ Blocks until there is space in the window for another job, or until we give up waiting.
+
+        Returns:
+            - error (str): Why we gave up waiting, None if there is space in the window.
+
+        """
+
+        if len(self.queued) < self.max_queued:
+            return None
+        start = time.monotonic()
+        failures = 0 if self.refresh() else 1
+        while len(self.queued) >= self.max_queued:
+            if failures >= self.max_poll_failures:
+                return f"squeue failed {failures} times in a row, couldn't check for space in the window"
+            if (self.max_wait is not None) and (time.monotonic() - start >= self.max_wait):
+                return f"No space in the window after waiting {self.max_wait} seconds"
+            time.sleep(self.poll_interval)
+            failures = 0 if self.refresh() else failures + 1
+        return None
+
+    def is_permanent(self, exit_code: int, message: str) -> bool:
+        """ Returns True if sbatch failed in a way retrying won't fix, eg. sbatch is missing or the script or an option is invalid. """
+
+        message = message.lower()
+        return (exit_code == 127) or any(error in message for error in PERMANENT_ERRORS)
+
+    def submit(self, sh_path: str, script_path: str = None, args: dict = {}):
+        """ Submits a job to SLURM once there is space in the window, retrying with exponential backoff if sbatch rejects it.
+
+        If we give up waiting for space in the window (see wait_for_space), or sbatch fails in a way retrying won't fix (see is_permanent),
+        the job is recorded as failed straight away.
+
+        Args:
+            - sh_path (str): Path to the sbatch script to be submitted.
+            - script_path (str, optional): Path to the script (of the model) to be run by the job, default is None.
+            - args (dict, optional): Contains (key, value) pairs for all the arguments to be passed to the job.
+
+        """
+
+        command = self.get_command(sh_path, script_path, args)
+        self.report.start()
+        for attempt in range(self.max_retries + 1):
+            error = self.wait_for_space()
+            if error is not None:
+                exit_code, message = 1, error
+                break
+            exit_code, message = self.sbatch(command)
+            if exit_code == 0:
+                # --parsable prints 'job_id' or 'job_id;cluster_name'
+                self.queued.add(message.split(';')[0])
+                break
+            if self.is_permanent(exit_code, message):
+                break
+            if attempt < self.max_retries:
+                time.sleep(min(self.backoff * 2 ** attempt, self.max_backoff))
+                # The rejection may be because the queue is full, so check it again before retrying
+                self.refresh()
+        self._pending.append((args, (exit_code, message)))
@@ -12,6 +12,8 @@ class LoggerDefault(BaseLogger):
             Each row stores all the metrics that were given in a call to the 'log' method,
             each column title is a metric name.
             The first column is always the time stamp at which 'log' is called.
+        - num_resets (int): Number of times the logger has been reset,
+            savers use this to tell the rows logged since a reset apart from rows they have already saved.
 
     """
     
@@ -24,6 +26,7 @@ class LoggerDefault(BaseLogger):
             raise Warning(f"Arguments {args} and keyword arguments {kwargs} are ignored")
         # Initialise results data frame
         self.results = pd.DataFrame()
+        self.num_resets = 0
     
     def log(self, metrics: dict):
         """ Logs the metric/s given.
@@ -47,6 +50,12 @@ class LoggerDefault(BaseLogger):
         # Append metrics dataframe to results dataframe
         self.results = pd.concat([self.results, metrics_df], ignore_index=True)
     
+    def reset(self):
+        """ Clears all the metrics logged so far. """
+
+        self.results = pd.DataFrame()
+        self.num_resets += 1
+
     def read_log(self, data_frame: pd.DataFrame, metric_name: str, select_by: str ='max') -> float:
         """ Reads log and returns value according to select_by.
 
@@ -0,0 +1,246 @@
+""" Persistent index of the results files under a results root directory.
+
+Rebuild the index of a root directory from the files in it (eg. if the index was lost, or files were added or removed by hand) with:
+    python -m slune.resultsindex --slune_results=<root_dir>
+
+"""
+
+from typing import List, Optional
+import json
+import os
+import socket
+import sys
+from slune.utils import strings_to_flags
+
+class ResultsIndex:
+    """ An append-only manifest of the results files under a root directory, so savers can find them without walking the directory tree.
+
+    The index is made of files in the root directory with one line for each results file,
+    holding the json list of the directories (eg. "alpha=0.1") and file name making up the file's path relative to the root directory.
+    The file named '.slune_index' holds the files found by walking the tree (see create and rebuild),
+    and each process that saves results appends a line when it creates a results file to its own shard of the index,
+    named '.slune_index.<host>.<pid>'. Appends to one file from different machines aren't atomic on network file systems
+    (eg. NFS doesn't guarantee O_APPEND across clients), so lines written to one file by jobs on different nodes could overwrite each other,
+    while a shard only ever has one writer, so no locking is needed.
+    Reading the index lists the root directory once and only reads the lines added to each shard since it was last read,
+    so checking for new results is cheap, while walking the tree on a network file system (eg. NFS or Lustre) costs a round trip for every directory.
+
+    The index only knows about results files added through it, if it is missing it is built from the tree the first time it is read.
+    It must be rebuilt with rebuild (or by running this module) after changing the tree by hand,
+    or if results may be missing from it (eg. a job was killed between saving a results file and adding it to the index).
+    An index built because it was missing is only put in place if no other job has put one there first,
+    so an index is never replaced while jobs are appending to it, except by rebuild.
+
+    Attributes:
+        - root_dir (str): Path to the root directory holding the results.
+        - path (str): Path to the index file built from the tree, shards are named after it.
+        - shard_path (str): Path to the shard this process appends to.
+        - files (list of str): Paths of the results files in the index, in the order they were read.
+        - tree (dict): Subdirectory names of each directory holding results files in the index, see get_tree.
+
+    """
+
+    FILENAME = '.slune_index'
+
+    def __init__(self, root_dir: str):
+        """ Initialises the index, the index file is read (or built) when it is first needed.
+
+        Args:
+            - root_dir (str): Path to the root directory holding the results.
+
+        """
+
+        self.root_dir = root_dir
+        self.path = os.path.join(root_dir, self.FILENAME)
+        self.shard_path = f'{self.path}.{socket.gethostname()}.{os.getpid()}'
+        self.files = []
+        self.known = set()
+        self.tree = {root_dir: []}
+        # Inode and number of bytes read of each index file
+        self.read_to = {}
+
+    def to_path(self, parts: List[str]) -> str:
+        """ Joins the parts of a path relative to the root directory in a record onto the root directory. """
+
+        return os.path.join(self.root_dir, *parts)
+
+    def clear(self):
+        """ Forgets the files read from the index, so it is read again from the start. """
+
+        self.files, self.known, self.tree, self.read_to = [], set(), {self.root_dir: []}, {}
+
+    def get_shards(self) -> List[str]:
+        """ Returns the paths of the shards of the index written by each process, see the class documentation. """
+
+        prefix = self.FILENAME + '.'
+        return [os.path.join(self.root_dir, name) for name in sorted(os.listdir(self.root_dir)) if name.startswith(prefix) and not name.endswith('.tmp')]
+
+    def load(self) -> List[str]:
+        """ Reads the lines added to the index since it was last read, building the index first if it doesn't exist.
+
+        Returns:
+            - files (list of str): Paths of the results files in the index.
+
+        """
+
+        if not os.path.exists(self.path):
+            self.create()
+        paths = [self.path] + self.get_shards()
+        if any(path not in paths for path in self.read_to):
+            # A shard was removed, so the index was rebuilt since we last read it
+            self.clear()
+        for path in paths:
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                # Removed by a rebuild since we listed the shards, its lines are in the rebuilt index
+                continue
+            with f:
+                inode = os.fstat(f.fileno()).st_ino
+                f.seek(0, os.SEEK_END)
+                last_inode, offset = self.read_to.get(path, (inode, 0))
+                if (inode != last_inode) or (f.tell() < offset):
+                    # The index was rebuilt since we last read it (replacing the file), so read it again from the start
+                    self.clear()
+                    return self.load()
+                f.seek(offset)
+                data = f.read()
+            # Only read complete lines, a line may be half written by its writer
+            end = data.rfind(b'\n') + 1
+            for line in data[:end].splitlines():
+                if line.strip() == b'':
+                    continue
+                parts = json.loads(line)
+                file = self.to_path(parts)
+                if file not in self.known:
+                    self.known.add(file)
+                    self.files.append(file)
+                    self.add_to_tree(parts[:-1])
+            self.read_to[path] = (inode, offset + end)
+        return self.files
+
+    def add_to_tree(self, dirs: List[str]):
+        """ Adds the directories (relative to the root directory) holding a results file to the tree. """
+
+        parent = self.root_dir
+        for part in dirs:
+            child = os.path.join(parent, part)
+            if child not in self.tree:
+                self.tree[child] = []
+                self.tree[parent].append(part)
+            parent = child
+
+    def add(self, path: str):
+        """ Adds a results file to the index, if it isn't in it already.
+
+        Args:
+            - path (str): Path to the results file, must be under the root directory.
+
+        """
+
+        self.load()
+        if path in self.known:
+            return
+        parts = os.path.relpath(path, self.root_dir).split(os.path.sep)
+        if parts[0] == os.pardir:
+            raise ValueError(f"{path} is not under the root directory {self.root_dir}")
+        line = (json.dumps(parts) + '\n').encode('utf-8')
+        # Only this process writes to its shard, so lines appended by jobs on other nodes can't overwrite it
+        fd = os.open(self.shard_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self.load()
+
+    def walk(self) -> str:
+        """ Writes an index of the results files (files named "results_*") found by walking the root directory to a temporary file.
+
+        Returns:
+            - tmp_path (str): Path to the temporary file.
+
+        """
+
+        records = []
+        for root, dirs, files in os.walk(self.root_dir):
+            dirs.sort()
+            for file in sorted(files):
+                if file.startswith('results_') and not file.endswith('.tmp'):
+                    records.append(os.path.relpath(os.path.join(root, file), self.root_dir).split(os.path.sep))
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.{id(self)}.tmp'
+        with open(tmp_path, 'w') as f:
+            for parts in records:
+                f.write(json.dumps(parts) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp_path
+
+    def create(self):
+        """ Builds the index from the tree if there is no index file, keeping the index of another job if it creates one first.
+
+        The index is written to a temporary file and then linked into place, which fails if the index file exists,
+        so an index another job has started appending to is never replaced.
+
+        """
+
+        tmp_path = self.walk()
+        try:
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+
+    def rebuild(self) -> int:
+        """ Rebuilds the index from the results files (files named "results_*") found by walking the root directory.
+
+        The new index is written to a temporary file first and then replaces the old one, so readers never see a partial index,
+        then the shards are removed, as the files in them are in the new index.
+        Results files added by other jobs while the index is rebuilt may be missed, so rebuild when no jobs are saving results.
+
+        Returns:
+            - num_files (int): Number of results files in the index.
+
+        """
+
+        tmp_path = self.walk()
+        os.replace(tmp_path, self.path)
+        for shard in self.get_shards():
+            os.remove(shard)
+        self.clear()
+        return len(self.load())
+
+    def get_files(self, ext: Optional[str] = None) -> List[str]:
+        """ Returns the paths of the results files in the index, only those ending with ext if it is given. """
+
+        files = self.load()
+        return list(files) if ext is None else [f for f in files if f.endswith(ext)]
+
+    def get_tree(self) -> dict:
+        """ Returns the subdirectory names of each directory holding results files (and their parent directories).
+
+        The tree is kept up to date as lines are read from the index, so this only reads the lines added since it was last read.
+        The tree returned is the index's own, so it must not be changed.
+
+        Returns:
+            - tree (dict): Maps the path of each directory, starting with the root directory, to a list of the names of its subdirectories,
+                in the form used by find_directory_path and get_numeric_equiv.
+
+        """
+
+        self.load()
+        return self.tree
+
+def main(argv: List[str]) -> int:
+    """ Rebuilds the index of a root directory given the command-line arguments. """
+
+    args = strings_to_flags(argv)
+    index = ResultsIndex(args.get('slune_results', os.path.join('.', 'slune_results')))
+    num_files = index.rebuild()
+    print(f"Rebuilt the index of {index.root_dir}, found {num_files} results files")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
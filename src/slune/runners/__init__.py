@@ -0,0 +1,5 @@
+""" Scripts that slune submits as jobs to run configurations on its behalf.
+
+Each module can be run as a script, so its path can be given to submit_job as the script_path.
+
+"""
@@ -0,0 +1,121 @@
+""" Runs a pack of configurations from a manifest inside a single job.
+
+Submitted by sbatchit when packing configurations into jobs, run as:
+    python pack.py --slune_script=<script_path> --slune_manifest=<manifest_path> --slune_start=<start> --slune_stop=<stop> [--slune_workers=<workers>] [--slune_in_process=True]
+
+By default the script is run in a new Python interpreter for each configuration, so every configuration pays the interpreter's
+start up and the script's imports again (eg. seconds for a deep learning framework), packing only saves the scheduler's overhead.
+With --slune_in_process=True the configurations are instead run one after the other inside this interpreter (see run_in_process),
+so modules imported by the script are only imported once for the whole pack.
+
+"""
+
+from typing import List, Optional
+import os
+import runpy
+import sys
+import traceback
+from slune.executors.local import ExecutorLocal
+from slune.executors.report import SubmissionReport
+from slune.utils import read_manifest_range, strings_to_flags
+
+def get_num_workers() -> int:
+    """ Returns the number of cores allocated to this job.
+
+    Uses SLURM_CPUS_PER_TASK if we are running in a SLURM job, otherwise the number of cores we can run on.
+
+    Returns:
+        - num_workers (int): Number of cores allocated to this job.
+
+    """
+
+    cpus = os.environ.get('SLURM_CPUS_PER_TASK')
+    if cpus is not None:
+        return int(cpus)
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def run_in_process(script_path: str, args: List[str]) -> int:
+    """ Runs a script as __main__ inside this interpreter, as if it was run with "python <script_path> <args>".
+
+    The script's module level state is created again for each run, but modules it imports are only imported once,
+    so this only suits scripts that don't rely on global state outside their own module (eg. set by the modules they import)
+    being fresh, and that don't leave threads or child processes running when they finish.
+
+    Args:
+        - script_path (str): Path to the script.
+        - args (list of str): Command line arguments for the script.
+
+    Returns:
+        - exit_code (int): Exit code the script exited with, 0 if it finished without calling sys.exit,
+            1 if it raised an exception (which is printed).
+
+    """
+
+    argv, path = sys.argv, list(sys.path)
+    sys.argv = [script_path] + list(args)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script_path)))
+    try:
+        runpy.run_path(script_path, run_name='__main__')
+        return 0
+    except SystemExit as e:
+        if (e.code is None) or isinstance(e.code, int):
+            return int(e.code or 0)
+        print(e.code, file=sys.stderr)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.argv, sys.path[:] = argv, path
+
+def run_pack(script_path: str, manifest_path: str, start: int, stop: int, workers: Optional[int] = None, in_process: bool = False) -> SubmissionReport:
+    """ Runs the script for each configuration in a range of a manifest.
+
+    By default each configuration is run in a new Python interpreter, see the module documentation.
+
+    Args:
+        - script_path (str): Path to the script (of the model) to be run for each configuration.
+        - manifest_path (str): Path to the manifest holding the arguments for each configuration, see write_manifest.
+        - start (int): Index of the first configuration to run.
+        - stop (int): Index one past the last configuration to run.
+        - workers (int, optional): Number of configurations to run at once, default is None (one per allocated core).
+            If 1 configurations are run one after the other.
+        - in_process (bool, optional): If True run the configurations one after the other inside this interpreter, see run_in_process,
+            default is False. Can't be used with more than one worker.
+
+    Returns:
+        - report (SubmissionReport): Outcome of each configuration that was run.
+
+    """
+
+    if in_process:
+        if (workers is not None) and (int(workers) > 1):
+            raise ValueError(f"Configurations run in process are run one after the other, can't use {workers} workers")
+        report = SubmissionReport()
+        for args in read_manifest_range(manifest_path, start, stop):
+            report.add(dict(a[2:].split('=', 1) for a in args), run_in_process(script_path, args))
+        report.finish()
+        return report
+    if workers is None:
+        workers = get_num_workers()
+    executor = ExecutorLocal(max_workers=workers)
+    for args in read_manifest_range(manifest_path, start, stop):
+        # Keep the arguments as strings, the script parses them itself
+        executor.submit(None, script_path, dict(a[2:].split('=', 1) for a in args))
+    return executor.wait()
+
+def main(argv: List[str]) -> int:
+    """ Runs a pack given the command-line arguments, returns 1 if any configuration failed, otherwise 0. """
+
+    args = strings_to_flags(argv)
+    workers = int(args['slune_workers']) if 'slune_workers' in args else None
+    report = run_pack(args['slune_script'], args['slune_manifest'], int(args['slune_start']), int(args['slune_stop']),
+                      workers=workers, in_process=(args.get('slune_in_process') == 'True'))
+    for config, exit_code, _ in report.get_failed():
+        print(f"Configuration {config} failed with exit code {exit_code}")
+    return 0 if report.get_failed() == [] else 1
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,104 @@
+""" Runs configurations from a WorkQueue until it is empty, as a long-lived pilot job.
+
+Submitted by sbatchit when using pilot jobs, run as:
+    python pilot.py --slune_script=<script_path> --slune_queue=<queue_dir> [--slune_results=<root_dir> --slune_ext=<ext> --slune_layout=<layout>] [--slune_workers=<workers>]
+
+If given a results root directory, configurations that already have enough runs in it are skipped,
+using the exists method of a saver for the extension of the results (SaverCsv or SaverParquet), with the layout of the saver used to save them.
+
+"""
+
+from typing import List, Optional
+import subprocess
+import sys
+import threading
+from slune.workqueue import WorkQueue
+from slune.savers.ext import SaverExt
+from slune.savers.csv import SaverCsv
+from slune.savers.parquet import SaverParquet
+from slune.loggers.default import LoggerDefault
+from slune.utils import dict_to_strings, strings_to_flags
+
+SAVERS = {'.csv': SaverCsv, '.parquet': SaverParquet}
+
+def get_saver(root_dir: str, ext: str = '.csv', layout: str = 'nested') -> SaverExt:
+    """ Returns a saver for the results with the extension given in a root directory, used to check for existing runs.
+
+    Args:
+        - root_dir (str): Path to the root directory holding the results.
+        - ext (str, optional): Extension of the result files, '.csv' or '.parquet', default is '.csv'.
+        - layout (str, optional): Layout of the directories holding the results, 'nested' or 'flat', see SaverExt, default is 'nested'.
+
+    Returns:
+        - saver (SaverExt): The saver.
+
+    """
+
+    if ext not in SAVERS:
+        raise ValueError(f"No saver for results with extension {ext}, must be one of {list(SAVERS.keys())}")
+    return SAVERS[ext](LoggerDefault(), root_dir=root_dir, layout=layout)
+
+def run_pilot(script_path: str, queue_dir: str, root_dir: Optional[str] = None, ext: str = '.csv', workers: int = 1, layout: str = 'nested') -> dict:
+    """ Claims and runs configurations from the queue until there are no pending configurations left.
+
+    Each item in the queue should be a dictionary with the following keys:
+    - 'args' (dict): Arguments to run the script with.
+    - 'params' (dict, optional): Parameters used to check for existing runs, default is 'args'.
+    - 'runs' (int, optional): Number of runs we want for the configuration, if this many already exist it is skipped,
+        default is 0 (never skip).
+
+    Args:
+        - script_path (str): Path to the script (of the model) to be run for each configuration.
+        - queue_dir (str): Path to the directory holding the queue.
+        - root_dir (str, optional): Path to the root directory holding the results, default is None (never skip).
+        - ext (str, optional): Extension of the result files in root_dir, '.csv' or '.parquet', default is '.csv'.
+        - workers (int, optional): Number of configurations to run at once, default is 1.
+        - layout (str, optional): Layout of the directories holding the results in root_dir, 'nested' or 'flat', see SaverExt, default is 'nested'.
+
+    Returns:
+        - counts (dict): Number of configurations that were 'run', 'skipped' and 'failed' by this pilot.
+
+    """
+
+    queue = WorkQueue(queue_dir)
+    saver = get_saver(root_dir, ext=ext, layout=layout) if root_dir is not None else None
+    counts = {'run': 0, 'skipped': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            name, item = queue.claim()
+            if name is None:
+                return
+            runs = item.get('runs', 0)
+            if (saver is not None) and (runs > 0):
+                if saver.exists(item.get('params', item['args'])) >= runs:
+                    queue.complete(name)
+                    with lock:
+                        counts['skipped'] += 1
+                    continue
+            exit_code = subprocess.run([sys.executable, script_path] + dict_to_strings(item['args'], ready_for_cl=True)).returncode
+            queue.complete(name, success=(exit_code == 0))
+            with lock:
+                counts['run'] += 1
+                if exit_code != 0:
+                    counts['failed'] += 1
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+def main(argv: List[str]) -> int:
+    """ Runs a pilot given the command-line arguments, returns 1 if any configuration failed, otherwise 0. """
+
+    args = strings_to_flags(argv)
+    counts = run_pilot(args['slune_script'], args['slune_queue'], root_dir=args.get('slune_results'),
+                       ext=args.get('slune_ext', '.csv'), workers=int(args.get('slune_workers', 1)), layout=args.get('slune_layout', 'nested'))
+    print(f"Pilot finished, ran {counts['run']} configurations ({counts['failed']} failed) and skipped {counts['skipped']}")
+    return 0 if counts['failed'] == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
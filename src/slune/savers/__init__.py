@@ -1,4 +1,6 @@
 from .csv import SaverCsv
 from .ext import SaverExt
+from .parquet import SaverParquet
+from .sqlite import SaverSqlite
 
-# __all__ = ['SaverCsv', 'SaverExt']
\ No newline at end of file
+# __all__ = ['SaverCsv', 'SaverExt', 'SaverParquet', 'SaverSqlite']
\ No newline at end of file
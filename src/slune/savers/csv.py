@@ -1,10 +1,9 @@
-from typing import Optional, Tuple
+from typing import List, Optional
+import csv
 import os 
 import pandas as pd
-from slune.utils import get_all_paths, dict_to_strings
+from slune.utils import dict_to_strings
 from slune.base import BaseLogger
-import random
-import time
 from .ext import SaverExt
 
 class SaverCsv(SaverExt):
@@ -24,10 +23,14 @@ class SaverCsv(SaverExt):
     Attributes:
         - root_dir (str): Path to the root directory where we will store the csv files.
         - current_path (str): Path to the csv file where we will store the results for the current run.
+        - index (ResultsIndex): Index of the files in the root directory, None if the root directory is walked instead, see SaverExt.
+        - layout (str): 'nested' or 'flat' layout of the directories holding the results, see SaverExt.
+        - saved_rows (tuple): Path the logger's results were last saved to by save_collated, the logger's number of resets then, and the number of rows saved.
 
     """
 
-    def __init__(self, logger_instance: BaseLogger, params: dict = None, root_dir: Optional[str] = os.path.join('.', 'slune_results')):
+    def __init__(self, logger_instance: BaseLogger, params: dict = None, root_dir: Optional[str] = os.path.join('.', 'slune_results'), index: bool = False,
+                 layout: str = 'nested'):
         """ Initialises the csv saver. 
 
         Args:
@@ -35,10 +38,12 @@ class SaverCsv(SaverExt):
             - params (dict): (key,value) pairs we would like to use for our methods, default is None.
                 If None, we will create a path using the parameters given in the log.
             - root_dir (str, optional): Path to the root directory where we will store the csv files, default is './slune_results'.
+            - index (bool, optional): If True, find csv files using the index of the root directory instead of walking it, see SaverExt, default is False.
+            - layout (str, optional): 'nested' or 'flat' layout of the directories holding the csv files, see SaverExt, default is 'nested'.
         
         """
 
-        super(SaverCsv, self).__init__(logger_instance, '.csv',params=params, root_dir=root_dir)
+        super(SaverCsv, self).__init__(logger_instance, '.csv',params=params, root_dir=root_dir, index=index, layout=layout)
         self.root_dir = root_dir
         self.current_params = params
         if self.current_params is not None:
@@ -50,9 +55,16 @@ class SaverCsv(SaverExt):
         """ Saves results to csv file.
         
         If the csv file already exists, 
-        we append the collated results from the logger to the end of the csv file.
+        we append the results to the end of the csv file, without reading or rewriting the rows already in it.
+        Rows are written in the order of the columns in the file's header,
+        results missing some of those columns are saved with those values left empty.
+        Only if the results have columns that are not in the header yet (eg. a new metric is logged),
+        we rewrite the file once with the new columns added to the header,
+        writing to a temporary file first and then replacing the old one, so a crash never leaves a partial file.
         If the csv file does not exist,
         we create it and save the results to it.
+        Writes are flushed to disk before returning, so saved results survive a crash of the job,
+        and a row left half written by a crash is dropped (see drop_partial_row) before more rows are added.
 
         Args:
             - results (pd.DataFrame): Data frame containing the results to be saved.
@@ -60,82 +72,92 @@ class SaverCsv(SaverExt):
         """
 
         # If path does not exist, create it
-        # Remove the csv file name from the path
         if self.current_path is None:
-            self.get_path(self.current_params)
-        dir_path = self.current_path.split(os.path.sep)[:-1]
-        dir_path = os.path.join(*dir_path)
-        if not os.path.exists(dir_path):
-            time.sleep(random.random()) # Wait a random amount of time under 1 second to avoid multiple processes creating the same directory
-            os.makedirs(dir_path, exist_ok=True)
-        # If csv file already exists, append results to the end
-        if os.path.exists(self.current_path):
-            results = pd.concat([pd.read_csv(self.current_path), results])
-            results.to_csv(self.current_path, mode='w', index=False)
-        # If csv file does not exist, create it
+            self.current_path = self.get_path(dict_to_strings(self.current_params))
+        self.make_current_dir()
+        results = results.rename(columns=str)
+        header = self.read_header(self.current_path)
+        # If csv file does not exist (or is empty), create it
+        if header is None:
+            with open(self.current_path, 'w', newline='') as f:
+                results.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            self.add_to_index(self.current_path)
+        # If csv file already exists and has all the columns, append results to the end
+        elif all(c in header for c in results.columns):
+            if len(results) == 0:
+                return
+            self.drop_partial_row(self.current_path)
+            with open(self.current_path, 'a', newline='') as f:
+                results.reindex(columns=header).to_csv(f, header=False, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+        # If there are new columns, rewrite the file with them added to the header
         else:
-            results.to_csv(self.current_path, index=False)
+            self.drop_partial_row(self.current_path)
+            results = pd.concat([pd.read_csv(self.current_path), results])
+            tmp_path = f'{self.current_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', newline='') as f:
+                results.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.current_path)
 
-    def save_collated(self):
-        """ Saves results to csv file. """
+    def drop_partial_row(self, path: str):
+        """ Removes a row left without a line break at the end of a csv file, eg. by a job killed while saving.
 
-        self.save_collated_from_results(self.logger.results)
-        
-    def read(self, params: dict, metric_name: str, select_by: str ='max', collate_by: str ='mean') -> Tuple[dict, float]:
-        """ Finds the min/max value of a metric from all csv files in the root directory that match the parameters given.
+        The row was never completely written, so it is dropped rather than kept as results.
+        If the file holds no line break at all, it only holds the header, which is finished off with a line break instead.
+
+        Args:
+            - path (str): Path to the csv file.
+
+        """
+
+        with open(path, 'r+b') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            # Look back from the end of the file for the last line break
+            while position > 0:
+                start = max(0, position - 4096)
+                f.seek(start)
+                found = f.read(position - start).rfind(b'\n')
+                if found != -1:
+                    if start + found + 1 < end:
+                        f.truncate(start + found + 1)
+                    return
+                position = start
+            f.write(b'\n')
+
+    def read_header(self, path: str) -> Optional[List[str]]:
+        """ Reads the column names from the header of a csv file.
 
         Args:
-            - params (dict): Contains (parameter,value) pairs we would like in the run.
-                If None or empty dict, we will search through all csv files in the root directory.
-            - metric_name (string): Name of the metric to be read.
-            - select_by (string, optional): How to select the 'best' value for the metric from a log file, currently can select by 'min' or 'max'.
-            - collate_by (bool, optional): What to do with the metrics selected over all runs (with same parameters), default is 'mean'.
+            - path (str): Path to the csv file.
 
         Returns:
-            - best_params (dict): Contains the arguments used to get the 'best' value of the metric (determined by select_by).
-            - best_value (float): Best value of the metric (determined by select_by).
+            - header (list of str): Column names, None if the file does not exist or is empty.
 
         """
 
-        #  Get all paths that match the parameters given
-        paths = get_all_paths('.csv', dict_to_strings(params), root_directory=self.root_dir)
-        # If no paths found, return None
-        if paths == []:
-            return None, None
-        # Read the metric from each path
-        values = {}
-        # Do averaging for different runs of same params if avg is True, otherwise just read the metric from each path
-        if collate_by == 'mean':
-            paths_same_params = set([os.path.join(*p.split(os.path.sep)[:-1]) for p in paths])
-            for path in paths_same_params:
-                runs = get_all_paths('.csv', path.split(os.path.sep), root_directory=self.root_dir)
-                cumsum = 0
-                for r in runs:
-                    df = pd.read_csv(r)
-                    cumsum += self.read_log(df, metric_name, select_by)
-                avg_of_runs = cumsum / len(runs)
-                values[path] = avg_of_runs
-        elif collate_by == 'all':
-            for path in paths:
-                df = pd.read_csv(path)
-                # values[os.path.join(*path.split(os.path.sep)[:-1])] = self.read_log(df, metric_name, select_by)
-                values[path] = self.read_log(df, metric_name, select_by)
-        else:
-            raise ValueError(f"collate_by must be 'mean' or 'all', got {collate_by}")
-        
-        # Format the path into a list of arguments 
-        out_params, out_values = [], []
-        for key in values.keys():
-            value = values[key]
-            key = key.replace(self.root_dir, '')
-            if key.startswith(os.path.sep):
-                key = key[1:]
-            key = key.split(os.path.sep)
-            if key[-1].startswith('results_'):
-                # key = key[:-1]
-                # if has .csv, remove it
-                if key[-1].endswith('.csv'):
-                    key[-1] = key[-1][:-4]
-            out_params.append(key)
-            out_values.append(value)
-        return out_params, out_values
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', newline='') as f:
+            header = next(csv.reader([f.readline()]), [])
+        return header if header != [] else None
+
+    def read_file(self, path: str, metric_name: str) -> pd.DataFrame:
+        """ Reads only the column of the metric from a csv file, used by the read method.
+
+        Args:
+            - path (str): Path to the csv file.
+            - metric_name (str): Name of the metric to be read.
+
+        Returns:
+            - results (pd.DataFrame): Data frame with the column of the metric, or no columns if the file doesn't have the metric.
+
+        """
+
+        # Select the column with a function, as a list raises a ValueError (rather than a KeyError in read_log) if the metric is missing
+        return pd.read_csv(path, usecols=lambda column: column == metric_name)
@@ -1,21 +1,26 @@
-from typing import List,  Optional
+from typing import Callable, List,  Optional, Tuple
 import os 
-from slune.utils import find_directory_path, get_all_paths, get_numeric_equiv, dict_to_strings
+import json
+import pandas as pd
+from slune.utils import find_directory_path, find_ext_files, get_all_paths, get_numeric_equiv, dict_to_strings, get_config_hash, match_params
 from slune.base import BaseSaver, BaseLogger
+from slune.resultsindex import ResultsIndex
 import random
 import time
 
+LAYOUTS = ['nested', 'flat']
+
 class SaverExt(BaseSaver):
     """ Saves the results of each run in a file with given extension in hierarchy of directories (Partial implementation).
     
     This class must be given a string denoting the extension of the file where we will store the results.
     We will refer to this extension as '.ext' in the documentation where '.ext' is replaced by the value given for ext when initializing the class. 
 
-    This class only partly implements the BaseSaver class, it only implements the exists method.
+    This class only partly implements the BaseSaver class, it implements the exists, save_collated and read methods,
+    but not how results are written to and read from a single '.ext' file.
     The get_path method can be used to generate save locations for the results of each run.
-    By inheriting this class one can then sue the get_path method to implement the save_collated and read methods, 
+    By inheriting this class and implementing the save_collated_from_results and read_file methods,
     we can save and read results to/from '.ext' files stored in a hierarchy of directories. 
-    The main logic to implement is how to read, manipulate and save the results in the '.ext' files.
 
     # Generating paths / Directory Structure
     Each directory is named after a parameter - value pair in the form "--parameter_name=value".
@@ -47,16 +52,39 @@ class SaverExt(BaseSaver):
     we will create the path:
     "--learning_rate=0.02/--batch_size=32/--num_epochs=10".
 
+    # Flat layout
+    Given layout='flat' the saver instead stores the results of each configuration in a single directory directly in the root directory,
+    named by a hash of its parameters (see get_config_hash, which ignores the order of the parameters and matches numerically equal values),
+    with the parameters saved in a "params.json" file in the directory.
+    So the directory of a configuration doesn't depend on what already exists, and finding it (in get_path and exists) is a single lookup
+    rather than a search of the tree. In this layout exists (and exists_snapshot) only counts runs of exactly the parameters given,
+    saved in the flat layout.
+    Reading results matches parameters the same way as the nested layout, using the "params.json" files,
+    and also reads any results saved in the nested layout under the same root directory, so existing trees can keep being read.
+
+    # Index
+    Finding a path, checking for existing runs and reading results all walk the root directory by default,
+    which is slow for large trees on network file systems. Given index=True the saver instead keeps an index of the '.ext' files
+    in the root directory, adding files to it as it saves them, and answers these from the index, see ResultsIndex.
+    Results files that aren't in the index (eg. added by hand, or saved by a job killed before it added them) aren't found,
+    rebuild the index with "python -m slune.resultsindex --slune_results=<root_dir>" if results may be missing.
+
     # Other Comments
     * Handles parallel runs trying to create the same directories by waiting a random time (under 1 second) before creating the directory. Should work pretty well in practice, however, may occasionally fail if you start a large number of jobs at exactly the same time. 
 
     Attributes:
         - root_dir (str): Path to the root directory where we will store the '.ext' files.
         - current_path (str): Path to the '.ext' file where we will store the results for the current run.
+        - index (ResultsIndex): Index of the '.ext' files in the root directory, None if the root directory is walked instead.
+        - layout (str): 'nested' for a hierarchy of directories, or 'flat' for a directory for each configuration named by its hash.
+        - saved_rows (tuple): Path the logger's results were last saved to by save_collated, the logger's number of resets then, and the number of rows saved.
 
     """
 
-    def __init__(self, logger_instance: BaseLogger, ext: str = '.csv', params: dict = None, root_dir: Optional[str] = os.path.join('.', 'slune_results')):
+    PARAMS_FILE = 'params.json'
+
+    def __init__(self, logger_instance: BaseLogger, ext: str = '.csv', params: dict = None, root_dir: Optional[str] = os.path.join('.', 'slune_results'),
+                 index: bool = False, layout: str = 'nested'):
         """ Initialises the ext(ension) saver. 
 
         Args:
@@ -64,17 +92,31 @@ class SaverExt(BaseSaver):
             - ext (str): Extension of the file where we will store the results, default is '.csv'.
             - params (dict): (key,value) pairs we would like to generate a path for, default is None.
             - root_dir (str, optional): Path to the root directory where we will store the '.ext files, default is './slune_results'.
+            - index (bool, optional): If True, find results files using the index of the root directory instead of walking it, 
+                see ResultsIndex, default is False.
+            - layout (str, optional): 'nested' to store results in a hierarchy of directories named after the parameters,
+                or 'flat' to store them in a directory for each configuration named by its hash, default is 'nested'.
         
         """
 
+        if layout not in LAYOUTS:
+            raise ValueError(f"layout must be one of {LAYOUTS}, got {layout}")
         super(SaverExt, self).__init__(logger_instance)
         self.root_dir = root_dir
         self.current_params = params
         self.ext = ext
+        self.index = ResultsIndex(root_dir) if index else None
+        self.layout = layout
+        # Parameters of each configuration directory of the flat layout, read from their "params.json" files
+        self.flat_params = {}
+        # Whether the root directory has results in the nested layout, checked the first time it's needed in the flat layout
+        self.has_nested = None
         if self.current_params is not None:
             self.current_path = self.get_path(dict_to_strings(self.current_params))
         else:
             self.current_path = None
+        # Path the logger's results were last saved to, and how many of its rows were saved
+        self.saved_rows = (None, 0, 0)
     
     def strip_params(self, params: List[str]) -> List[str]:
         """ Strips the parameter values.
@@ -121,7 +163,8 @@ class SaverExt(BaseSaver):
         stripped_params = [p.split('=')[0].strip() +'=' for p in params] # Strip the params of whitespace and everything after the '='
         if len(set(stripped_params)) != len(stripped_params):
             raise ValueError(f"Duplicate parameters found in {stripped_params}")
-        match = find_directory_path(stripped_params, root_directory=self.root_dir)
+        tree = self.index.get_tree() if self.index is not None else None
+        match = find_directory_path(stripped_params, root_directory=self.root_dir, tree=tree)
         # Add on missing parameters
         if match == self.root_dir:
             match = os.path.join(*stripped_params)
@@ -138,7 +181,7 @@ class SaverExt(BaseSaver):
         match = match.split(os.path.sep)
         match = [[p for p in params if m in p][0] for m in match]
         # Check if there is an existing path with the same numerical values, if so use that instead
-        match = get_numeric_equiv(os.path.join(*match), root_directory=self.root_dir)
+        match = get_numeric_equiv(os.path.join(*match), root_directory=self.root_dir, tree=tree)
         return match
 
     def get_path(self, params: List[str]) -> str:
@@ -167,29 +210,277 @@ class SaverExt(BaseSaver):
             time.sleep(random.random()) # Wait a random amount of time under 1 second to avoid multiple processes creating the same directory
             os.makedirs(self.root_dir, exist_ok=True)
         # Get path of directory where we should store our '.ext' of results
-        dir_path = self.get_match(params)
+        if self.layout == 'flat':
+            dir_path = os.path.join(self.root_dir, get_config_hash(params))
+        else:
+            dir_path = self.get_match(params)
         # Check if directory exists, if not create it
-        if not os.path.exists(dir_path):
+        if (self.index is None) and not os.path.exists(dir_path):
             ext_file_number = 0
         # If it does exist, check if there is already an ext file with results,
         # if there is find the name of the last ext file and increment the number
         else:
-            ext_files = [f for f in os.listdir(dir_path) if f.endswith(self.ext)]
+            if self.index is not None:
+                ext_files = [os.path.basename(f) for f in self.index.get_files(self.ext) if os.path.dirname(f) == dir_path]
+            else:
+                ext_files = [f for f in os.listdir(dir_path) if f.endswith(self.ext) and (f != self.PARAMS_FILE)]
             if len(ext_files) > 0:
-                last_ext_file = max(ext_files)
-                # Check that the last '.ext' file starts with "results_"
-                if not last_ext_file.startswith('results_'):
+                # Compare the numbers of the files rather than their names, so "results_10" comes after "results_9"
+                numbers = [f[len('results_'):-len(self.ext)] for f in ext_files if f.startswith('results_')]
+                numbers = [int(n) for n in numbers if n.isdigit()]
+                # Check that there is a '.ext' file named "results_<number>"
+                if numbers == []:
                     raise ValueError('Found '+ self.ext +' file in directory that doesn\'t start with "results_"')
-                ext_file_number = int(last_ext_file.split('_')[1][:-4]) + 1
+                ext_file_number = max(numbers) + 1
             else:
                 ext_file_number = 0
         # Create path name for a new ext file where we can later store results
         ext_file_path = os.path.join(dir_path, f'results_{ext_file_number}'+self.ext)
         return ext_file_path    
 
+    def make_current_dir(self):
+        """ Creates the directory of current_path if it doesn't exist, and in the flat layout the "params.json" file of the configuration. """
+
+        dir_path = os.path.dirname(self.current_path)
+        if self.layout == 'flat':
+            os.makedirs(dir_path, exist_ok=True)
+            path = os.path.join(dir_path, self.PARAMS_FILE)
+            if not os.path.exists(path):
+                # Write to a temporary file first, so readers never see a partial file
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(dict(p.split('=', 1) for p in dict_to_strings(self.current_params)), f)
+                os.replace(tmp_path, path)
+        elif not os.path.exists(dir_path):
+            time.sleep(random.random()) # Wait a random amount of time under 1 second to avoid multiple processes creating the same directory
+            os.makedirs(dir_path, exist_ok=True)
+
+    def get_flat_params(self, dir_path: str) -> Optional[List[str]]:
+        """ Returns the parameters of a configuration directory of the flat layout, as ["name=value", ...], or None if it has no "params.json" file. """
+
+        if dir_path not in self.flat_params:
+            path = os.path.join(dir_path, self.PARAMS_FILE)
+            if not os.path.exists(path):
+                return None
+            with open(path, 'r') as f:
+                self.flat_params[dir_path] = [f'{name}={value}' for name, value in json.load(f).items()]
+        return self.flat_params[dir_path]
+
+    def get_flat_dirs(self) -> dict:
+        """ Finds the configuration directories of the flat layout in the root directory.
+
+        Returns:
+            - dirs (dict): Maps the path of each configuration directory to a list of the paths of the '.ext' files in it.
+
+        """
+
+        dirs = {}
+        if self.index is not None:
+            for file in self.index.get_files(self.ext):
+                dir_path = os.path.dirname(file)
+                name = os.path.basename(dir_path)
+                if ('=' not in name) and (os.path.join(self.root_dir, name) == dir_path):
+                    dirs.setdefault(dir_path, []).append(file)
+        elif os.path.exists(self.root_dir):
+            for entry in os.scandir(self.root_dir):
+                if entry.is_dir() and ('=' not in entry.name):
+                    files = sorted(os.listdir(entry.path))
+                    if self.PARAMS_FILE in files:
+                        dirs[entry.path] = [os.path.join(entry.path, f) for f in files if f.endswith(self.ext) and (f != self.PARAMS_FILE)]
+        return dirs
+
+    def get_nested_paths(self, params: List[str]) -> List[str]:
+        """ Finds the '.ext' files saved in the nested layout that match the parameters given, see get_all_paths.
+
+        Used in the flat layout to read results saved in the nested layout under the same root directory.
+        Only walks the root directory if it has any directories of the nested layout (named "name=value").
+
+        """
+
+        if self.has_nested is None:
+            if self.index is not None:
+                names = [os.path.relpath(f, self.root_dir).split(os.path.sep)[0] for f in self.index.get_files(self.ext)]
+            else:
+                names = [entry.name for entry in os.scandir(self.root_dir) if entry.is_dir()] if os.path.exists(self.root_dir) else []
+            self.has_nested = any('=' in name for name in names)
+        if not self.has_nested:
+            return []
+        paths = get_all_paths(self.ext, params, root_directory=self.root_dir, files=self.get_files())
+        return [p for p in paths if '=' in os.path.relpath(p, self.root_dir).split(os.path.sep)[0]]
+
+    def find_paths(self, params: List[str]) -> List[str]:
+        """ Finds all '.ext' files in the root directory whose parameters match the parameters given, see get_all_paths.
+
+        Args:
+            - params (list of str): Parameters to match, in form ["name=value", ...].
+
+        Returns:
+            - paths (list of str): Paths to the '.ext' files.
+
+        """
+
+        if self.layout == 'nested':
+            return get_all_paths(self.ext, params, root_directory=self.root_dir, files=self.get_files())
+        paths = []
+        for dir_path, files in self.get_flat_dirs().items():
+            found = self.get_flat_params(dir_path)
+            if (found is not None) and match_params(params, found):
+                paths += files
+        return paths + self.get_nested_paths(params)
+
+    def get_path_params(self, path: str) -> List[str]:
+        """ Returns the parameters of the results in a directory or '.ext' file, as ["name=value", ...].
+
+        In the nested layout these are the directories in the path (relative to the root directory),
+        in the flat layout they are read from the "params.json" file of the directory.
+        If given a '.ext' file its name (without the extension) is added at the end, eg. "results_0".
+
+        """
+
+        is_file = os.path.basename(path).startswith('results_')
+        found = self.get_flat_params(os.path.dirname(path) if is_file else path) if self.layout == 'flat' else None
+        if found is not None:
+            return found + ([os.path.basename(path)[:-len(self.ext)]] if is_file else [])
+        key = path.replace(self.root_dir, '')
+        if key.startswith(os.path.sep):
+            key = key[1:]
+        key = key.split(os.path.sep)
+        if key[-1].startswith('results_'):
+            # if has .ext, remove it
+            if key[-1].endswith(self.ext):
+                key[-1] = key[-1][:-len(self.ext)]
+        return key
+
+    def get_files(self) -> Optional[List[str]]:
+        """ Returns the paths of the '.ext' files in the index, or None if the saver doesn't use an index (so the root directory is walked). """
+
+        return self.index.get_files(self.ext) if self.index is not None else None
+
+    def add_to_index(self, path: str):
+        """ Adds a '.ext' file created by the saver to the index, if the saver uses an index. """
+
+        if self.index is not None:
+            self.index.add(path)
+
+    def save_collated_from_results(self, results: pd.DataFrame):
+        """ Saves results to the '.ext' file at current_path, adding them to the end of any results already in it.
+
+        Should be implemented by subclasses that use the save_collated method of this class,
+        subclasses that implement their own save_collated method don't need it.
+
+        Args:
+            - results (pd.DataFrame): Data frame containing the results to be saved.
+
+        """
+
+        raise NotImplementedError(f"{type(self).__name__} must implement save_collated_from_results to use SaverExt.save_collated")
+
+    def save_collated(self):
+        """ Saves the results collated in the logger to the '.ext' file at current_path.
+
+        Only the rows logged since the last call for the current path are saved,
+        so save_collated can be called as often as we like during a run (eg. to checkpoint results) without duplicating rows.
+
+        """
+
+        results = self.logger.results
+        # Loggers that can't be reset don't count their resets
+        num_resets = getattr(self.logger, 'num_resets', 0)
+        path, resets, num_saved = self.saved_rows
+        # Start again if the path changed or the logger was reset
+        if (path != self.current_path) or (resets != num_resets):
+            num_saved = 0
+        self.save_collated_from_results(results.iloc[num_saved:])
+        self.saved_rows = (self.current_path, num_resets, len(results))
+
+    def read_file(self, path: str, metric_name: str) -> pd.DataFrame:
+        """ Reads the results in a '.ext' file into a data frame, used by the read method.
+
+        By default the file is read with the pandas reader for its extension ('.csv', '.parquet', '.json', '.jsonl' or '.pkl'),
+        only reading the column of the metric where the reader can, as that is all read_log looks at.
+        Feel free to override this method for other file formats.
+
+        Args:
+            - path (str): Path to the '.ext' file.
+            - metric_name (str): Name of the metric to be read.
+
+        Returns:
+            - results (pd.DataFrame): Data frame containing (at least) the column of the metric.
+
+        """
+
+        if path.endswith('.csv'):
+            return pd.read_csv(path, usecols=lambda column: column == metric_name)
+        if path.endswith('.parquet'):
+            return pd.read_parquet(path)
+        if path.endswith('.jsonl'):
+            return pd.read_json(path, lines=True)
+        if path.endswith('.json'):
+            return pd.read_json(path)
+        if path.endswith('.pkl'):
+            return pd.read_pickle(path)
+        raise NotImplementedError(f"No pandas reader for {path}, {type(self).__name__} must implement read_file")
+
+    def read(self, params: dict, metric_name: str, select_by: str ='max', collate_by: str ='mean') -> Tuple[list, list]:
+        """ Finds the min/max value of a metric from all '.ext' files in the root directory that match the parameters given.
+
+        With index=True only the files in the index are read, if results may be missing from it (eg. files were added by hand,
+        or a job was killed between saving its results and adding them to the index) rebuild it first with
+        "python -m slune.resultsindex --slune_results=<root_dir>" (or saver.index.rebuild()).
+
+        Args:
+            - params (dict): Contains (parameter,value) pairs we would like in the run.
+                If None or empty dict, we will search through all '.ext' files in the root directory.
+            - metric_name (string): Name of the metric to be read.
+            - select_by (string, optional): How to select the 'best' value for the metric from a log file, currently can select by 'min' or 'max'.
+            - collate_by (bool, optional): What to do with the metrics selected over all runs (with same parameters), default is 'mean'.
+
+        Returns:
+            - best_params (dict): Contains the arguments used to get the 'best' value of the metric (determined by select_by).
+            - best_value (float): Best value of the metric (determined by select_by).
+
+        """
+
+        #  Get all paths that match the parameters given
+        paths = self.find_paths(dict_to_strings(params))
+        # If no paths found, return None
+        if paths == []:
+            return None, None
+        # Read the metric from each path
+        values = {}
+        # Do averaging for different runs of same params if avg is True, otherwise just read the metric from each path
+        if collate_by == 'mean':
+            paths_same_params = set([os.path.dirname(p) for p in paths])
+            for path in paths_same_params:
+                # The runs of a directory's parameters include those in directories below it with more parameters
+                runs = self.find_paths(self.get_path_params(path))
+                cumsum = 0
+                for r in runs:
+                    df = self.read_file(r, metric_name)
+                    cumsum += self.read_log(df, metric_name, select_by)
+                avg_of_runs = cumsum / len(runs)
+                values[path] = avg_of_runs
+        elif collate_by == 'all':
+            for path in paths:
+                df = self.read_file(path, metric_name)
+                values[path] = self.read_log(df, metric_name, select_by)
+        else:
+            raise ValueError(f"collate_by must be 'mean' or 'all', got {collate_by}")
+        
+        # Format the path into a list of arguments 
+        out_params, out_values = [], []
+        for key in values.keys():
+            out_params.append(self.get_path_params(key))
+            out_values.append(values[key])
+        return out_params, out_values
+
     def exists(self, params: dict) -> int:
         """ Checks if results already exist in storage.
 
+        Counts the runs whose parameters include the parameters given,
+        in the flat layout only the runs of exactly the parameters given are counted (found from their hash without a search),
+        runs saved in the nested layout under the same root directory are not counted.
+
         Args:
             - params (dict): Contains the parameters used.
 
@@ -198,11 +489,88 @@ class SaverExt(BaseSaver):
 
         """
 
-        #  Get all paths that match the parameters given
         params = dict_to_strings(params)
-        paths = get_all_paths(self.ext, params, root_directory=self.root_dir)
+        # In the flat layout the directory of the parameters is found from their hash
+        if self.layout == 'flat':
+            dir_path = os.path.join(self.root_dir, get_config_hash(params))
+            if self.index is not None:
+                num_runs = len([f for f in self.index.get_files(self.ext) if os.path.dirname(f) == dir_path])
+            elif os.path.isdir(dir_path):
+                num_runs = len([f for f in os.listdir(dir_path) if f.endswith(self.ext) and (f != self.PARAMS_FILE)])
+            else:
+                num_runs = 0
+            return num_runs
+        #  Get all paths that match the parameters given
+        paths = get_all_paths(self.ext, params, root_directory=self.root_dir, files=self.get_files())
         return len(paths)
 
+    def exists_snapshot(self) -> Callable[[dict], int]:
+        """ Returns a function that checks how many runs exist for some parameters, from one scan of the root directory.
+
+        Calling exists for every configuration of a search space walks the whole root directory each time,
+        instead we walk it once here and count the '.ext' files for each combination of parameter values.
+        The returned function gives the same answer as exists for the files that existed when this was called.
+        Counts are built lazily for each set of parameter names we are asked about, 
+        after that each check is a dictionary lookup.
+        In the flat layout the runs in each configuration directory are counted by the directory's name, the hash of its parameters,
+        so as with exists only runs of exactly the parameters given are counted.
+
+        Returns:
+            - exists (function): Takes a dictionary of parameters and returns the number of runs that exist for them.
+
+        """
+
+        def canonical(value: str):
+            # Values are matched as numbers if they are numeric, as in get_all_paths
+            try:
+                return (0, float(value))
+            except ValueError:
+                return (1, value)
+
+        if self.layout == 'flat':
+            num_runs = {os.path.basename(dir_path): len(ext_files) for dir_path, ext_files in self.get_flat_dirs().items()}
+            return lambda params: num_runs.get(get_config_hash(dict_to_strings(params)), 0)
+        # Parse the parameter values of every file's directory path
+        files = []
+        for file in find_ext_files(self.ext, self.root_dir, self.get_files()):
+            dirs = os.path.relpath(os.path.dirname(file), self.root_dir).split(os.path.sep)
+            files.append({d.split('=')[0]: canonical(d.split('=')[1]) for d in dirs if d.count('=') == 1})
+        counters = {}
+
+        def exists(params: dict) -> int:
+            params = [p.split('=') for p in dict_to_strings(params)]
+            names = tuple(sorted(name for name, _ in params))
+            if names not in counters:
+                counter = {}
+                for values in files:
+                    if all(name in values for name in names):
+                        key = tuple(values[name] for name in names)
+                        counter[key] = counter.get(key, 0) + 1
+                counters[names] = counter
+            key = tuple(canonical(value) for _, value in sorted(params))
+            return counters[names].get(key, 0)
+
+        return exists
+
+    def get_checkpoint_dir(self, member: int, generation: int) -> str:
+        """ Returns the directory for the checkpoint of a member of a population at a generation.
+
+        Checkpoints are stored under "member=<member>/generation=<generation>" in a directory next to the root directory,
+        named after it with "_checkpoints" added (eg. "slune_results_checkpoints"),
+        so checkpoints are never mistaken for results when the root directory is searched.
+        Used by SearcherPBT to hand checkpoints between generations.
+
+        Args:
+            - member (int): Index of the member of the population.
+            - generation (int): Index of the generation.
+
+        Returns:
+            - checkpoint_dir (str): Path to the directory, which may not exist yet.
+
+        """
+
+        return os.path.join(os.path.normpath(self.root_dir) + '_checkpoints', f'member={member}', f'generation={generation}')
+
     def getset_current_path(self, params:dict=None, save:bool=True) -> str:
         """ Getter/Setter function for the current_path attribute. 
         If params is not None, we will update the current_params attribute and the current_path attribute.
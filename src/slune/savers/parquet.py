@@ -0,0 +1,125 @@
+from typing import Optional
+import os
+import pandas as pd
+from slune.utils import dict_to_strings
+from slune.base import BaseLogger
+from .ext import SaverExt
+
+def import_pyarrow():
+    """ Imports pyarrow when it is first needed, so slune can be used without it unless we save results as parquet.
+
+    Returns:
+        - pa (module): The pyarrow module.
+        - pq (module): The pyarrow.parquet module.
+
+    """
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("SaverParquet needs pyarrow, install it with 'pip install pyarrow' (or 'pip install slune-lib[parquet]')") from None
+    return pa, pq
+
+class SaverParquet(SaverExt):
+    """ Saves the results of each run in a .parquet file in hierarchy of directories.
+
+    Inherits from SaverExt, which coordinates path generation for saving and reading files in a directory hierarchy,
+    please refer to the documentation of SaverExt for more information on how these paths are generated.
+    Used in the same way as SaverCsv, but results are stored in a compressed columnar format with typed columns,
+    so files are smaller than csv files and the read method only loads the column of the metric it is asked for,
+    rather than parsing every column of every file.
+    Needs pyarrow, which is only imported when the saver is created.
+
+    # Saving results
+    To save results collated in the logger to a parquet file, use the save_collated method. Simply call saver.save_collated().
+    Parquet files can't be appended to, so each save rewrites the file with the new rows added,
+    writing to a temporary file first and then replacing the old one, so a crash never leaves a partial file.
+    As every save reads and rewrites all the rows saved so far, the cost of a run's saves grows with the square of its number of saves,
+    so checkpointing results by calling save_collated many times during a run is not supported,
+    call it once at the end of the run, or use SaverCsv or SaverSqlite (which only write the new rows) to checkpoint results.
+
+    # Reading results
+    To read the best value of a metric from the parquet files in the root directory, use the 'read' method, see SaverExt.read.
+
+    Attributes:
+        - root_dir (str): Path to the root directory where we will store the parquet files.
+        - current_path (str): Path to the parquet file where we will store the results for the current run.
+        - compression (str): Compression codec of the parquet files.
+        - index (ResultsIndex): Index of the files in the root directory, None if the root directory is walked instead, see SaverExt.
+        - layout (str): 'nested' or 'flat' layout of the directories holding the results, see SaverExt.
+        - saved_rows (tuple): Path the logger's results were last saved to by save_collated, the logger's number of resets then, and the number of rows saved.
+
+    """
+
+    def __init__(self, logger_instance: BaseLogger, params: dict = None, root_dir: Optional[str] = os.path.join('.', 'slune_results'), compression: str = 'zstd', index: bool = False,
+                 layout: str = 'nested'):
+        """ Initialises the parquet saver.
+
+        Args:
+            - logger_instance (BaseLogger): Instance of a logger class that inherits from BaseLogger.
+            - params (dict): (key,value) pairs we would like to use for our methods, default is None.
+                If None, we will create a path using the parameters given in the log.
+            - root_dir (str, optional): Path to the root directory where we will store the parquet files, default is './slune_results'.
+            - compression (str, optional): Compression codec of the parquet files, eg. 'zstd', 'snappy', 'gzip' or 'none', default is 'zstd'.
+            - index (bool, optional): If True, find parquet files using the index of the root directory instead of walking it, see SaverExt, default is False.
+            - layout (str, optional): 'nested' or 'flat' layout of the directories holding the parquet files, see SaverExt, default is 'nested'.
+
+        """
+
+        # Fail now rather than at the end of a run if pyarrow is missing
+        import_pyarrow()
+        super(SaverParquet, self).__init__(logger_instance, '.parquet', params=params, root_dir=root_dir, index=index, layout=layout)
+        self.compression = compression
+
+    def save_collated_from_results(self, results: pd.DataFrame):
+        """ Saves results to parquet file.
+
+        If the parquet file already exists,
+        we rewrite it with the results added to the end of the results already in it,
+        new columns are added to the schema and rows missing a column are left empty (null).
+        If the parquet file does not exist,
+        we create it and save the results to it.
+        Writes are flushed to disk before returning, so saved results survive a crash of the job.
+        Each save rewrites the whole file, so this is meant to be called once per run, see the class documentation.
+
+        Args:
+            - results (pd.DataFrame): Data frame containing the results to be saved.
+
+        """
+
+        pa, pq = import_pyarrow()
+        if self.current_path is None:
+            self.current_path = self.get_path(dict_to_strings(self.current_params))
+        self.make_current_dir()
+        results = results.rename(columns=str)
+        created = not os.path.exists(self.current_path)
+        if not created:
+            if len(results) == 0:
+                return
+            results = pd.concat([pq.read_table(self.current_path).to_pandas(), results], ignore_index=True)
+        table = pa.Table.from_pandas(results, preserve_index=False)
+        tmp_path = f'{self.current_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pq.write_table(table, f, compression=self.compression)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.current_path)
+        if created:
+            self.add_to_index(self.current_path)
+
+    def read_file(self, path: str, metric_name: str) -> pd.DataFrame:
+        """ Reads only the column of the metric from a parquet file, used by the read method.
+
+        Args:
+            - path (str): Path to the parquet file.
+            - metric_name (str): Name of the metric to be read.
+
+        Returns:
+            - results (pd.DataFrame): Data frame with the column of the metric, or no columns if the file doesn't have the metric.
+
+        """
+
+        _, pq = import_pyarrow()
+        columns = [metric_name] if metric_name in pq.read_schema(path).names else []
+        return pq.read_table(path, columns=columns).to_pandas()
@@ -0,0 +1,349 @@
+from typing import Callable, Tuple
+import os
+import random
+import sqlite3
+import time
+import pandas as pd
+from slune.utils import dict_to_strings
+from slune.base import BaseSaver, BaseLogger
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL)",
+    # One row per parameter of a run, key is the value in canonical form (numbers as floats) so "0.1" matches "0.10"
+    "CREATE TABLE IF NOT EXISTS params (run_id INTEGER NOT NULL, position INTEGER NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (run_id, name))",
+    "CREATE INDEX IF NOT EXISTS params_by_value ON params (name, key, run_id)",
+    # One row per metric value logged, row is the index of the row in the logger's results
+    "CREATE TABLE IF NOT EXISTS metrics (run_id INTEGER NOT NULL, row INTEGER NOT NULL, name TEXT NOT NULL, value)",
+    "CREATE INDEX IF NOT EXISTS metrics_by_run ON metrics (run_id, name, row)",
+]
+
+def canonical_key(value: str) -> str:
+    """ Returns the canonical form of a parameter value used to match values, numbers are matched as numbers as in get_all_paths. """
+
+    try:
+        return repr(float(value))
+    except ValueError:
+        return value
+
+def to_sql_value(value):
+    """ Converts a value from a data frame to a type sqlite can store, numbers are stored as numbers and anything else as text. """
+
+    if hasattr(value, 'item'):
+        # Numpy scalars
+        value = value.item()
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    return str(value)
+
+class SaverSqlite(BaseSaver):
+    """ Saves the results of each run in a single sqlite database.
+
+    Instead of a hierarchy of directories, runs, their parameters and the rows of metrics they logged are stored in tables of one database file,
+    with an index on the parameter values, so exists and read are indexed queries rather than scans of a directory tree.
+    Parameter values are matched as numbers where they are numeric, like SaverExt, so "0.1" matches "0.10".
+    A run is created the first time its results are saved, and the same run is added to on later saves until the parameters change.
+
+    The database is opened in write-ahead logging (WAL) mode, so readers don't block the writer and many jobs can save to the same database.
+    Writes wait for the database to be free for up to timeout seconds, and if it is still busy are retried a few times after a random wait.
+    WAL mode needs a file system with working shared memory and locks (eg. a local disk),
+    on a network file system (eg. NFS) use journal_mode='delete' instead.
+    No server is needed, the database is a single file created when the saver is first used.
+
+    The read and exists methods behave like those of SaverExt, and read returns results in the same form,
+    so searchers that read results (eg. SearcherHalving) work with this saver.
+    Runs that never logged the metric being read are left out of its results.
+
+    Attributes:
+        - db_path (str): Path to the database file.
+        - timeout (float): How long to wait for the database to be free before retrying, in seconds.
+        - retries (int): How many times to retry a write if the database is still busy.
+        - journal_mode (str): Journal mode of the database, 'wal' by default.
+        - current_params (dict): Parameters of the current run.
+        - current_run (int): Id of the current run in the database, None until its results are first saved.
+        - saved_rows (tuple): Id of the run the logger's results were last saved to by save_collated, the logger's number of resets then, and the number of rows saved.
+
+    """
+
+    def __init__(self, logger_instance: BaseLogger, params: dict = None, db_path: str = os.path.join('.', 'slune_results.db'),
+                 timeout: float = 60.0, retries: int = 5, journal_mode: str = 'wal'):
+        """ Initialises the sqlite saver, creating the database and its tables if they don't exist.
+
+        Args:
+            - logger_instance (BaseLogger): Instance of a logger class that inherits from BaseLogger.
+            - params (dict, optional): (key,value) pairs of the parameters of the current run, default is None.
+            - db_path (str, optional): Path to the database file, default is './slune_results.db'.
+            - timeout (float, optional): How long to wait for the database to be free before retrying, in seconds, default is 60.
+            - retries (int, optional): How many times to retry a write if the database is still busy, default is 5.
+            - journal_mode (str, optional): Journal mode of the database, default is 'wal', use 'delete' on network file systems.
+
+        """
+
+        super(SaverSqlite, self).__init__(logger_instance)
+        self.db_path = db_path
+        self.timeout = timeout
+        self.retries = retries
+        self.journal_mode = journal_mode
+        self.current_params = params
+        self.current_run = None
+        self.saved_rows = (None, 0, 0)
+        dir_path = os.path.dirname(db_path)
+        if (dir_path != '') and not os.path.exists(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+
+        def create(conn):
+            conn.execute(f"PRAGMA journal_mode={journal_mode}")
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+        self.transaction(create, begin='')
+
+    def connect(self) -> sqlite3.Connection:
+        """ Opens a connection to the database, which waits up to timeout seconds for locks to be released. """
+
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        return conn
+
+    def transaction(self, fn: Callable[[sqlite3.Connection], object], begin: str = 'BEGIN IMMEDIATE'):
+        """ Runs a function in a transaction, retrying it if the database is busy.
+
+        Write transactions are started with BEGIN IMMEDIATE, so they take the write lock up front
+        rather than failing part way through when another job is writing.
+
+        Args:
+            - fn (function): Takes a connection and does the work of the transaction, its return value is returned.
+            - begin (str, optional): Statement that starts the transaction, default is 'BEGIN IMMEDIATE'.
+                If empty each statement is run in its own transaction.
+
+        Returns:
+            - result: What fn returned.
+
+        """
+
+        for attempt in range(self.retries + 1):
+            conn = self.connect()
+            try:
+                if begin != '':
+                    conn.execute(begin)
+                result = fn(conn)
+                if conn.in_transaction:
+                    conn.execute("COMMIT")
+                return result
+            except sqlite3.OperationalError as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                busy = ('locked' in str(e)) or ('busy' in str(e))
+                if (not busy) or (attempt == self.retries):
+                    raise
+            finally:
+                conn.close()
+            time.sleep(random.random() * 2 ** attempt) # Wait a random amount of time so jobs don't retry in lockstep
+
+    def save_collated_from_results(self, results: pd.DataFrame):
+        """ Saves results to the current run in the database.
+
+        Creates the run with the current parameters if it doesn't exist yet,
+        then adds a row to the metrics table for each value in the results (missing values are skipped),
+        after the rows already saved to the run.
+
+        Args:
+            - results (pd.DataFrame): Data frame containing the results to be saved.
+
+        """
+
+        if self.current_params is None:
+            raise ValueError('SaverSqlite.current_params is None, please provide parameters to save results for.')
+        params = [p.split('=', 1) for p in dict_to_strings(self.current_params)]
+
+        def save(conn):
+            run_id = self.current_run
+            if run_id is None:
+                run_id = conn.execute("INSERT INTO runs (created) VALUES (?)", (time.time(),)).lastrowid
+                conn.executemany("INSERT INTO params (run_id, position, name, value, key) VALUES (?, ?, ?, ?, ?)",
+                                 [(run_id, i, name, value, canonical_key(value)) for i, (name, value) in enumerate(params)])
+            start = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM metrics WHERE run_id = ?", (run_id,)).fetchone()[0]
+            rows = []
+            for i, record in enumerate(results.to_dict('records')):
+                for name, value in record.items():
+                    if not pd.isna(value):
+                        rows.append((run_id, start + i, str(name), to_sql_value(value)))
+            conn.executemany("INSERT INTO metrics (run_id, row, name, value) VALUES (?, ?, ?, ?)", rows)
+            return run_id
+
+        self.current_run = self.transaction(save)
+
+    def save_collated(self):
+        """ Saves the results collated in the logger to the current run.
+
+        Only the rows logged since the last call for the current run are saved,
+        so save_collated can be called as often as we like during a run without duplicating rows.
+
+        """
+
+        results = self.logger.results
+        # Loggers that can't be reset don't count their resets
+        num_resets = getattr(self.logger, 'num_resets', 0)
+        run_id, resets, num_saved = self.saved_rows
+        # Start again if the run changed or the logger was reset
+        if (run_id is None) or (run_id != self.current_run) or (resets != num_resets):
+            num_saved = 0
+        self.save_collated_from_results(results.iloc[num_saved:])
+        self.saved_rows = (self.current_run, num_resets, len(results))
+
+    def match_runs(self, params: dict) -> Tuple[str, list]:
+        """ Returns a query for the ids of the runs whose parameters include the parameters given, and its arguments. """
+
+        params = [p.split('=', 1) for p in dict_to_strings(params)]
+        if params == []:
+            return "SELECT id AS run_id FROM runs", []
+        where = " OR ".join(["(name = ? AND key = ?)"] * len(params))
+        args = [a for name, value in params for a in (name, canonical_key(value))]
+        return f"SELECT run_id FROM params WHERE {where} GROUP BY run_id HAVING COUNT(*) = ?", args + [len(params)]
+
+    def exists(self, params: dict) -> int:
+        """ Checks if results already exist in storage.
+
+        Args:
+            - params (dict): Contains the parameters used.
+
+        Returns:
+            - num_runs (int): Number of runs that exist in storage for the given parameters.
+
+        """
+
+        query, args = self.match_runs(params)
+        return self.transaction(lambda conn: conn.execute(f"SELECT COUNT(*) FROM ({query})", args).fetchone()[0], begin='')
+
+    def exists_snapshot(self) -> Callable[[dict], int]:
+        """ Returns a function that checks how many runs exist for some parameters, from one read of the parameters table.
+
+        The returned function gives the same answer as exists for the runs that existed when this was called,
+        see SaverExt.exists_snapshot.
+
+        Returns:
+            - exists (function): Takes a dictionary of parameters and returns the number of runs that exist for them.
+
+        """
+
+        runs = {}
+        for run_id, name, key in self.transaction(lambda conn: conn.execute("SELECT run_id, name, key FROM params").fetchall(), begin=''):
+            runs.setdefault(run_id, {})[name] = key
+        counters = {}
+
+        def exists(params: dict) -> int:
+            params = [p.split('=', 1) for p in dict_to_strings(params)]
+            names = tuple(sorted(name for name, _ in params))
+            if names not in counters:
+                counter = {}
+                for values in runs.values():
+                    if all(name in values for name in names):
+                        key = tuple(values[name] for name in names)
+                        counter[key] = counter.get(key, 0) + 1
+                counters[names] = counter
+            return counters[names].get(tuple(canonical_key(value) for _, value in sorted(params)), 0)
+
+        return exists
+
+    def read(self, params: dict, metric_name: str, select_by: str = 'max', collate_by: str = 'mean') -> Tuple[list, list]:
+        """ Finds the min/max value of a metric from all runs in the database that match the parameters given.
+
+        Args:
+            - params (dict): Contains (parameter,value) pairs we would like in the run.
+                If None or empty dict, we will search through all runs in the database.
+            - metric_name (string): Name of the metric to be read.
+            - select_by (string, optional): How to select the 'best' value for the metric from the log of a run, see the loggers read_log method.
+            - collate_by (string, optional): What to do with the metrics selected over all runs (with same parameters),
+                'mean' to average over runs of the same parameters, or 'all' to return each run, default is 'mean'.
+
+        Returns:
+            - params (list of list of str): Parameters of each result, as ["name=value", ...] in the order they were given when saved,
+                with "results_<run id>" added at the end if collate_by is 'all'.
+            - values (list): Value of the metric for each result.
+
+        """
+
+        if collate_by not in ['mean', 'all']:
+            raise ValueError(f"collate_by must be 'mean' or 'all', got {collate_by}")
+        query, args = self.match_runs(params)
+
+        def select(conn):
+            metrics = conn.execute(f"SELECT run_id, value FROM metrics WHERE name = ? AND run_id IN ({query}) ORDER BY run_id, row",
+                                   [metric_name] + args).fetchall()
+            run_params = conn.execute(f"SELECT run_id, name, value, key FROM params WHERE run_id IN ({query}) ORDER BY run_id, position",
+                                      args).fetchall()
+            return metrics, run_params
+
+        metrics, run_params = self.transaction(select, begin='BEGIN')
+        logs = {}
+        for run_id, value in metrics:
+            logs.setdefault(run_id, []).append(value)
+        if logs == {}:
+            return None, None
+        names, keys = {}, {}
+        for run_id, name, value, key in run_params:
+            names.setdefault(run_id, []).append(f'{name}={value}')
+            keys.setdefault(run_id, []).append((name, key))
+        values = {}
+        for run_id, log in logs.items():
+            value = self.read_log(pd.DataFrame({metric_name: log}), metric_name, select_by)
+            if collate_by == 'all':
+                values[run_id] = (names.get(run_id, []) + [f'results_{run_id}'], [value])
+            else:
+                # Runs of the same parameters (matched in canonical form) are averaged
+                group = tuple(sorted(keys.get(run_id, [])))
+                values.setdefault(group, (names.get(run_id, []), []))[1].append(value)
+        out_params, out_values = [], []
+        for found, group_values in values.values():
+            out_params.append(found)
+            out_values.append(sum(group_values) / len(group_values))
+        return out_params, out_values
+
+    def getset_current_path(self, params: dict = None, save: bool = True) -> str:
+        """ Sets the parameters of the current run, so the saver can be used in the same way as SaverExt (eg. by ExecutorCallable).
+
+        If params is not None, we will save the results of the current run (if save is True) and start a new run with the parameters given,
+        the new run is created in the database when its results are first saved.
+
+        Args:
+            - params (dict, optional): (key,value) pairs of the parameters of the new run, default is None.
+            - save (bool, optional): Whether to save the results of the current run before starting a new one, default is True.
+
+        Returns:
+            - db_path (str): Path to the database the results are stored in.
+
+        """
+
+        if params is not None:
+            if save and (self.current_params is not None):
+                self.save_collated()
+            self.current_params = params
+            self.current_run = None
+        elif self.current_params is None:
+            raise ValueError('SaverSqlite.current_params is None, please provide parameters for the current run.')
+        return self.db_path
+
+    def get_current_params(self) -> dict:
+        """ Getter function for the current_params attribute.
+
+        Returns:
+            - current_params (dict): Parameters of the current run.
+
+        """
+
+        return self.current_params
+
+    def get_checkpoint_dir(self, member: int, generation: int) -> str:
+        """ Returns the directory for the checkpoint of a member of a population at a generation, next to the database.
+
+        See SaverExt.get_checkpoint_dir, checkpoints are stored under "checkpoints/member=<member>/generation=<generation>"
+        in the directory of the database.
+
+        Args:
+            - member (int): Index of the member of the population.
+            - generation (int): Index of the generation.
+
+        Returns:
+            - checkpoint_dir (str): Path to the directory, which may not exist yet.
+
+        """
+
+        return os.path.join(os.path.dirname(self.db_path), 'checkpoints', f'member={member}', f'generation={generation}')
@@ -1,3 +1,11 @@
 from .grid import SearcherGrid
+from .random import SearcherRandom
+from .quasi import SearcherQuasiRandom
+from .halving import SearcherHalving, SearcherHyperband
+from .bayes import SearcherBayes
+from .refine import SearcherRefine
+from .pbt import SearcherPBT
+from .fractional import SearcherFractional
+from .file import SearcherFile
 
-# __all__ = ['SearcherGrid']
\ No newline at end of file
+# __all__ = ['SearcherGrid', 'SearcherRandom', 'SearcherQuasiRandom', 'SearcherHalving', 'SearcherHyperband', 'SearcherBayes', 'SearcherRefine', 'SearcherPBT', 'SearcherFractional', 'SearcherFile']
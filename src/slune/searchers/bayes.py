@@ -0,0 +1,295 @@
+from typing import List, Optional, Tuple
+import math
+import numpy as np
+from slune.base import BaseSaver
+from slune.utils import get_shard
+from slune.searchers.grid import SearcherGrid
+from slune.searchers.random import Samples, check_distribution, from_unit, to_unit
+
+METHODS = ['tpe', 'gp']
+
+def parzen_density(x: np.ndarray, points: np.ndarray, bandwidth: float) -> np.ndarray:
+    """ Density of a Parzen estimator (a Gaussian kernel on each point) mixed with a uniform prior over the unit hypercube.
+
+    The prior has the weight of one point, so the density is never 0 and is uniform when there are no points.
+
+    Args:
+        - x (np.ndarray): Array of shape (m, d) of points to evaluate the density at.
+        - points (np.ndarray): Array of shape (n, d) of points the kernels are centred on.
+        - bandwidth (float): Standard deviation of the kernels.
+
+    Returns:
+        - density (np.ndarray): Array of shape (m,).
+
+    """
+
+    weight = 1 / (len(points) + 1)
+    if len(points) == 0:
+        return np.ones(len(x))
+    sq_dists = ((x[:, None, :] - points[None, :, :]) ** 2).sum(axis=-1)
+    kernels = np.exp(-0.5 * sq_dists / bandwidth ** 2) / (math.sqrt(2 * math.pi) * bandwidth) ** x.shape[1]
+    return weight + (1 - weight) * kernels.mean(axis=1)
+
+def rbf_kernel(a: np.ndarray, b: np.ndarray, lengthscale: float) -> np.ndarray:
+    """ Squared exponential kernel between two sets of points. """
+
+    sq_dists = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=-1)
+    return np.exp(-0.5 * sq_dists / lengthscale ** 2)
+
+def fit_gp(X: np.ndarray, y: np.ndarray, lengthscales: Tuple[float, ...] = (0.05, 0.1, 0.2, 0.5, 1.0), noise: float = 1e-4) -> dict:
+    """ Fits a Gaussian process with a squared exponential kernel.
+
+    The targets are standardised, and the lengthscale is the one of lengthscales with the largest marginal likelihood.
+
+    Args:
+        - X (np.ndarray): Array of shape (n, d) of inputs.
+        - y (np.ndarray): Array of shape (n,) of targets.
+        - lengthscales (tuple of float, optional): Lengthscales to choose from.
+        - noise (float, optional): Variance of the observation noise (relative to the standardised targets), default is 1e-4.
+
+    Returns:
+        - gp (dict): The fitted Gaussian process, to pass to predict_gp.
+
+    """
+
+    mean, std = y.mean(), y.std()
+    std = std if std > 0 else 1.0
+    z = (y - mean) / std
+    best = None
+    for lengthscale in lengthscales:
+        K = rbf_kernel(X, X, lengthscale) + noise * np.eye(len(X))
+        L = np.linalg.cholesky(K)
+        alpha = np.linalg.solve(L.T, np.linalg.solve(L, z))
+        log_likelihood = -0.5 * z @ alpha - np.log(np.diag(L)).sum()
+        if (best is None) or (log_likelihood > best[0]):
+            best = (log_likelihood, {'X': X, 'L': L, 'alpha': alpha, 'lengthscale': lengthscale, 'mean': mean, 'std': std})
+    return best[1]
+
+def predict_gp(gp: dict, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Returns the mean and standard deviation of a Gaussian process (fitted by fit_gp) at some points. """
+
+    K_s = rbf_kernel(x, gp['X'], gp['lengthscale'])
+    mu = K_s @ gp['alpha']
+    v = np.linalg.solve(gp['L'], K_s.T)
+    var = np.clip(1 - (v ** 2).sum(axis=0), 1e-12, None)
+    return gp['mean'] + gp['std'] * mu, gp['std'] * np.sqrt(var)
+
+def expected_improvement(mu: np.ndarray, sigma: np.ndarray, best: float, xi: float = 0.01) -> np.ndarray:
+    """ Expected improvement over best (for maximisation) of points with normally distributed values. """
+
+    improvement = mu - best - xi * abs(best)
+    z = improvement / sigma
+    cdf = 0.5 * (1 + np.vectorize(math.erf)(z / math.sqrt(2)))
+    pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2 * math.pi)
+    return improvement * cdf + sigma * pdf
+
+class SearcherBayes(SearcherGrid):
+    """ Searcher for Bayesian optimisation, which proposes configurations based on the results of all previous configurations.
+
+    Each time check_existing_runs is called (sbatchit calls it when given a saver),
+    the searcher reads every result in storage through the savers read method, fits a model of the metric to them,
+    and proposes a batch of batch_size configurations to run next, so all jobs of a batch can be submitted in parallel.
+    A tuning campaign is a loop of sbatchit calls, waiting for the jobs of each batch to finish before the next call:
+
+        for _ in range(num_batches):
+            searcher = SearcherBayes(configs, 'accuracy', batch_size=16)
+            sbatchit(script_path, sbatch_path, searcher, saver=saver)
+            # wait for the jobs to finish
+
+    Parameters are given as distributions in the same way as for SearcherRandom.
+    Until there are num_initial results the searcher proposes random configurations (a cold start).
+    After that, two models are supported:
+    - 'tpe' - Tree-structured Parzen Estimator, models the density of the best gamma fraction of configurations and of the rest,
+        and proposes candidates where the ratio of the first to the second is largest.
+    - 'gp' - Gaussian process, proposes candidates with the largest expected improvement.
+    Within a batch, each proposal is treated as a bad result (tpe) or as having its predicted value (gp) when choosing the next,
+    which spreads the batch out instead of proposing the same point batch_size times.
+
+    Proposals only depend on the seed and the results in storage, so launchers that see the same results propose the same batch,
+    and can use shard_index and num_shards to split it between them.
+    Jobs that are still running have no results, so are not taken into account.
+
+    Attributes:
+        - configs (dict): Parameters and distributions to search over.
+        - metric_name (str): Name of the metric to optimise.
+        - batch_size (int): Number of configurations to propose at once.
+        - method (str): 'tpe' or 'gp'.
+        - mode (str): 'max' to maximise the metric, 'min' to minimise it.
+        - select_by (str): How to select the value of the metric from the log of a run, see the savers read method.
+        - num_initial (int): Number of results needed before using the model.
+        - num_candidates (int): Number of candidates the model chooses each proposal from.
+        - gamma (float): Fraction of the results treated as good by 'tpe'.
+        - seed (int): Seed of the searcher.
+        - names (list of str): Names of the parameters.
+        - distributions (list of tuple): Distribution of each parameter, see check_distribution.
+        - num_observations (int): Number of results the last batch was proposed from.
+        - grid (list of dict): The proposed configurations.
+        - grid_index (int): Index of the current configuration in the grid.
+
+    """
+
+    def __init__(self, configs: dict, metric_name: str, batch_size: int = 1, method: str = 'tpe', mode: str = 'max', select_by: str = 'max',
+                 num_initial: Optional[int] = None, num_candidates: int = 256, gamma: float = 0.25, seed: int = 0,
+                 shard_index: int = 0, num_shards: int = 1, shard_strategy: str = 'strided'):
+        """ Initializes the searcher.
+
+        Args:
+            - configs (dict): Dictionary of parameters and distributions, see SearcherRandom.
+            - metric_name (str): Name of the metric to optimise.
+            - batch_size (int, optional): Number of configurations to propose at once, default is 1.
+            - method (str, optional): 'tpe' or 'gp', default is 'tpe'.
+            - mode (str, optional): 'max' to maximise the metric, 'min' to minimise it, default is 'max'.
+            - select_by (str, optional): How to select the value of the metric from the log of a run, see the savers read method, default is 'max'.
+            - num_initial (int, optional): Number of results needed before using the model, default is None (batch_size, but at least 2).
+            - num_candidates (int, optional): Number of candidates the model chooses each proposal from, default is 256.
+            - gamma (float, optional): Fraction of the results treated as good by 'tpe', default is 0.25.
+            - seed (int, optional): Seed of the searcher, default is 0.
+            - shard_index (int, optional): Index of the shard of each batch to return configurations from, default is 0.
+            - num_shards (int, optional): Number of shards to split each batch into, default is 1 (no sharding).
+            - shard_strategy (str, optional): How to split each batch into shards, 'strided' or 'contiguous', default is 'strided'.
+
+        """
+
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {method}")
+        if mode not in ['max', 'min']:
+            raise ValueError(f"mode must be 'max' or 'min', got {mode}")
+        self.metric_name = metric_name
+        self.batch_size = batch_size
+        self.method = method
+        self.mode = mode
+        self.select_by = select_by
+        self.num_initial = num_initial if num_initial is not None else max(2, batch_size)
+        self.num_candidates = num_candidates
+        self.gamma = gamma
+        self.seed = seed
+        self.shard_strategy = shard_strategy
+        self.num_observations = 0
+        super(SearcherBayes, self).__init__(configs, runs=1, shard_index=shard_index, num_shards=num_shards, shard_strategy=shard_strategy)
+
+    def get_grid(self, param_dict: dict) -> List[dict]:
+        """ Proposes the first batch of configurations, with no results to go on.
+
+        Args:
+            - param_dict (dict): A dictionary where keys are parameter names and values are distributions.
+
+        Returns:
+            - configs (list of dict): The proposed configurations.
+
+        """
+
+        self.names = list(param_dict.keys())
+        self.distributions = [check_distribution(name, param_dict[name]) for name in self.names]
+        return self.propose(np.zeros((0, len(self.names))), np.zeros(0))
+
+    def read_observations(self, saver: BaseSaver) -> Tuple[np.ndarray, np.ndarray]:
+        """ Reads the results in storage, as points in the unit hypercube and values of the metric.
+
+        Results that are missing a parameter, have a value outside of its distribution, or have no value for the metric are ignored.
+
+        Args:
+            - saver (BaseSaver): Saver whose read method is used to read the results, eg. SaverCsv.
+
+        Returns:
+            - X (np.ndarray): Array of shape (n, d), each row is a configuration mapped to the unit hypercube (see to_unit).
+            - y (np.ndarray): Array of shape (n,), value of the metric for each configuration (averaged over runs),
+                negated if mode is 'min' so larger is always better.
+
+        """
+
+        params, values = saver.read({}, self.metric_name, select_by=self.select_by)
+        X, y = [], []
+        for dirs, value in zip(params or [], values or []):
+            found = dict(d.split('=') for d in dirs if d.count('=') == 1)
+            try:
+                x = [to_unit(spec, found[name]) for name, spec in zip(self.names, self.distributions)]
+            except (KeyError, ValueError):
+                continue
+            if not math.isnan(value):
+                X.append(x)
+                y.append(value if self.mode == 'max' else -value)
+        # Sort so the model doesn't depend on the order the saver found the results in
+        order = sorted(range(len(X)), key=lambda i: (X[i], y[i]))
+        return np.array([X[i] for i in order]).reshape(-1, len(self.names)), np.array([y[i] for i in order], dtype=float)
+
+    def get_candidates(self, X: np.ndarray, y: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """ Samples candidates in the unit hypercube to choose a proposal from.
+
+        Half are sampled uniformly, and half by perturbing the best results (tpe samples all of them from the good results).
+
+        """
+
+        d = len(self.names)
+        num_good = max(1, math.ceil(self.gamma * len(X)))
+        good = X[np.argsort(-y, kind='stable')[:num_good]]
+        bandwidth = 0.3 * len(good) ** (-1 / (d + 4))
+        num_local = self.num_candidates if self.method == 'tpe' else self.num_candidates // 2
+        centres = good[rng.integers(len(good), size=num_local)]
+        local = np.clip(centres + rng.normal(0, bandwidth, size=centres.shape), 0, 1 - 1e-9)
+        uniform = rng.random((self.num_candidates - num_local, d))
+        return np.vstack([local, uniform])
+
+    def propose(self, X: np.ndarray, y: np.ndarray) -> List[dict]:
+        """ Proposes a batch of configurations.
+
+        Args:
+            - X (np.ndarray): Results in storage as points in the unit hypercube, see read_observations.
+            - y (np.ndarray): Value of the metric for each result, larger is better.
+
+        Returns:
+            - configs (list of dict): The proposed configurations.
+
+        """
+
+        self.num_observations = len(X)
+        if len(X) < self.num_initial:
+            # Cold start, a different set of random configurations for each number of results
+            return list(Samples(dict(zip(self.names, self.distributions)), self.batch_size, seed=f'{self.seed}:{len(X)}'))
+        rng = np.random.default_rng([self.seed, len(X)])
+        d = len(self.names)
+        decode = lambda x: {name: from_unit(spec, float(u)) for name, spec, u in zip(self.names, self.distributions, x)}
+        seen = set(str(decode(x)) for x in X)
+        lied = []
+        proposals = []
+        for _ in range(self.batch_size):
+            candidates = self.get_candidates(X, y, rng)
+            if self.method == 'tpe':
+                num_good = max(1, math.ceil(self.gamma * len(X)))
+                order = np.argsort(-y, kind='stable')
+                good, bad = X[order[:num_good]], np.vstack([X[order[num_good:]]] + lied)
+                bandwidth = 0.3 * len(X) ** (-1 / (d + 4))
+                scores = np.log(parzen_density(candidates, good, bandwidth)) - np.log(parzen_density(candidates, bad, bandwidth))
+            else:
+                gp = fit_gp(np.vstack([X] + [l[:, :d] for l in lied]), np.concatenate([y] + [l[:, d] for l in lied]))
+                mu, sigma = predict_gp(gp, candidates)
+                scores = expected_improvement(mu, sigma, y.max())
+            # Take the best candidate that isn't a configuration we have already tried
+            for i in np.argsort(-scores, kind='stable'):
+                config = decode(candidates[i])
+                if str(config) not in seen:
+                    break
+            else:
+                config = decode(rng.random(d))
+                i = None
+            seen.add(str(config))
+            proposals.append(config)
+            x = candidates[i] if i is not None else np.array([to_unit(spec, config[name]) for name, spec in zip(self.names, self.distributions)])
+            if self.method == 'tpe':
+                # Constant liar, treat the proposal as a bad result so the rest of the batch looks elsewhere
+                lied.append(x[None, :])
+            else:
+                # Kriging believer, treat the proposal as having its predicted value
+                lied.append(np.append(x, predict_gp(gp, x[None, :])[0])[None, :])
+        return proposals
+
+    def check_existing_runs(self, saver: BaseSaver):
+        """ Reads the results in storage and proposes the next batch of configurations from them.
+
+        Args:
+            - saver (BaseSaver): Saver whose read method is used to read the results, eg. SaverCsv.
+
+        """
+
+        proposals = self.propose(*self.read_observations(saver))
+        self.grid = proposals[get_shard(len(proposals), self.shard_index, self.num_shards, self.shard_strategy)]
+        self.grid_index = None
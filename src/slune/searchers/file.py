@@ -0,0 +1,199 @@
+from typing import Any, Optional
+import csv
+import json
+import mmap
+import os
+import struct
+from slune.searchers.grid import SearcherGrid, Grid
+from slune.utils import LINE_INDEX_HEADER, get_line_index, get_line_offset
+
+FORMATS = ['csv', 'jsonl']
+
+def parse_value(value: str) -> Any:
+    """ Converts a value read from a csv file to an int or float if it is numeric, otherwise leaves it as a string. """
+
+    for kind in [int, float]:
+        try:
+            return kind(value)
+        except ValueError:
+            pass
+    return value
+
+class ConfigFile(Grid):
+    """ Sequence of the configurations in a csv or jsonl file, where each configuration is only read when it is accessed.
+
+    A csv file has a header of parameter names and a row for each configuration,
+    values are converted to numbers where possible, and empty cells are left out of the configuration.
+    Rows can't contain line breaks, even in quoted values.
+    A jsonl file has a json dictionary for each configuration on each line.
+    Blank lines are skipped.
+
+    Configurations are found using a line index stored next to the file (see slune.utils.get_line_index),
+    which is built the first time the file is used (or if the file has changed since), reading the file one line at a time.
+    So any configuration can be read directly from its index, eg. by a job array task,
+    and we never hold more than one configuration in memory, however big the file is.
+    The file and its index are memory mapped when a configuration is first read by its index,
+    and the maps are reused for every configuration read after that, rather than opening both files each time.
+    Supports the same operations as Grid.
+
+    Attributes:
+        - path (str): Path to the file.
+        - format (str): 'csv' or 'jsonl'.
+        - names (list of str): Parameter names from the header of a csv file, None for a jsonl file.
+        - indices (range): Indices of the configurations of the file that are in this sequence.
+        - maps (tuple of mmap.mmap): Memory maps of the file and its line index, None until a configuration is read by its index,
+            closed by close (or at the end of a with statement, or when the sequence is garbage collected).
+
+    """
+
+    def __init__(self, path: str, format: Optional[str] = None):
+        """ Initialises the sequence, building the line index of the file if needed.
+
+        Args:
+            - path (str): Path to the file.
+            - format (str, optional): 'csv' or 'jsonl', default is None (worked out from the file's extension, '.csv' or '.jsonl').
+
+        """
+
+        if format is None:
+            format = 'csv' if path.endswith('.csv') else 'jsonl' if path.endswith(('.jsonl', '.json')) else None
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}, got {format} for {path}")
+        self.path = path
+        self.format = format
+        self.names = None
+        skip_lines = 0
+        if format == 'csv':
+            with open(path, 'r', newline='') as f:
+                self.names = next(csv.reader([f.readline()]), [])
+            skip_lines = 1
+        self.skip_lines = skip_lines
+        self.index_path, num_lines = get_line_index(path, skip_lines)
+        self.indices = range(num_lines)
+        self.maps = None
+
+    def __getstate__(self) -> dict:
+        """ Leaves out the memory maps when the sequence is copied or pickled, they are made again when needed. """
+
+        return dict(self.__dict__, maps=None)
+
+    def __repr__(self) -> str:
+        """ Returns a short description of the sequence. """
+
+        return f"ConfigFile({self.path}, {self.indices})"
+
+    def parse(self, line: str) -> dict:
+        """ Creates a configuration from a line of the file. """
+
+        if self.format == 'jsonl':
+            config = json.loads(line)
+            if not isinstance(config, dict):
+                raise ValueError(f"Each line of {self.path} must be a json dictionary, got {line}")
+            return config
+        values = next(csv.reader([line]))
+        if len(values) != len(self.names):
+            raise ValueError(f"Row of {self.path} has {len(values)} values but the header has {len(self.names)} names: {line}")
+        return {name: parse_value(value) for name, value in zip(self.names, values) if value != ''}
+
+    def decode(self, index: int) -> dict:
+        """ Reads the configuration at an index of the file.
+
+        Args:
+            - index (int): Index of the configuration in the file.
+
+        Returns:
+            - config (dict): The configuration.
+
+        """
+
+        if self.maps is None:
+            maps = []
+            for path in [self.path, self.index_path]:
+                with open(path, 'rb') as f:
+                    maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            self.maps = tuple(maps)
+        data, index_data = self.maps
+        offset = struct.unpack_from('<Q', index_data, LINE_INDEX_HEADER.size + 8 * index)[0]
+        if offset >= len(data):
+            raise ValueError(f"{self.path} is shorter than its line index, it changed after the index was built")
+        end = data.find(b'\n', offset)
+        line = data[offset:end if end != -1 else len(data)]
+        return self.parse(line.decode('utf-8').rstrip('\r\n'))
+
+    def close(self):
+        """ Closes the memory maps of the file and its line index, they are made again if another configuration is read by its index. """
+
+        if self.maps is not None:
+            for m in self.maps:
+                m.close()
+            self.maps = None
+
+    def __enter__(self) -> 'ConfigFile':
+        """ Returns the sequence, so it can be used in a with statement that closes its memory maps at the end. """
+
+        return self
+
+    def __exit__(self, *args):
+        """ Closes the memory maps at the end of a with statement. """
+
+        self.close()
+
+    def __del__(self):
+        """ Closes the memory maps when the sequence is garbage collected. """
+
+        if getattr(self, 'maps', None) is not None:
+            self.close()
+
+    def __iter__(self):
+        """ Iterates through the configurations, reading consecutive ones in one pass through the file. """
+
+        if (self.indices.step != 1) or (len(self.indices) == 0):
+            yield from super(ConfigFile, self).__iter__()
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(get_line_offset(self.index_path, self.indices.start))
+            remaining = len(self.indices)
+            while remaining > 0:
+                line = f.readline()
+                if not line:
+                    raise ValueError(f"{self.path} is shorter than its line index, it changed after the index was built")
+                if line.strip() != b'':
+                    yield self.parse(line.decode('utf-8').rstrip('\r\n'))
+                    remaining -= 1
+
+class SearcherFile(SearcherGrid):
+    """ Searcher for configurations listed in a csv or jsonl file, eg. generated by another tool.
+
+    The file is read lazily through a line index, see ConfigFile, so sweeps of millions of configurations use constant memory.
+    Supports runs, check_existing_runs, sharding and saving state in the same way as SearcherGrid.
+
+    Attributes:
+        - configs (str): Path to the file.
+        - format (str): 'csv' or 'jsonl'.
+        - runs (int): Controls search based on number of runs we want for each config, see SearcherGrid.
+        - grid (ConfigFile): Sequence of the configurations.
+        - grid_index (int): Index of the current configuration in the grid.
+        - saver_exists (function): Used to check if there are existing runs, see SearcherGrid.check_existing_runs.
+
+    """
+
+    def __init__(self, path: str, format: Optional[str] = None, runs: int = 0, shard_index: int = 0, num_shards: int = 1, shard_strategy: str = 'strided'):
+        """ Initializes the searcher.
+
+        Args:
+            - path (str): Path to the csv or jsonl file of configurations.
+            - format (str, optional): 'csv' or 'jsonl', default is None (worked out from the file's extension).
+            - runs (int, optional): Controls search based on number of runs we want for each config, see SearcherGrid, default is 0.
+            - shard_index (int, optional): Index of the shard of the configurations to return, default is 0.
+            - num_shards (int, optional): Number of shards to split the configurations into, default is 1 (no sharding).
+            - shard_strategy (str, optional): How to split the configurations into shards, 'strided' or 'contiguous', default is 'strided'.
+
+        """
+
+        self.format = format
+        super(SearcherFile, self).__init__(path, runs=runs, shard_index=shard_index, num_shards=num_shards, shard_strategy=shard_strategy)
+
+    def get_grid(self, path: str) -> ConfigFile:
+        """ Opens the file of configurations. """
+
+        return ConfigFile(path, self.format)
@@ -0,0 +1,160 @@
+from typing import List, Tuple
+import itertools
+from slune.searchers.grid import SearcherGrid, Grid
+
+def is_prime(n: int) -> bool:
+    """ Checks if a number is prime. """
+
+    return n >= 2 and all(n % d for d in range(2, int(n ** 0.5) + 1))
+
+def get_generators(num_factors: int, num_levels: int, resolution: int) -> Tuple[int, List[Tuple[int, ...]]]:
+    """ Finds generators of a regular fractional factorial design with the fewest runs.
+
+    A design with num_levels ** p runs is made by taking every vector x of p digits (base num_levels),
+    and setting the level of each factor to the dot product of its generator with x (modulo num_levels).
+    The first p factors have the unit vectors as generators (the basic factors, a full factorial),
+    the rest have generators made of the basic factors.
+    A design has resolution R if every R - 1 generators are linearly independent (modulo num_levels),
+    then no main effect is aliased with any interaction of fewer than R - 1 other factors,
+    eg. in a resolution III design main effects aren't aliased with each other,
+    in resolution IV they also aren't aliased with two factor interactions,
+    in resolution V two factor interactions also aren't aliased with each other.
+
+    For each p from smallest to largest, we choose generators greedily (in order of the number of basic factors they use),
+    skipping any that are a combination of R - 2 or fewer of the generators chosen so far, until we have one for each factor.
+
+    Args:
+        - num_factors (int): Number of factors.
+        - num_levels (int): Number of levels of every factor, must be prime.
+        - resolution (int): Resolution of the design, at least 3.
+
+    Returns:
+        - p (int): Number of basic factors, the design has num_levels ** p runs.
+        - generators (list of tuple): Generator of each factor, a tuple of p digits.
+
+    """
+
+    if not is_prime(num_levels):
+        raise ValueError(f"Fractional factorial designs need a prime number of levels, got {num_levels}")
+    if resolution < 3:
+        raise ValueError(f"resolution must be at least 3, got {resolution}")
+    for p in range(1, num_factors + 1):
+        # Candidate generators, with first non-zero digit 1 as multiples of a generator give the same design
+        candidates = [v for v in itertools.product(range(num_levels), repeat=p) if any(v) and v[[d != 0 for d in v].index(True)] == 1]
+        candidates.sort(key=lambda v: (sum(d != 0 for d in v), [-d for d in v]))
+        # spans[t] holds every combination of exactly t of the chosen generators (with non-zero coefficients)
+        spans = [{(0,) * p}] + [set() for _ in range(resolution - 2)]
+        generators = []
+        for v in candidates:
+            if any(v in span for span in spans):
+                continue
+            generators.append(v)
+            if len(generators) == num_factors:
+                return p, generators
+            for t in range(resolution - 2, 0, -1):
+                spans[t] |= {tuple((u[i] + a * v[i]) % num_levels for i in range(p)) for u in spans[t - 1] for a in range(1, num_levels)}
+    # Only reached with no factors, as p = num_factors always works (a full factorial)
+    return 0, []
+
+class FractionalFactorial(Grid):
+    """ Sequence of the runs of a regular fractional factorial design, a fraction of a grid that is an orthogonal array.
+
+    Every argument must have the same (prime) number of values, eg. two or three levels.
+    A design of resolution R is an orthogonal array of strength R - 1:
+    every combination of values of any R - 1 arguments appears in the same number of runs,
+    so main effects can be estimated from a small fraction of the full grid, see get_generators.
+    Each run is created from its index when it is accessed. Supports the same operations as Grid.
+
+    Attributes:
+        - names (list of str): Names of the arguments, in the order they were given.
+        - values (list of list): Values to try for each argument.
+        - resolution (int): Resolution of the design.
+        - num_levels (int): Number of values of every argument.
+        - num_basic (int): Number of basic factors, the design has num_levels ** num_basic runs.
+        - generators (list of tuple): Generator of each argument, see get_generators.
+        - indices (range): Indices of the runs of the design that are in this sequence.
+
+    """
+
+    def __init__(self, param_dict: dict, resolution: int = 3):
+        """ Initialises the design.
+
+        Args:
+            - param_dict (dict): A dictionary where keys are argument names and values are lists of values,
+                every argument must have the same prime number of values.
+            - resolution (int, optional): Resolution of the design, at least 3, default is 3.
+
+        """
+
+        super(FractionalFactorial, self).__init__(param_dict)
+        num_levels = set(len(values) for values in self.values)
+        if len(num_levels) != 1:
+            raise ValueError(f"Every argument must have the same number of values for a fractional factorial design, got {sorted(num_levels)}")
+        self.resolution = resolution
+        self.num_levels = num_levels.pop()
+        self.num_basic, self.generators = get_generators(len(self.names), self.num_levels, resolution)
+        self.indices = range(self.num_levels ** self.num_basic)
+
+    def __repr__(self) -> str:
+        """ Returns a short description of the design. """
+
+        return f"FractionalFactorial({dict(zip(self.names, self.values))}, resolution={self.resolution}, {self.indices})"
+
+    def decode(self, index: int) -> dict:
+        """ Creates the run at an index of the design.
+
+        Args:
+            - index (int): Index of the run in the design.
+
+        Returns:
+            - run (dict): The value of each argument, with arguments in the order they were given.
+
+        """
+
+        x = []
+        for _ in range(self.num_basic):
+            index, digit = divmod(index, self.num_levels)
+            x.append(digit)
+        x.reverse()
+        levels = [sum(g * d for g, d in zip(generator, x)) % self.num_levels for generator in self.generators]
+        return {name: values[level] for name, values, level in zip(self.names, self.values, levels)}
+
+class SearcherFractional(SearcherGrid):
+    """ Searcher for fractional factorial designs, for screening many parameters with two or three values each.
+
+    Takes the same configs as SearcherGrid, but only returns the runs of a fractional factorial design of the chosen resolution,
+    see FractionalFactorial. For example 12 parameters with two values each need 4096 runs for the full grid,
+    but only 16 for a resolution III design (main effects), 32 for resolution IV or 256 for resolution V.
+    Supports runs, check_existing_runs and sharding in the same way as SearcherGrid.
+
+    Attributes:
+        - configs (dict): Parameters and values to create the design from.
+        - resolution (int): Resolution of the design.
+        - runs (int): Controls search based on number of runs we want for each config, see SearcherGrid.
+        - grid (FractionalFactorial): Sequence of the configurations.
+        - grid_index (int): Index of the current configuration in the grid.
+        - saver_exists (function): Used to check if there are existing runs, see SearcherGrid.check_existing_runs.
+
+    """
+
+    def __init__(self, configs: dict, resolution: int = 3, runs: int = 0, shard_index: int = 0, num_shards: int = 1, shard_strategy: str = 'strided'):
+        """ Initializes the searcher.
+
+        Args:
+            - configs (dict): Dictionary of parameters and values to try, every parameter must have the same prime number of values.
+                Structure of dictionary should be: { "parameter_name" : [Value_1, Value_2], ... }
+            - resolution (int, optional): Resolution of the design, at least 3, default is 3.
+            - runs (int, optional): Controls search based on number of runs we want for each config, see SearcherGrid, default is 0.
+            - shard_index (int, optional): Index of the shard of the design to return configurations from, default is 0.
+            - num_shards (int, optional): Number of shards to split the design into, default is 1 (no sharding).
+            - shard_strategy (str, optional): How to split the design into shards, 'strided' or 'contiguous', default is 'strided'.
+
+        """
+
+        self.resolution = resolution
+        super(SearcherFractional, self).__init__(configs, runs=runs, shard_index=shard_index, num_shards=num_shards, shard_strategy=shard_strategy)
+
+    def get_grid(self, param_dict: dict) -> FractionalFactorial:
+        """ Creates the fractional factorial design. """
+
+        return FractionalFactorial(param_dict, self.resolution)
@@ -1,6 +1,278 @@
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from collections.abc import Sequence
+import copy
+import json
+import os
 from slune.base import BaseSearcher, BaseSaver
-from slune.utils import dict_to_strings
+from slune.utils import get_shard, write_json
+
+class Grid(Sequence):
+    """ Sequence of all combinations of values for each argument, where each combination is only created when it is accessed.
+
+    Holding a dictionary for every combination of a large grid can take gigabytes of memory,
+    instead we treat the index of a combination as a mixed radix number, 
+    where each digit is the index of the value for one argument (the last argument's digit changes fastest).
+    So the i-th combination can be worked out directly from i, and the grid only stores the values for each argument.
+
+    Supports len, indexing, slicing and iteration like a list of dictionaries (in the same order),
+    slicing returns another Grid without creating any combinations.
+    Compares equal to a list holding the same combinations.
+
+    Attributes:
+        - names (list of str): Names of the arguments, in the order they were given.
+        - values (list of list): Values to try for each argument.
+        - indices (range): Indices of the combinations of the full grid that are in this grid.
+
+    """
+
+    def __init__(self, param_dict: dict, indices: Optional[range] = None):
+        """ Initialises the grid.
+
+        Args:
+            - param_dict (dict): A dictionary where keys are argument names and values are lists of values.
+            - indices (range, optional): Indices of the combinations of the full grid to include, default is None (all combinations).
+
+        """
+
+        self.names = list(param_dict.keys())
+        self.values = [list(param_dict[name]) for name in self.names]
+        size = 1
+        for values in self.values:
+            size *= len(values)
+        self.indices = indices if indices is not None else range(size)
+
+    def __len__(self) -> int:
+        """ Returns the number of combinations in the grid. """
+
+        return len(self.indices)
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Dict, 'Grid']:
+        """ Returns the i-th combination, or a Grid of the combinations selected if given a slice. """
+
+        if isinstance(i, slice):
+            grid = copy.copy(self)
+            grid.indices = self.indices[i]
+            return grid
+        return self.decode(self.indices[i])
+
+    def __iter__(self):
+        """ Iterates through the combinations, creating each one as it is needed. """
+
+        for index in self.indices:
+            yield self.decode(index)
+
+    def __eq__(self, other) -> bool:
+        """ Checks if another grid or list holds the same combinations in the same order. """
+
+        if not isinstance(other, (Sequence, list)) or isinstance(other, (str, tuple)):
+            return NotImplemented
+        return (len(self) == len(other)) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        """ Returns a short description of the grid. """
+
+        return f"Grid({dict(zip(self.names, self.values))}, {self.indices})"
+
+    def decode(self, index: int) -> dict:
+        """ Creates the combination at an index of the full grid.
+
+        Args:
+            - index (int): Index of the combination in the full grid.
+
+        Returns:
+            - combination (dict): The combination of argument values, with arguments in the order they were given.
+
+        """
+
+        digits = []
+        for values in reversed(self.values):
+            index, digit = divmod(index, len(values))
+            digits.append(values[digit])
+        return dict(zip(self.names, reversed(digits)))
+
+def get_condition(condition: Union[Callable[[dict], bool], dict]) -> Callable[[dict], bool]:
+    """ Returns a condition as a function of a (partial) configuration.
+
+    Conditions can be given as a function that takes a dictionary of the values of the earlier arguments and returns a bool,
+    or as a dictionary of the values earlier arguments must have, eg. {'optimizer': 'sgd'} or {'optimizer': ['sgd', 'rmsprop']}.
+
+    Args:
+        - condition (function or dict): The condition.
+
+    Returns:
+        - condition (function): Takes a dictionary of argument values and returns whether the condition holds.
+
+    """
+
+    if callable(condition):
+        return condition
+    required = {name: (value if isinstance(value, list) else [value]) for name, value in condition.items()}
+    return lambda config: all(config[name] in values for name, values in required.items())
+
+class ConditionalGrid(Grid):
+    """ Sequence of the combinations of values for each argument that satisfy some conditions and constraints.
+
+    Conditions make an argument only active for some values of earlier arguments, eg. 'momentum' only when 'optimizer' is 'sgd',
+    inactive arguments are left out of the combination. 
+    Constraints are functions of a combination that return False for combinations we don't want, eg. lambda c: c['batch_size'] * c['accum'] <= 512.
+
+    Combinations are enumerated depth first, one argument at a time in the order they were given,
+    and each constraint is checked as soon as the arguments it uses have values,
+    so a whole subtree of combinations is pruned as soon as it breaks a constraint, without creating any of its combinations.
+    A constraint that uses an argument without a value yet raises a KeyError, which we take to mean it can't be checked yet,
+    and a constraint that uses an inactive argument doesn't apply.
+    A condition or constraint that uses a name that isn't an argument (eg. a typo) raises a ValueError naming it, rather than never applying.
+
+    The valid combinations are not stored, as a grid with billions of them can't be held in memory,
+    instead they are counted once when the grid is created (which also finds any invalid conditions or constraints),
+    and enumerated again when they are accessed. Iterating enumerates them once, and indexing walks forward from the last index accessed,
+    so accessing them in order (as SearcherGrid does) also enumerates them once, while accessing an earlier index starts again from the first.
+    Each valid combination is encoded as an integer (the digits of its values, as in Grid) while enumerating.
+    Supports the same operations as Grid.
+
+    Attributes:
+        - names (list of str): Names of the arguments, in the order they were given.
+        - values (list of list): Values to try for each argument.
+        - conditions (dict): Condition for each conditional argument, see get_condition.
+        - constraints (list of function): Constraints every combination must satisfy.
+        - num_combinations (int): Number of valid combinations.
+        - indices (range): Indices of the valid combinations that are in this grid.
+        - cursor (tuple): Index and code of the last valid combination accessed and the generator enumerating the rest, None before any access.
+
+    """
+
+    def __init__(self, param_dict: dict, conditions: Optional[dict] = None, constraints: Optional[List[Callable[[dict], bool]]] = None):
+        """ Initialises the grid, counting the valid combinations.
+
+        Args:
+            - param_dict (dict): A dictionary where keys are argument names and values are lists of values.
+            - conditions (dict, optional): Dictionary of conditional argument names and their conditions, see get_condition, default is None.
+                A condition may only use arguments given before its argument.
+            - constraints (list of function, optional): Functions that take a combination and return False if it should be skipped, default is None.
+
+        """
+
+        super(ConditionalGrid, self).__init__(param_dict)
+        conditions = conditions if conditions is not None else {}
+        for name in conditions:
+            if name not in self.names:
+                raise ValueError(f"Condition given for {name}, which is not an argument")
+        self.conditions = {name: get_condition(condition) for name, condition in conditions.items()}
+        self.constraints = list(constraints) if constraints is not None else []
+        self.num_combinations = sum(1 for _ in self.enumerate())
+        self.indices = range(self.num_combinations)
+        self.cursor = None
+
+    def __copy__(self) -> 'ConditionalGrid':
+        """ Returns a copy of the grid (eg. a slice) with its own cursor, so accessing one doesn't move the other's. """
+
+        grid = self.__class__.__new__(self.__class__)
+        grid.__dict__.update(self.__dict__)
+        grid.cursor = None
+        return grid
+
+    def __iter__(self):
+        """ Iterates through the combinations, enumerating the valid combinations once. """
+
+        indices = self.indices
+        if indices.step < 0:
+            # Walking backwards, each combination is found by enumerating from the start
+            yield from super(ConditionalGrid, self).__iter__()
+            return
+        if len(indices) == 0:
+            return
+        for index, code in enumerate(self.enumerate()):
+            if index in indices:
+                yield self.from_code(code)
+            if index >= indices[-1]:
+                return
+
+    def __repr__(self) -> str:
+        """ Returns a short description of the grid. """
+
+        return f"ConditionalGrid({dict(zip(self.names, self.values))}, conditions={list(self.conditions)}, {len(self.constraints)} constraints, {self.indices})"
+
+    def satisfied(self, config: dict) -> bool:
+        """ Checks a (partial) combination doesn't break any constraint that can be checked. """
+
+        for constraint in self.constraints:
+            try:
+                if not constraint(config):
+                    return False
+            except KeyError as e:
+                # Uses an argument that has no value yet (or is inactive)
+                if e.args[0] not in self.names:
+                    raise ValueError(f"Constraint uses {e}, which is not an argument") from None
+        return True
+
+    def enumerate(self):
+        """ Yields the valid combinations in order, each encoded as an integer.
+
+        Each argument has a digit with one more possible value than it has values, the last one meaning inactive.
+
+        """
+
+        config = {}
+
+        def expand(depth: int, code: int):
+            if depth == len(self.names):
+                yield code
+                return
+            name, values = self.names[depth], self.values[depth]
+            radix = len(values) + 1
+            active = True
+            if name in self.conditions:
+                try:
+                    active = self.conditions[name](config)
+                except KeyError as e:
+                    # An argument is only active if the earlier arguments its condition uses are active
+                    if e.args[0] not in self.names:
+                        raise ValueError(f"Condition for {name} uses {e}, which is not an argument") from None
+                    if e.args[0] not in self.names[:depth]:
+                        raise ValueError(f"Condition for {name} uses {e}, which is not an earlier argument") from None
+                    active = False
+            if not active:
+                yield from expand(depth + 1, code * radix + len(values))
+                return
+            for digit, value in enumerate(values):
+                config[name] = value
+                if self.satisfied(config):
+                    yield from expand(depth + 1, code * radix + digit)
+            config.pop(name, None)
+
+        yield from expand(0, 0)
+
+    def decode(self, index: int) -> dict:
+        """ Creates the combination at an index of the valid combinations.
+
+        Args:
+            - index (int): Index of the combination among the valid combinations.
+
+        Returns:
+            - combination (dict): The combination of active argument values, with arguments in the order they were given.
+
+        """
+
+        if (index < 0) or (index >= self.num_combinations):
+            raise IndexError(f"Index {index} is out of range for {self.num_combinations} valid combinations")
+        if (self.cursor is None) or (self.cursor[0] > index):
+            self.cursor = (-1, None, self.enumerate())
+        position, code, codes = self.cursor
+        while position < index:
+            code = next(codes)
+            position += 1
+        self.cursor = (position, code, codes)
+        return self.from_code(code)
+
+    def from_code(self, code: int) -> dict:
+        """ Creates the combination a valid combination was encoded as by enumerate. """
+
+        digits = []
+        for values in reversed(self.values):
+            code, digit = divmod(code, len(values) + 1)
+            digits.append(digit)
+        digits.reverse()
+        return {name: values[digit] for name, values, digit in zip(self.names, self.values, digits) if digit < len(values)}
 
 class SearcherGrid(BaseSearcher):
     """ Searcher for grid search.
@@ -15,13 +287,19 @@ class SearcherGrid(BaseSearcher):
             if runs > 0 -> run each config 'runs' times.
             if runs = 0 -> run each config once even if it already exists.
             This behavior is modified if we want to (use) check_existing_runs, see methods description.
-        - grid (list of dict): List of dictionaries, each containing one combination of argument values.
+        - conditions (dict): Conditions for parameters to be active, see ConditionalGrid.
+        - constraints (list of function): Constraints every configuration must satisfy, see ConditionalGrid.
+        - grid (Grid): Sequence of dictionaries, each containing one combination of argument values.
         - grid_index (int): Index of the current configuration in the grid.
+        - shard_index (int): Index of the shard of the grid this searcher returns configurations from.
+        - num_shards (int): Number of shards the grid is split into.
         - saver_exists (function): Pointer to the savers exists method, used to check if there are existing runs.
+        - saved_grid (tuple): Path of the file the grid was last saved to by save_state and the grid saved, None if it hasn't been saved.
 
     """
 
-    def __init__(self, configs: dict, runs: int = 0):
+    def __init__(self, configs: dict, runs: int = 0, shard_index: int = 0, num_shards: int = 1, shard_strategy: str = 'strided',
+                 conditions: Optional[dict] = None, constraints: Optional[List[Callable[[dict], bool]]] = None):
         """ Initializes the searcher.
 
         Args:
@@ -31,15 +309,33 @@ class SearcherGrid(BaseSearcher):
                 if runs > 0 -> run each config 'runs' times.
                 if runs = 0 -> run each config once even if it already exists.
                 This behavior is modified if we want to (use) check_existing_runs, see methods description.
+            - shard_index (int, optional): Index of the shard of the grid to return configurations from, default is 0.
+            - num_shards (int, optional): Number of shards to split the grid into, default is 1 (no sharding).
+                Launchers given the same configs and num_shards but different shard_index values return disjoint parts of the grid,
+                which together cover the whole grid.
+            - shard_strategy (str, optional): How to split the grid into shards, 'strided' or 'contiguous', default is 'strided'.
+                See slune.utils.get_shard.
+            - conditions (dict, optional): Dictionary of conditional parameter names and the condition for them to be active,
+                eg. { "momentum" : { "optimizer" : "sgd" } }, or a function of the earlier parameters' values, see ConditionalGrid.
+                Inactive parameters are left out of the configurations. Default is None.
+            - constraints (list of function, optional): Functions that take a configuration and return False if it should be skipped,
+                eg. lambda c: c["batch_size"] * c["accum"] <= 512, see ConditionalGrid. Default is None.
+                Conditions and constraints are applied while enumerating the grid, so skipped configurations are never created.
 
         """
 
         super().__init__()
         self.runs = runs
         self.configs = configs
+        self.conditions = conditions
+        self.constraints = constraints
+        self.shard_index = shard_index
+        self.num_shards = num_shards
         self.grid = self.get_grid(configs)
+        self.grid = self.grid[get_shard(len(self.grid), shard_index, num_shards, shard_strategy)]
         self.grid_index = None
         self.saver_exists = None
+        self.saved_grid = None
 
     def __len__(self):
         """ Returns the number of configurations defined by search space. 
@@ -55,54 +351,42 @@ class SearcherGrid(BaseSearcher):
 
         return len(self.grid) * self.runs
 
-    def get_grid(self, param_dict: dict) -> List:
+    def get_grid(self, param_dict: dict) -> 'Grid':
         """ Creates search grid.
         
-        Generates all possible combinations of values for each argument in the given dictionary using recursion.
+        The grid holds all possible combinations of values for each argument in the given dictionary,
+        but only creates each combination when it is accessed, see Grid.
+        If the searcher has conditions or constraints, the grid only holds the valid combinations, see ConditionalGrid.
 
         Args:
             - param_dict (dict): A dictionary where keys are argument names and values are lists of values.
 
         Returns:
-            - all_combinations (list): A list of dictionaries, each containing one combination of argument values.
+            - all_combinations (Grid): A sequence of dictionaries, each containing one combination of argument values.
         
         """
 
-        # Helper function to recursively generate combinations
-        def generate_combinations(param_names, current_combination, all_combinations):
-            if not param_names:
-                # If there are no more parameters to combine, add the current combination to the result
-                all_combinations.append(dict(current_combination))
-                return
-
-            param_name = param_names[0]
-            param_values = param_dict[param_name]
-
-            for value in param_values:
-                current_combination[param_name] = value
-                # Recursively generate combinations for the remaining parameters
-                generate_combinations(param_names[1:], current_combination, all_combinations)
-
-        # Start with an empty combination and generate all combinations
-        all_combinations = []
-        generate_combinations(list(param_dict.keys()), {}, all_combinations)
-
-        return all_combinations
+        if self.conditions or self.constraints:
+            return ConditionalGrid(param_dict, conditions=self.conditions, constraints=self.constraints)
+        return Grid(param_dict)
 
     def check_existing_runs(self, saver: BaseSaver):
-        """ We save a pointer to the savers exists method to check if there are existing runs.
+        """ We save a snapshot of the savers exists method to check if there are existing runs.
+
+        Uses the savers exists_snapshot method, so savers can read storage once for the whole grid 
+        instead of once for each configuration.
 
         If there are n existing runs:
             n < runs -> run the remaining runs
             n >= runs -> skip all runs
         
         Args:
-            - saver (BaseSaver): Pointer to the savers exists method, used to check if there are existing runs.
+            - saver (BaseSaver): Saver whose exists_snapshot method is used to check if there are existing runs.
 
         """
 
         if self.runs != 0:
-            self.saver_exists = saver.exists
+            self.saver_exists = saver.exists_snapshot()
         else:
             raise ValueError("Won't check for existing runs if runs = 0, Set runs > 0.")
     
@@ -122,18 +406,14 @@ class SearcherGrid(BaseSearcher):
         """
         if self.saver_exists != None:
             # Check if there are existing runs, if so skip them
-            existing_runs = self.saver_exists(dict_to_strings(self.grid[grid_index]))
-            if self.runs - existing_runs > 0:
-                run_index = existing_runs
-                return grid_index, run_index
-            else:
+            while grid_index < len(self.grid):
+                existing_runs = self.saver_exists(self.grid[grid_index])
+                if self.runs - existing_runs > 0:
+                    return grid_index, existing_runs
                 grid_index += 1
-                run_index = 0
-                return self.skip_existing_runs(grid_index)
-        else:
-            if grid_index == len(self.grid):
-                raise IndexError('Reached end of grid, no more configurations to try.')
-            return grid_index, 0
+        if grid_index >= len(self.grid):
+            raise IndexError('Reached end of grid, no more configurations to try.')
+        return grid_index, 0
 
     def next_tune(self) -> dict:
         """ Returns the next configuration to try.
@@ -163,3 +443,100 @@ class SearcherGrid(BaseSearcher):
         next_config = self.grid[self.grid_index]
         return next_config
 
+
+    def get_state(self) -> dict:
+        """ Returns the state of the searcher, so it can be resumed later with set_state.
+
+        The state is the position of the searcher in the grid, all configurations (and runs) before it have already been returned.
+        Lazy grids (Grid and its subclasses) can be recreated from the searchers arguments, so only their length is saved, to check they match.
+        Searchers whose grid is a list worked out from results in storage (eg. SearcherHalving) also hold the list,
+        so they resume with the same configurations even if results have changed since, save_state writes it to its own file only once.
+        None of the searchers keep a random number generator between configurations, random configurations are recreated from the seed.
+
+        Returns:
+            - state (dict): The state of the searcher.
+
+        """
+
+        return {
+            'searcher': type(self).__name__,
+            'grid_index': self.grid_index,
+            'run_index': getattr(self, 'run_index', None),
+            'num_configs': len(self.grid),
+            'grid': None if isinstance(self.grid, Grid) else self.grid,
+        }
+
+    def set_state(self, state: dict):
+        """ Restores the state of the searcher, as returned by get_state, so the next configuration is the one after the last returned.
+
+        Args:
+            - state (dict): The state of the searcher.
+
+        """
+
+        if state['searcher'] != type(self).__name__:
+            raise ValueError(f"State was saved by {state['searcher']}, can't restore it to {type(self).__name__}")
+        if state['grid'] is not None:
+            self.grid = state['grid']
+        if state['num_configs'] != len(self.grid):
+            raise ValueError(f"State was saved for a grid of {state['num_configs']} configurations, but this grid has {len(self.grid)}")
+        self.grid_index = state['grid_index']
+        self.run_index = state['run_index']
+
+    def get_grid_path(self, path: str) -> str:
+        """ Returns the path of the file a grid that is a list is saved to, given the path of the state file. """
+
+        return f'{path}.grid'
+
+    def save_state(self, path: str, state: Optional[dict] = None):
+        """ Saves the state of the searcher to a json file, see BaseSearcher.save_state.
+
+        If the grid is a list, it is written to its own file (see get_grid_path) the first time it is saved,
+        and the state file only holds the name of that file, so saving the state after each job doesn't rewrite every configuration.
+
+        Args:
+            - path (str): Path to the file.
+            - state (dict, optional): State to save, as returned by get_state earlier, default is None (the current state).
+
+        """
+
+        state = self.get_state() if state is None else state
+        if state['grid'] is not None:
+            grid_path = self.get_grid_path(path)
+            if (self.saved_grid is None) or (self.saved_grid[0] != grid_path) or (self.saved_grid[1] is not state['grid']):
+                write_json(state['grid'], grid_path)
+                self.saved_grid = (grid_path, state['grid'])
+            state = dict(state, grid=None, grid_file=os.path.basename(grid_path))
+        super(SearcherGrid, self).save_state(path, state)
+
+    def load_state(self, path: str) -> bool:
+        """ Restores the state of the searcher from a json file saved by save_state, if the file exists.
+
+        Args:
+            - path (str): Path to the file.
+
+        Returns:
+            - loaded (bool): True if the state was restored, False if there is no file.
+
+        """
+
+        if not os.path.exists(path):
+            return False
+        with open(path, 'r') as f:
+            state = json.load(f)
+        if state.get('grid_file') is not None:
+            grid_path = os.path.join(os.path.dirname(path), state['grid_file'])
+            with open(grid_path, 'r') as f:
+                state['grid'] = json.load(f)
+        self.set_state(state)
+        if state['grid'] is not None:
+            self.saved_grid = (grid_path, self.grid)
+        return True
+
+    def remove_state(self, path: str):
+        """ Removes the state file saved by save_state, and the file holding the grid if there is one. """
+
+        super(SearcherGrid, self).remove_state(path)
+        if os.path.exists(self.get_grid_path(path)):
+            os.remove(self.get_grid_path(path))
+        self.saved_grid = None
@@ -0,0 +1,319 @@
+from typing import Callable, List, Optional, Union
+import math
+from slune.base import BaseSaver
+from slune.utils import get_shard, dict_to_strings
+from slune.searchers.grid import SearcherGrid, Grid
+from slune.searchers.random import Samples
+
+def get_budgets(min_budget: Union[int, float], max_budget: Union[int, float], eta: int = 3) -> List[Union[int, float]]:
+    """ Returns the budget of each rung of successive halving.
+
+    The budget starts at min_budget and is multiplied by eta at each rung, as long as it stays within max_budget.
+
+    Args:
+        - min_budget (int or float): Budget of the first rung, eg. number of epochs.
+        - max_budget (int or float): Largest budget of any rung.
+        - eta (int, optional): Factor the budget grows by (and the number of configurations shrinks by) at each rung, default is 3.
+
+    Returns:
+        - budgets (list): Budget of each rung.
+
+    """
+
+    if min_budget <= 0 or max_budget < min_budget:
+        raise ValueError(f"Need 0 < min_budget <= max_budget, got min_budget={min_budget} and max_budget={max_budget}")
+    if eta < 2:
+        raise ValueError(f"eta must be at least 2, got {eta}")
+    budgets = [min_budget]
+    while budgets[-1] * eta <= max_budget * (1 + 1e-9):
+        budgets.append(budgets[-1] * eta)
+    return budgets
+
+def get_results_lookup(saver: BaseSaver, params: dict, metric_name: str, select_by: str = 'max') -> Callable[[dict], Optional[float]]:
+    """ Reads the results matching some parameters and returns a function that looks up the result of a configuration.
+
+    Results are read with a single call to the savers read method, which averages over runs of the same configuration.
+
+    Args:
+        - saver (BaseSaver): Saver used to read the results, eg. SaverCsv.
+        - params (dict): Parameters the results must match, see the savers read method.
+        - metric_name (str): Name of the metric to read.
+        - select_by (str, optional): How to select the value of the metric from the log of a run, see the savers read method, default is 'max'.
+
+    Returns:
+        - lookup (function): Takes a configuration and returns the value of the metric for it (or None if there are no results).
+            Other arguments saved with the results are ignored.
+
+    """
+
+    def canonical(value: str):
+        # Values are matched as numbers if they are numeric, as in get_all_paths
+        try:
+            return (0, float(value))
+        except ValueError:
+            return (1, value)
+
+    found, values = saver.read(params, metric_name, select_by=select_by)
+    results = []
+    for dirs, value in zip(found or [], values or []):
+        results.append(({d.split('=')[0]: canonical(d.split('=')[1]) for d in dirs if d.count('=') == 1}, value))
+    lookups = {}
+
+    def lookup(config: dict) -> Optional[float]:
+        # Results are keyed by the parameters the configurations have, built once for each set of parameter names
+        names = tuple(sorted(config.keys()))
+        if names not in lookups:
+            lookups[names] = {tuple(r[name] for name in names): value for r, value in results if all(name in r for name in names)}
+        config = dict(s.split('=') for s in dict_to_strings(config))
+        return lookups[names].get(tuple(canonical(config[name]) for name in names))
+
+    return lookup
+
+def get_results_reader(saver: BaseSaver, budget_name: str, metric_name: str, select_by: str = 'max') -> Callable[[Union[int, float]], Callable[[dict], Optional[float]]]:
+    """ Returns a function that reads the results of all configurations run at a budget.
+
+    Results for a budget are read with get_results_lookup and are cached, so each budget is only read once.
+
+    Args:
+        - saver (BaseSaver): Saver used to read the results, eg. SaverCsv.
+        - budget_name (str): Name of the argument holding the budget.
+        - metric_name (str): Name of the metric to rank configurations by.
+        - select_by (str, optional): How to select the value of the metric from the log of a run, see the savers read method, default is 'max'.
+
+    Returns:
+        - read (function): Takes a budget and returns a function,
+            which takes a configuration and returns the value of the metric for it (or None if there are no results).
+
+    """
+
+    cache = {}
+
+    def read(budget):
+        if budget not in cache:
+            cache[budget] = get_results_lookup(saver, {budget_name: budget}, metric_name, select_by)
+        return cache[budget]
+
+    return read
+
+class SearcherHalving(SearcherGrid):
+    """ Searcher for successive halving, which spends most of the compute on the most promising configurations.
+
+    Every configuration is first run with a small budget (eg. a few epochs), passed to the script as the argument budget_name.
+    The top 1/eta of them (ranked by a metric read back through the saver) are then run with eta times the budget,
+    and so on until the largest budget is reached, this is called a rung of successive halving.
+
+    The searcher doesn't hold any state between rungs, it works out which rung we are at from the results in storage.
+    Each time check_existing_runs is called (sbatchit calls it when given a saver), the searcher reads the results,
+    finds the first rung that isn't finished and returns the configurations of that rung that have no results yet.
+    So a tuning campaign is a loop of sbatchit calls, waiting for the jobs of each round to finish before the next call,
+    until the searcher has no configurations left:
+
+        while True:
+            searcher = SearcherHalving(configs, 'epochs', 1, 81, 'accuracy', num_configs=81)
+            sbatchit(script_path, sbatch_path, searcher, saver=saver, executor=ExecutorLocal())
+            if len(searcher) == 0:
+                break
+
+    If some jobs of a rung failed, they are returned again by the next round.
+    Without check_existing_runs the searcher returns the configurations of the first rung.
+
+    Attributes:
+        - configs (dict): Parameters and values (or distributions) to create the configurations from.
+        - budget_name (str): Name of the argument holding the budget.
+        - budgets (list): Budget of each rung, see get_budgets.
+        - metric_name (str): Name of the metric to rank configurations by.
+        - eta (int): Factor the budget grows by (and the number of configurations shrinks by) at each rung.
+        - select_by (str): How to select the value of the metric from the log of a run, see the savers read method.
+        - mode (str): 'max' to promote configurations with the largest metric, 'min' for the smallest.
+        - fixed (dict): Parameters added unchanged to every configuration, eg. the bracket of a SearcherHyperband.
+        - candidates (Grid or Samples): Configurations of the first rung, without the budget.
+        - rung (int): Index of the rung the searcher returns configurations from.
+        - grid (list of dict): Configurations of the current rung that have no results yet, with the budget.
+        - grid_index (int): Index of the current configuration in the grid.
+
+    """
+
+    def __init__(self, configs: dict, budget_name: str, min_budget: Union[int, float], max_budget: Union[int, float], metric_name: str,
+                 eta: int = 3, num_configs: Optional[int] = None, select_by: str = 'max', mode: str = 'max', seed: int = 0,
+                 fixed: Optional[dict] = None, shard_index: int = 0, num_shards: int = 1, shard_strategy: str = 'strided'):
+        """ Initializes the searcher.
+
+        Args:
+            - configs (dict): Dictionary of parameters to try.
+                If num_configs is None, values are lists of values and we try every combination, as in SearcherGrid.
+                Otherwise values are distributions and we try num_configs random samples, as in SearcherRandom.
+            - budget_name (str): Name of the argument holding the budget, eg. 'epochs'.
+            - min_budget (int or float): Budget of the first rung.
+            - max_budget (int or float): Largest budget of any rung.
+            - metric_name (str): Name of the metric to rank configurations by.
+            - eta (int, optional): Factor the budget grows by (and the number of configurations shrinks by) at each rung, default is 3.
+            - num_configs (int, optional): Number of random configurations to start with, default is None (the full grid).
+            - select_by (str, optional): How to select the value of the metric from the log of a run, see the savers read method, default is 'max'.
+            - mode (str, optional): 'max' to promote configurations with the largest metric, 'min' for the smallest, default is 'max'.
+            - seed (int, optional): Seed of the random configurations, default is 0.
+            - fixed (dict, optional): Parameters added unchanged to every configuration, their results are only read for configurations with the same values, default is None.
+            - shard_index (int, optional): Index of the shard of each rung to return configurations from, default is 0.
+            - num_shards (int, optional): Number of shards to split each rung into, default is 1 (no sharding).
+            - shard_strategy (str, optional): How to split each rung into shards, 'strided' or 'contiguous', default is 'strided'.
+
+        """
+
+        if mode not in ['max', 'min']:
+            raise ValueError(f"mode must be 'max' or 'min', got {mode}")
+        if budget_name in configs:
+            raise ValueError(f"The budget argument {budget_name} can't also be a parameter to search over")
+        self.budget_name = budget_name
+        self.budgets = get_budgets(min_budget, max_budget, eta)
+        self.metric_name = metric_name
+        self.eta = eta
+        self.num_configs = num_configs
+        self.select_by = select_by
+        self.mode = mode
+        self.seed = seed
+        self.fixed = {} if fixed is None else dict(fixed)
+        self.shard_strategy = shard_strategy
+        self.rung = 0
+        super(SearcherHalving, self).__init__(configs, runs=1, shard_index=shard_index, num_shards=num_shards, shard_strategy=shard_strategy)
+
+    def get_grid(self, param_dict: dict) -> List[dict]:
+        """ Creates the configurations of the first rung.
+
+        Args:
+            - param_dict (dict): Dictionary of parameters to try.
+
+        Returns:
+            - configs (list of dict): Configurations of the first rung, with the budget.
+
+        """
+
+        if self.num_configs is None:
+            self.candidates = Grid(param_dict)
+        else:
+            self.candidates = Samples(param_dict, self.num_configs, seed=self.seed)
+        return self.get_pending()
+
+    def get_pending(self, read: Optional[Callable] = None) -> List[dict]:
+        """ Finds the first unfinished rung and returns its configurations that have no results yet.
+
+        Sets the rung attribute to the index of that rung.
+
+        Args:
+            - read (function, optional): Reads the results at a budget, see get_results_reader, default is None (no results).
+
+        Returns:
+            - pending (list of dict): Configurations with no results yet, with the budget, empty if every rung is finished.
+
+        """
+
+        candidates = list(self.candidates)
+        for rung, budget in enumerate(self.budgets):
+            self.rung = rung
+            configs = [dict(candidate, **self.fixed, **{self.budget_name: budget}) for candidate in candidates]
+            if read is None:
+                return configs
+            lookup = read(budget)
+            values = [lookup(dict(candidate, **self.fixed)) for candidate in candidates]
+            pending = [config for config, value in zip(configs, values) if value is None]
+            if pending != [] or rung == len(self.budgets) - 1:
+                return pending
+            # Promote the best configurations, keeping them in their original order
+            keep = max(1, len(candidates) // self.eta)
+            ranked = sorted(range(len(candidates)), key=lambda i: values[i], reverse=(self.mode == 'max'))
+            candidates = [candidates[i] for i in sorted(ranked[:keep])]
+        return []
+
+    def check_existing_runs(self, saver: BaseSaver):
+        """ Reads the results in storage to find the configurations to run next.
+
+        Finds the first rung that isn't finished, see get_pending,
+        and sets the searcher to return the configurations of that rung that have no results yet.
+
+        Args:
+            - saver (BaseSaver): Saver whose read method is used to read the results, eg. SaverCsv.
+
+        """
+
+        pending = self.get_pending(get_results_reader(saver, self.budget_name, self.metric_name, self.select_by))
+        self.grid = pending[get_shard(len(pending), self.shard_index, self.num_shards, self.shard_strategy)]
+        self.grid_index = None
+
+class SearcherHyperband(SearcherGrid):
+    """ Searcher for Hyperband, which runs several brackets of successive halving that trade off number of configurations against budget.
+
+    Bracket s starts s rungs from the top, with about eta^s random configurations,
+    so brackets range from aggressive early stopping of many configurations to running a few configurations at the full budget.
+    This hedges against the metric at small budgets being a poor guide to the metric at the full budget.
+    Each bracket is a SearcherHalving with its own random configurations, and all brackets are run at the same time,
+    so each round returns the pending configurations of every bracket.
+    Brackets run configurations with the same budgets, so every configuration is also given the index of its bracket (the argument bracket_name),
+    and each bracket only reads back the results of its own configurations, even if two brackets sample the same configuration.
+    Used in the same way as SearcherHalving, in a loop of sbatchit calls until it has no configurations left.
+
+    Attributes:
+        - bracket_name (str): Name of the argument holding the index of the bracket of a configuration.
+        - brackets (list of SearcherHalving): The brackets, from the one with the most configurations to the one with the fewest.
+        - grid (list of dict): Configurations of the current rung of each bracket that have no results yet, with the budget.
+        - grid_index (int): Index of the current configuration in the grid.
+
+    """
+
+    def __init__(self, configs: dict, budget_name: str, min_budget: Union[int, float], max_budget: Union[int, float], metric_name: str,
+                 eta: int = 3, select_by: str = 'max', mode: str = 'max', seed: int = 0, bracket_name: str = 'bracket',
+                 shard_index: int = 0, num_shards: int = 1, shard_strategy: str = 'strided'):
+        """ Initializes the searcher.
+
+        Args:
+            - configs (dict): Dictionary of parameters and distributions to sample configurations from, see SearcherRandom.
+            - budget_name (str): Name of the argument holding the budget, eg. 'epochs'.
+            - min_budget (int or float): Smallest budget of any rung.
+            - max_budget (int or float): Largest budget of any rung.
+            - metric_name (str): Name of the metric to rank configurations by.
+            - eta (int, optional): Factor the budget grows by (and the number of configurations shrinks by) at each rung, default is 3.
+            - select_by (str, optional): How to select the value of the metric from the log of a run, see the savers read method, default is 'max'.
+            - mode (str, optional): 'max' to promote configurations with the largest metric, 'min' for the smallest, default is 'max'.
+            - seed (int, optional): Seed of the random configurations, each bracket draws its configurations with a different seed made from it, default is 0.
+            - bracket_name (str, optional): Name of the argument holding the index of the bracket of a configuration, default is 'bracket'.
+            - shard_index (int, optional): Index of the shard of each round to return configurations from, default is 0.
+            - num_shards (int, optional): Number of shards to split each round into, default is 1 (no sharding).
+            - shard_strategy (str, optional): How to split each round into shards, 'strided' or 'contiguous', default is 'strided'.
+
+        """
+
+        if bracket_name in configs or bracket_name == budget_name:
+            raise ValueError(f"The bracket argument {bracket_name} can't also be a parameter to search over or the budget argument")
+        budgets = get_budgets(min_budget, max_budget, eta)
+        s_max = len(budgets) - 1
+        self.bracket_name = bracket_name
+        self.brackets = []
+        for s in range(s_max, -1, -1):
+            num_configs = math.ceil((s_max + 1) / (s + 1) * eta ** s)
+            # Each (seed, bracket) pair has its own integer seed
+            self.brackets.append(SearcherHalving(configs, budget_name, budgets[s_max - s], max_budget, metric_name, eta=eta,
+                                                 num_configs=num_configs, select_by=select_by, mode=mode, seed=seed * (s_max + 1) + s,
+                                                 fixed={bracket_name: s}))
+        self.budget_name = budget_name
+        self.metric_name = metric_name
+        self.select_by = select_by
+        self.shard_strategy = shard_strategy
+        super(SearcherHyperband, self).__init__(configs, runs=1, shard_index=shard_index, num_shards=num_shards, shard_strategy=shard_strategy)
+
+    def get_grid(self, param_dict: dict) -> List[dict]:
+        """ Returns the configurations of the first rung of every bracket. """
+
+        return [config for bracket in self.brackets for config in bracket.grid]
+
+    def check_existing_runs(self, saver: BaseSaver):
+        """ Reads the results in storage to find the configurations to run next.
+
+        Finds the first unfinished rung of each bracket (see SearcherHalving.get_pending),
+        reading the results at each budget only once for all brackets.
+
+        Args:
+            - saver (BaseSaver): Saver whose read method is used to read the results, eg. SaverCsv.
+
+        """
+
+        read = get_results_reader(saver, self.budget_name, self.metric_name, self.select_by)
+        pending = [config for bracket in self.brackets for config in bracket.get_pending(read)]
+        self.grid = pending[get_shard(len(pending), self.shard_index, self.num_shards, self.shard_strategy)]
+        self.grid_index = None
@@ -0,0 +1,249 @@
+from typing import List, Optional, Tuple
+import json
+import os
+import random
+import shutil
+import tempfile
+from slune.base import BaseSaver
+from slune.utils import get_shard, write_json
+from slune.searchers.grid import SearcherGrid
+from slune.searchers.random import Samples, check_distribution, from_unit
+from slune.searchers.halving import get_results_lookup
+
+def perturb(params: dict, distributions: dict, rng: random.Random, factors: Tuple[float, float] = (0.8, 1.2), resample_probability: float = 0.25) -> dict:
+    """ Perturbs the hyperparameters of a member of a population, for the explore step of population-based training.
+
+    Each parameter is resampled from its distribution with probability resample_probability,
+    otherwise numeric parameters are multiplied by one of the factors (and kept in the range of their distribution),
+    and categorical parameters are kept the same.
+
+    Args:
+        - params (dict): The hyperparameters to perturb.
+        - distributions (dict): The distribution of each parameter, see check_distribution.
+        - rng (random.Random): Random number generator.
+        - factors (tuple of float, optional): Factors to multiply numeric parameters by, default is (0.8, 1.2).
+        - resample_probability (float, optional): Probability of resampling each parameter, default is 0.25.
+
+    Returns:
+        - params (dict): The perturbed hyperparameters.
+
+    """
+
+    perturbed = {}
+    for name, value in params.items():
+        spec = distributions[name]
+        if rng.random() < resample_probability:
+            perturbed[name] = from_unit(spec, rng.random())
+        elif spec[0] == 'categorical':
+            perturbed[name] = value
+        else:
+            _, low, high = spec
+            value = min(max(value * rng.choice(factors), low), high)
+            perturbed[name] = int(round(value)) if spec[0] == 'int' else value
+    return perturbed
+
+def copy_checkpoint(src: str, dst: str):
+    """ Replaces the checkpoint directory dst with a copy of the checkpoint directory src.
+
+    The copy is made in a temporary directory next to dst and then renamed into place,
+    the old checkpoint is first renamed out of the way (and removed after the copy is in place),
+    so dst only ever holds a complete checkpoint, never a partial copy.
+
+    Args:
+        - src (str): Path to the checkpoint directory to copy.
+        - dst (str): Path to the checkpoint directory to replace.
+
+    """
+
+    parent = os.path.dirname(dst)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=os.path.basename(dst) + '.', suffix='.tmp', dir=parent)
+    copy, old = os.path.join(tmp, 'checkpoint'), os.path.join(tmp, 'old')
+    try:
+        shutil.copytree(src, copy)
+        if os.path.exists(dst):
+            os.rename(dst, old)
+        try:
+            os.rename(copy, dst)
+        except OSError:
+            # Put the old checkpoint back
+            if os.path.exists(old):
+                os.rename(old, dst)
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+class SearcherPBT(SearcherGrid):
+    """ Searcher for population-based training, which tunes hyperparameters while a population of models trains.
+
+    A population of population_size members trains in generations, each job trains one member for one generation.
+    Each configuration holds the member's hyperparameters as well as the arguments 'member' and 'generation'.
+    Between generations the searcher reads the metric of every member through the savers read method,
+    and the bottom quantile of the population exploits the top quantile:
+    each bottom member takes a copy of the checkpoint of a random top member and a perturbed copy of its hyperparameters (see perturb).
+
+    Checkpoints are handed between generations in the directories given by the savers get_checkpoint_dir method,
+    the job for a member at generation g should load its checkpoint from get_checkpoint_dir(member, g) if it exists,
+    train, then save its checkpoint to get_checkpoint_dir(member, g + 1).
+    The searcher copies the checkpoints of top members over those of bottom members before the next generation starts.
+    So a training script looks like:
+
+        def train(config, saver):
+            model = load_model(saver.get_checkpoint_dir(config['member'], config['generation']))
+            ... train for one generation, logging the metric with saver.log ...
+            save_model(model, saver.get_checkpoint_dir(config['member'], config['generation'] + 1))
+
+    Like SearcherHalving, the searcher works out which generation we are at from the results in storage,
+    each time check_existing_runs is called (sbatchit calls it when given a saver),
+    and returns the members of that generation that have no results yet.
+    So training is a loop of sbatchit calls, waiting for the jobs of each generation to finish before the next call,
+    until the searcher has no configurations left.
+    The decisions made between generations are saved to a file next to the checkpoints ("exploit_<generation>.json"),
+    so they are only made (and checkpoints only copied) once, and can be inspected afterwards.
+
+    Attributes:
+        - configs (dict): Parameters and distributions the initial hyperparameters are sampled from, see SearcherRandom.
+        - metric_name (str): Name of the metric to optimise.
+        - population_size (int): Number of members of the population.
+        - num_generations (int): Number of generations.
+        - quantile (float): Fraction of the population in the top (and bottom) quantile.
+        - factors (tuple of float): Factors numeric hyperparameters are multiplied by when perturbed.
+        - resample_probability (float): Probability of resampling each hyperparameter when perturbed.
+        - select_by (str): How to select the value of the metric from the log of a run, see the savers read method.
+        - mode (str): 'max' to maximise the metric, 'min' to minimise it.
+        - seed (int): Seed of the searcher.
+        - generation (int): Index of the generation the searcher returns configurations from.
+        - population (list of dict): Hyperparameters of each member at that generation.
+        - grid (list of dict): Configurations of the current generation that have no results yet.
+        - grid_index (int): Index of the current configuration in the grid.
+
+    """
+
+    def __init__(self, configs: dict, metric_name: str, population_size: int, num_generations: int, quantile: float = 0.25,
+                 factors: Tuple[float, float] = (0.8, 1.2), resample_probability: float = 0.25, select_by: Optional[str] = None, mode: str = 'max',
+                 seed: int = 0, shard_index: int = 0, num_shards: int = 1, shard_strategy: str = 'strided'):
+        """ Initializes the searcher.
+
+        Args:
+            - configs (dict): Dictionary of parameters and distributions to sample the initial hyperparameters from, see SearcherRandom.
+            - metric_name (str): Name of the metric to optimise.
+            - population_size (int): Number of members of the population.
+            - num_generations (int): Number of generations.
+            - quantile (float, optional): Fraction of the population in the top (and bottom) quantile, default is 0.25.
+            - factors (tuple of float, optional): Factors numeric hyperparameters are multiplied by when perturbed, default is (0.8, 1.2).
+            - resample_probability (float, optional): Probability of resampling each hyperparameter when perturbed, default is 0.25.
+            - select_by (str, optional): How to select the value of the metric from the log of a run, see the savers read method,
+                default is None, which selects by mode ('max' or 'min', the best value of the metric in the generation).
+            - mode (str, optional): 'max' to maximise the metric, 'min' to minimise it, default is 'max'.
+            - seed (int, optional): Seed of the searcher, default is 0.
+            - shard_index (int, optional): Index of the shard of each generation to return configurations from, default is 0.
+            - num_shards (int, optional): Number of shards to split each generation into, default is 1 (no sharding).
+            - shard_strategy (str, optional): How to split each generation into shards, 'strided' or 'contiguous', default is 'strided'.
+
+        """
+
+        if mode not in ['max', 'min']:
+            raise ValueError(f"mode must be 'max' or 'min', got {mode}")
+        if not 0 < quantile <= 0.5:
+            raise ValueError(f"quantile must be in (0, 0.5], got {quantile}")
+        for name in ['member', 'generation']:
+            if name in configs:
+                raise ValueError(f"'{name}' is set by the searcher, it can't be a parameter to search over")
+        self.metric_name = metric_name
+        self.population_size = population_size
+        self.num_generations = num_generations
+        self.quantile = quantile
+        self.factors = factors
+        self.resample_probability = resample_probability
+        self.select_by = mode if select_by is None else select_by
+        self.mode = mode
+        self.seed = seed
+        self.shard_strategy = shard_strategy
+        self.generation = 0
+        super(SearcherPBT, self).__init__(configs, runs=1, shard_index=shard_index, num_shards=num_shards, shard_strategy=shard_strategy)
+
+    def get_grid(self, param_dict: dict) -> List[dict]:
+        """ Samples the initial hyperparameters and returns the configurations of the first generation. """
+
+        self.distributions = {name: check_distribution(name, spec) for name, spec in param_dict.items()}
+        return self.get_pending()
+
+    def exploit(self, saver: BaseSaver, generation: int, results: List[float]) -> List[dict]:
+        """ Decides which members exploit which, and copies their checkpoints, before a generation starts.
+
+        The decisions are saved to "exploit_<generation>.json" in the checkpoints directory,
+        if the file already exists the decisions are read from it instead, so checkpoints are only copied once.
+
+        Args:
+            - saver (BaseSaver): Saver with a get_checkpoint_dir method, eg. SaverCsv.
+            - generation (int): Index of the generation that is about to start.
+            - results (list of float): Value of the metric for each member at the end of the previous generation.
+
+        Returns:
+            - population (list of dict): Hyperparameters of each member for the generation.
+
+        """
+
+        checkpoints_dir = os.path.dirname(os.path.dirname(saver.get_checkpoint_dir(0, generation)))
+        path = os.path.join(checkpoints_dir, f'exploit_{generation}.json')
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return [d['params'] for d in json.load(f)]
+        rng = random.Random(f'{self.seed}:{generation}')
+        num_quantile = max(1, int(self.quantile * self.population_size))
+        ranked = sorted(range(self.population_size), key=lambda m: results[m], reverse=(self.mode == 'max'))
+        top, bottom = ranked[:num_quantile], ranked[-num_quantile:]
+        decisions = [{'member': m, 'source': m, 'params': self.population[m]} for m in range(self.population_size)]
+        for m in bottom:
+            source = rng.choice(top)
+            decisions[m] = {'member': m, 'source': source, 'params': perturb(self.population[source], self.distributions, rng,
+                                                                                self.factors, self.resample_probability)}
+            src, dst = saver.get_checkpoint_dir(source, generation), saver.get_checkpoint_dir(m, generation)
+            if os.path.exists(src):
+                copy_checkpoint(src, dst)
+        write_json(decisions, path)
+        return [d['params'] for d in decisions]
+
+    def get_pending(self, saver: Optional[BaseSaver] = None) -> List[dict]:
+        """ Finds the first unfinished generation and returns its configurations that have no results yet.
+
+        Sets the generation and population attributes to that generation and its hyperparameters,
+        exploiting the results of each finished generation along the way (see exploit).
+
+        Args:
+            - saver (BaseSaver, optional): Saver used to read the results and hand off checkpoints, default is None (no results).
+
+        Returns:
+            - pending (list of dict): Configurations with no results yet, empty if every generation is finished.
+
+        """
+
+        self.population = list(Samples(self.configs, self.population_size, seed=self.seed))
+        lookup = get_results_lookup(saver, {}, self.metric_name, self.select_by) if saver is not None else None
+        for generation in range(self.num_generations):
+            self.generation = generation
+            if generation > 0:
+                self.population = self.exploit(saver, generation, results)
+            configs = [dict(params, member=m, generation=generation) for m, params in enumerate(self.population)]
+            if lookup is None:
+                return configs
+            results = [lookup(config) for config in configs]
+            pending = [config for config, result in zip(configs, results) if result is None]
+            if pending != [] or generation == self.num_generations - 1:
+                return pending
+        return []
+
+    def check_existing_runs(self, saver: BaseSaver):
+        """ Reads the results in storage to find the configurations to run next.
+
+        Finds the first generation that isn't finished, see get_pending,
+        and sets the searcher to return the configurations of that generation that have no results yet.
+
+        Args:
+            - saver (BaseSaver): Saver whose read method is used to read the results, and get_checkpoint_dir method to hand off checkpoints.
+
+        """
+
+        pending = self.get_pending(saver)
+        self.grid = pending[get_shard(len(pending), self.shard_index, self.num_shards, self.shard_strategy)]
+        self.grid_index = None
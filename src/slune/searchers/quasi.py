@@ -0,0 +1,266 @@
+from typing import Optional
+import numpy as np
+from slune.searchers.random import SearcherRandom, Samples, from_unit
+
+# Primitive polynomials and initial direction numbers for dimensions 2 to 40 of the Sobol sequence, from Joe and Kuo (2008).
+# Each polynomial is encoded as an integer whose bits are its coefficients, eg. 11 = 0b1011 -> x^3 + x + 1.
+SOBOL_DIRECTIONS = [
+    (3, [1]),
+    (7, [1, 3]),
+    (11, [1, 3, 1]),
+    (13, [1, 1, 1]),
+    (19, [1, 1, 3, 3]),
+    (25, [1, 3, 5, 13]),
+    (37, [1, 1, 5, 5, 17]),
+    (41, [1, 1, 5, 5, 5]),
+    (47, [1, 1, 7, 11, 19]),
+    (55, [1, 1, 5, 1, 1]),
+    (59, [1, 1, 1, 3, 11]),
+    (61, [1, 3, 5, 5, 31]),
+    (67, [1, 3, 3, 9, 7, 49]),
+    (91, [1, 1, 1, 15, 21, 21]),
+    (97, [1, 3, 1, 13, 27, 49]),
+    (103, [1, 1, 1, 15, 7, 5]),
+    (109, [1, 3, 1, 15, 13, 25]),
+    (115, [1, 1, 5, 5, 19, 61]),
+    (131, [1, 3, 7, 11, 23, 15, 103]),
+    (137, [1, 3, 7, 13, 13, 15, 69]),
+    (143, [1, 1, 3, 13, 7, 35, 63]),
+    (145, [1, 3, 5, 9, 1, 25, 53]),
+    (157, [1, 3, 1, 13, 9, 35, 107]),
+    (167, [1, 3, 1, 5, 27, 61, 31]),
+    (171, [1, 1, 5, 11, 19, 41, 61]),
+    (185, [1, 3, 5, 3, 3, 13, 69]),
+    (191, [1, 1, 7, 13, 1, 19, 1]),
+    (193, [1, 3, 7, 5, 13, 19, 59]),
+    (203, [1, 1, 3, 9, 25, 29, 41]),
+    (211, [1, 3, 5, 13, 23, 1, 55]),
+    (213, [1, 3, 7, 3, 13, 59, 17]),
+    (229, [1, 3, 1, 3, 5, 53, 69]),
+    (239, [1, 1, 5, 5, 23, 33, 13]),
+    (241, [1, 1, 7, 7, 1, 61, 123]),
+    (247, [1, 1, 7, 9, 13, 61, 49]),
+    (253, [1, 3, 3, 5, 3, 55, 33]),
+    (285, [1, 3, 1, 15, 31, 13, 49, 245]),
+    (299, [1, 3, 5, 15, 31, 59, 63, 97]),
+    (301, [1, 3, 1, 11, 11, 11, 77, 249]),
+]
+
+SOBOL_BITS = 32
+
+def get_sobol_directions(dims: int) -> np.ndarray:
+    """ Returns the direction numbers used to generate the first dims dimensions of the Sobol sequence.
+
+    Args:
+        - dims (int): Number of dimensions, at most len(SOBOL_DIRECTIONS) + 1.
+
+    Returns:
+        - directions (np.ndarray): Array of shape (SOBOL_BITS, dims), where row j holds the direction number for bit j of each dimension,
+            scaled to SOBOL_BITS bit integers.
+
+    """
+
+    if dims > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError(f"Sobol sequences are only supported for up to {len(SOBOL_DIRECTIONS) + 1} parameters, got {dims}")
+    directions = np.zeros((SOBOL_BITS, dims), dtype=np.uint64)
+    # The first dimension is the van der Corput sequence
+    directions[:, 0] = [1 << (SOBOL_BITS - 1 - j) for j in range(SOBOL_BITS)]
+    for d in range(1, dims):
+        poly, m = SOBOL_DIRECTIONS[d - 1]
+        s = poly.bit_length() - 1
+        v = [m_i << (SOBOL_BITS - 1 - j) for j, m_i in enumerate(m)]
+        for j in range(s, SOBOL_BITS):
+            value = v[j - s] ^ (v[j - s] >> s)
+            for k in range(1, s):
+                if (poly >> (s - k)) & 1:
+                    value ^= v[j - k]
+            v.append(value)
+        directions[:, d] = v
+    return directions
+
+def sobol(indices: np.ndarray, dims: int, shift: Optional[np.ndarray] = None) -> np.ndarray:
+    """ Generates points of the Sobol sequence, in a batch.
+
+    Each point is computed directly from its index (in Gray code order), so any batch of points can be generated 
+    without generating the points before it.
+
+    Args:
+        - indices (np.ndarray): Indices of the points to generate, each less than 2 ** SOBOL_BITS.
+        - dims (int): Number of dimensions of each point.
+        - shift (np.ndarray, optional): SOBOL_BITS bit integer for each dimension XOR-ed into every point (a random digital shift),
+            default is None (no shift).
+
+    Returns:
+        - points (np.ndarray): Array of shape (len(indices), dims) with values in [0, 1).
+
+    """
+
+    directions = get_sobol_directions(dims)
+    indices = np.asarray(indices, dtype=np.uint64)
+    gray = indices ^ (indices >> np.uint64(1))
+    points = np.zeros((len(indices), dims), dtype=np.uint64)
+    for j in range(SOBOL_BITS):
+        bit = (gray >> np.uint64(j)) & np.uint64(1)
+        points ^= bit[:, None] * directions[j][None, :]
+    if shift is not None:
+        points ^= shift.astype(np.uint64)[None, :]
+    return points.astype(np.float64) / float(1 << SOBOL_BITS)
+
+def latin_hypercube(num_samples: int, dims: int, rng: np.random.Generator) -> np.ndarray:
+    """ Generates a Latin hypercube design.
+
+    Each dimension is split into num_samples equal strata and each stratum is sampled exactly once, 
+    with the strata of different dimensions paired up at random.
+
+    Args:
+        - num_samples (int): Number of points.
+        - dims (int): Number of dimensions of each point.
+        - rng (np.random.Generator): Random number generator used to pair up strata and place points within them.
+
+    Returns:
+        - points (np.ndarray): Array of shape (num_samples, dims) with values in [0, 1).
+
+    """
+
+    strata = np.argsort(rng.random((num_samples, dims)), axis=0)
+    return (strata + rng.random((num_samples, dims))) / num_samples
+
+class QuasiSamples(Samples):
+    """ Sequence of quasi-random samples of configurations, which fill the search space more evenly than random samples.
+
+    Points are generated in the unit hypercube in batches with NumPy, then mapped onto each parameter's distribution using from_unit.
+    Supports two methods:
+    - 'sobol' - the Sobol low-discrepancy sequence with a random digital shift chosen by the seed.
+        Points are generated in batches of batch_size as they are accessed, and any point can be generated directly from its index.
+        The sequence is most even when num_samples is a power of 2.
+    - 'lhs' - a Latin hypercube design, every parameter's range is split into num_samples strata and each is sampled once.
+        All the points are generated when the samples are created, as each point depends on the others.
+    Supports the same operations as Grid.
+
+    Attributes:
+        - names (list of str): Names of the parameters, in the order they were given.
+        - distributions (list of tuple): Distribution to map each parameter onto, see check_distribution.
+        - method (str): 'sobol' or 'lhs'.
+        - seed (int): Seed of the samples.
+        - indices (range): Indices of the samples in this sequence.
+
+    """
+
+    def __init__(self, param_dict: dict, num_samples: int, method: str = 'sobol', seed: int = 0, batch_size: int = 1024):
+        """ Initialises the samples.
+
+        Args:
+            - param_dict (dict): A dictionary where keys are parameter names and values are distributions, see check_distribution.
+            - num_samples (int): Number of samples.
+            - method (str, optional): 'sobol' or 'lhs', default is 'sobol'.
+            - seed (int, optional): Seed of the samples, default is 0.
+            - batch_size (int, optional): Number of Sobol points generated at once, default is 1024.
+
+        """
+
+        super(QuasiSamples, self).__init__(param_dict, num_samples, seed=seed)
+        if method not in ['sobol', 'lhs']:
+            raise ValueError(f"method must be 'sobol' or 'lhs', got {method}")
+        self.method = method
+        self.batch_size = batch_size
+        rng = np.random.default_rng(seed)
+        dims = len(self.names)
+        if method == 'sobol':
+            get_sobol_directions(dims)
+            self._shift = rng.integers(0, 1 << SOBOL_BITS, size=dims, dtype=np.uint64)
+            self._batch_start = None
+            self._batch = None
+        else:
+            self._points = latin_hypercube(num_samples, dims, rng)
+
+    def __repr__(self) -> str:
+        """ Returns a short description of the samples. """
+
+        return f"QuasiSamples({dict(zip(self.names, self.distributions))}, method={self.method}, seed={self.seed}, {self.indices})"
+
+    def get_point(self, index: int) -> np.ndarray:
+        """ Returns the point in the unit hypercube for a sample.
+
+        Args:
+            - index (int): Index of the sample.
+
+        Returns:
+            - point (np.ndarray): The point, with one value in [0, 1) for each parameter.
+
+        """
+
+        if self.method == 'lhs':
+            return self._points[index]
+        batch_start = (index // self.batch_size) * self.batch_size
+        if self._batch_start != batch_start:
+            self._batch = sobol(np.arange(batch_start, batch_start + self.batch_size), len(self.names), shift=self._shift)
+            self._batch_start = batch_start
+        return self._batch[index - batch_start]
+
+    def decode(self, index: int) -> dict:
+        """ Creates the sample at an index.
+
+        Args:
+            - index (int): Index of the sample.
+
+        Returns:
+            - sample (dict): The value of each parameter, with parameters in the order they were given.
+
+        """
+
+        point = self.get_point(index)
+        return {name: from_unit(spec, float(u)) for name, spec, u in zip(self.names, self.distributions, point)}
+
+class SearcherQuasiRandom(SearcherRandom):
+    """ Searcher for quasi-random search, using a Sobol sequence or a Latin hypercube design.
+
+    Like SearcherRandom, but the configurations are spread more evenly over the search space (see QuasiSamples),
+    so a budget of jobs covers the space better than with random search or a grid.
+    Parameters are given as distributions in the same way as for SearcherRandom, 
+    the distribution is used to map each point onto the parameter's range, including log scales and discrete sets.
+    The configurations only depend on the seed, so check_existing_runs can be used to resume a search.
+
+    Attributes:
+        - configs (dict): Parameters and distributions to map points onto.
+        - num_samples (int): Number of configurations.
+        - method (str): 'sobol' or 'lhs'.
+        - seed (int): Seed used to randomise the configurations.
+        - runs (int): Controls search based on number of runs we want for each config, see SearcherGrid.
+        - grid (QuasiSamples): Sequence of the configurations.
+        - grid_index (int): Index of the current configuration.
+        - saver_exists (function): Used to check if there are existing runs, see SearcherGrid.check_existing_runs.
+
+    """
+
+    def __init__(self, configs: dict, num_samples: int, method: str = 'sobol', runs: int = 0, seed: int = 0,
+                 shard_index: int = 0, num_shards: int = 1, shard_strategy: str = 'strided'):
+        """ Initializes the searcher.
+
+        Args:
+            - configs (dict): Dictionary of parameters and distributions, see SearcherRandom.
+            - num_samples (int): Number of configurations, for 'sobol' a power of 2 gives the most even coverage.
+            - method (str, optional): 'sobol' or 'lhs', default is 'sobol'.
+            - runs (int, optional): Controls search based on number of runs we want for each config, see SearcherGrid, default is 0.
+            - seed (int, optional): Seed used to randomise the configurations, default is 0.
+            - shard_index (int, optional): Index of the shard of the configurations to return, default is 0.
+            - num_shards (int, optional): Number of shards to split the configurations into, default is 1 (no sharding).
+            - shard_strategy (str, optional): How to split the configurations into shards, 'strided' or 'contiguous', default is 'strided'.
+
+        """
+
+        self.method = method
+        super(SearcherQuasiRandom, self).__init__(configs, num_samples, runs=runs, seed=seed,
+                                                  shard_index=shard_index, num_shards=num_shards, shard_strategy=shard_strategy)
+
+    def get_grid(self, param_dict: dict) -> QuasiSamples:
+        """ Creates the sequence of configurations.
+
+        Args:
+            - param_dict (dict): A dictionary where keys are parameter names and values are distributions.
+
+        Returns:
+            - samples (QuasiSamples): Sequence of the configurations.
+
+        """
+
+        return QuasiSamples(param_dict, self.num_samples, method=self.method, seed=self.seed)
@@ -0,0 +1,210 @@
+from typing import Any
+import math
+import random
+from slune.searchers.grid import SearcherGrid, Grid
+
+DISTRIBUTIONS = ['uniform', 'loguniform', 'int', 'categorical']
+
+def check_distribution(name: str, spec) -> tuple:
+    """ Checks a distribution is valid and returns it in the form (type, ...).
+
+    Distributions can be given as:
+    - ('uniform', low, high) -> float sampled uniformly between low and high.
+    - ('loguniform', low, high) -> float whose log is sampled uniformly between log(low) and log(high), low must be > 0.
+    - ('int', low, high) -> integer sampled uniformly from low to high (inclusive).
+    - ('categorical', [Value_1, Value_2, ...]) or simply [Value_1, Value_2, ...] -> one of the values, each equally likely.
+
+    Args:
+        - name (str): Name of the parameter, used in error messages.
+        - spec (tuple or list): The distribution.
+
+    Returns:
+        - spec (tuple): The distribution in the form (type, ...).
+
+    """
+
+    if isinstance(spec, list):
+        spec = ('categorical', spec)
+    if (not isinstance(spec, tuple)) or (len(spec) == 0) or (spec[0] not in DISTRIBUTIONS):
+        raise ValueError(f"Distribution for {name} must be a list of values or a tuple starting with one of {DISTRIBUTIONS}, got {spec}")
+    if spec[0] == 'categorical':
+        if (len(spec) != 2) or (len(spec[1]) == 0):
+            raise ValueError(f"Categorical distribution for {name} must be ('categorical', [Value_1, ...]), got {spec}")
+        return ('categorical', list(spec[1]))
+    if len(spec) != 3:
+        raise ValueError(f"Distribution for {name} must be ({spec[0]}, low, high), got {spec}")
+    _, low, high = spec
+    if low > high:
+        raise ValueError(f"low must be <= high for {name}, got {spec}")
+    if (spec[0] == 'loguniform') and (low <= 0):
+        raise ValueError(f"low must be > 0 for a loguniform distribution, got {spec} for {name}")
+    return spec
+
+def from_unit(spec: tuple, u: float) -> Any:
+    """ Maps a number between 0 and 1 to a value of a distribution.
+
+    If u is sampled uniformly between 0 and 1, the value returned is a sample from the distribution.
+    Used by the random searchers to map their (pseudo or quasi) random numbers to parameter values.
+
+    Args:
+        - spec (tuple): The distribution, as returned by check_distribution.
+        - u (float): Number in [0, 1).
+
+    Returns:
+        - value: The value of the distribution for u.
+
+    """
+
+    kind = spec[0]
+    if kind == 'categorical':
+        values = spec[1]
+        return values[min(int(u * len(values)), len(values) - 1)]
+    _, low, high = spec
+    if kind == 'uniform':
+        return low + (high - low) * u
+    elif kind == 'loguniform':
+        return math.exp(math.log(low) + (math.log(high) - math.log(low)) * u)
+    else:
+        return min(int(low) + int(u * (int(high) - int(low) + 1)), int(high))
+
+def to_unit(spec: tuple, value: Any) -> float:
+    """ Maps a value of a distribution to a number between 0 and 1, the inverse of from_unit.
+
+    Discrete values (int and categorical) are mapped to the middle of the interval of numbers that from_unit maps to them.
+    Values can also be given as strings, as they are when read back from a saver.
+
+    Args:
+        - spec (tuple): The distribution, as returned by check_distribution.
+        - value: A value of the distribution.
+
+    Returns:
+        - u (float): Number in [0, 1] that from_unit maps to the value.
+
+    """
+
+    kind = spec[0]
+    if kind == 'categorical':
+        values = spec[1]
+        for i, v in enumerate(values):
+            if (v == value) or (str(v) == str(value)):
+                return (i + 0.5) / len(values)
+        raise ValueError(f"{value} is not one of the values {values}")
+    _, low, high = spec
+    value = float(value)
+    if (value < low) or (value > high):
+        raise ValueError(f"{value} is outside of the range of {spec}")
+    if kind == 'uniform':
+        return (value - low) / (high - low) if high > low else 0.5
+    elif kind == 'loguniform':
+        return (math.log(value) - math.log(low)) / (math.log(high) - math.log(low)) if high > low else 0.5
+    else:
+        return (value - int(low) + 0.5) / (int(high) - int(low) + 1)
+
+class Samples(Grid):
+    """ Sequence of random samples of configurations, where each sample is only created when it is accessed.
+
+    The i-th sample is drawn with a random number generator seeded from the seed and i,
+    so it is the same every time it is accessed (and on every machine), without needing to draw the samples before it.
+    Supports the same operations as Grid.
+
+    Attributes:
+        - names (list of str): Names of the parameters, in the order they were given.
+        - distributions (list of tuple): Distribution to sample each parameter from, see check_distribution.
+        - seed (int): Seed of the samples.
+        - indices (range): Indices of the samples in this sequence.
+
+    """
+
+    def __init__(self, param_dict: dict, num_samples: int, seed: int = 0):
+        """ Initialises the samples.
+
+        Args:
+            - param_dict (dict): A dictionary where keys are parameter names and values are distributions, see check_distribution.
+            - num_samples (int): Number of samples.
+            - seed (int, optional): Seed of the samples, default is 0.
+
+        """
+
+        if num_samples < 0:
+            raise ValueError(f"num_samples must be non-negative, got {num_samples}")
+        self.names = list(param_dict.keys())
+        self.distributions = [check_distribution(name, param_dict[name]) for name in self.names]
+        self.seed = seed
+        self.indices = range(num_samples)
+
+    def __repr__(self) -> str:
+        """ Returns a short description of the samples. """
+
+        return f"Samples({dict(zip(self.names, self.distributions))}, seed={self.seed}, {self.indices})"
+
+    def decode(self, index: int) -> dict:
+        """ Draws the sample at an index.
+
+        Args:
+            - index (int): Index of the sample.
+
+        Returns:
+            - sample (dict): The sampled value of each parameter, with parameters in the order they were given.
+
+        """
+
+        rng = random.Random(f'{self.seed}:{index}')
+        return {name: from_unit(spec, rng.random()) for name, spec in zip(self.names, self.distributions)}
+
+class SearcherRandom(SearcherGrid):
+    """ Searcher for random search.
+
+    Given a dictionary of parameters and distributions to sample them from, draws num_samples random configurations,
+    and returns them one by one for each call to next_tune.
+    Covers a high-dimensional search space much better than a grid with the same number of jobs.
+
+    Configurations are drawn lazily and each one only depends on the seed and its index (see Samples),
+    so the same seed always gives the same sequence of configurations. 
+    After a restart we can therefore call check_existing_runs to skip the configurations already in storage.
+    Otherwise behaves exactly like SearcherGrid, including the runs and sharding arguments.
+
+    Attributes:
+        - configs (dict): Parameters and distributions to sample from.
+            Structure of dictionary should be: { "parameter_name" : distribution, ... }, see check_distribution for distributions.
+        - num_samples (int): Number of configurations to sample.
+        - seed (int): Seed used to sample the configurations.
+        - runs (int): Controls search based on number of runs we want for each config, see SearcherGrid.
+        - grid (Samples): Sequence of the sampled configurations.
+        - grid_index (int): Index of the current configuration.
+        - saver_exists (function): Used to check if there are existing runs, see SearcherGrid.check_existing_runs.
+
+    """
+
+    def __init__(self, configs: dict, num_samples: int, runs: int = 0, seed: int = 0,
+                 shard_index: int = 0, num_shards: int = 1, shard_strategy: str = 'strided'):
+        """ Initializes the searcher.
+
+        Args:
+            - configs (dict): Dictionary of parameters and distributions to sample from.
+                Structure of dictionary should be: { "parameter_name" : distribution, ... }, for example:
+                { "learning_rate" : ('loguniform', 1e-5, 1e-1), "batch_size" : ('int', 16, 256), "optimizer" : ['adam', 'sgd'] }
+            - num_samples (int): Number of configurations to sample.
+            - runs (int, optional): Controls search based on number of runs we want for each config, see SearcherGrid, default is 0.
+            - seed (int, optional): Seed used to sample the configurations, default is 0.
+            - shard_index (int, optional): Index of the shard of the samples to return configurations from, default is 0.
+            - num_shards (int, optional): Number of shards to split the samples into, default is 1 (no sharding).
+            - shard_strategy (str, optional): How to split the samples into shards, 'strided' or 'contiguous', default is 'strided'.
+
+        """
+
+        self.num_samples = num_samples
+        self.seed = seed
+        super(SearcherRandom, self).__init__(configs, runs=runs, shard_index=shard_index, num_shards=num_shards, shard_strategy=shard_strategy)
+
+    def get_grid(self, param_dict: dict) -> Samples:
+        """ Creates the sequence of sampled configurations.
+
+        Args:
+            - param_dict (dict): A dictionary where keys are parameter names and values are distributions.
+
+        Returns:
+            - samples (Samples): Sequence of the sampled configurations.
+
+        """
+
+        return Samples(param_dict, self.num_samples, seed=self.seed)
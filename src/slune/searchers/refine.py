@@ -0,0 +1,200 @@
+from typing import Callable, List, Optional, Tuple, Union
+import math
+from slune.base import BaseSaver
+from slune.utils import get_shard
+from slune.searchers.grid import SearcherGrid, Grid
+from slune.searchers.halving import get_results_lookup
+
+SCALES = ['linear', 'log']
+
+def is_numeric(values: list) -> bool:
+    """ Checks if all values are numbers (bools are not treated as numbers). """
+
+    return all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+
+def refine_values(best: Union[int, float], low: Union[int, float], high: Union[int, float], num_points: int, scale: str = 'linear', integer: bool = False) -> list:
+    """ Creates evenly spaced values from low to high, which should contain the best value.
+
+    Args:
+        - best (int or float): The best value so far, always included in the values.
+        - low (int or float): Smallest value.
+        - high (int or float): Largest value.
+        - num_points (int): Number of values.
+        - scale (str, optional): 'linear' for values evenly spaced, 'log' for values evenly spaced on a log scale, default is 'linear'.
+        - integer (bool, optional): If True values are rounded to integers, and duplicates removed, default is False.
+
+    Returns:
+        - values (list): Sorted list of values.
+
+    """
+
+    if num_points < 2 or high <= low:
+        values = [best]
+    elif scale == 'log':
+        values = [math.exp(math.log(low) + (math.log(high) - math.log(low)) * i / (num_points - 1)) for i in range(num_points)]
+    else:
+        values = [low + (high - low) * i / (num_points - 1) for i in range(num_points)]
+    if integer:
+        values = [int(round(v)) for v in values]
+    else:
+        # Round away floating point error, so values make tidy directory names
+        values = [float(f'{v:.12g}') for v in values]
+    return sorted(set(values + [best]))
+
+class SearcherRefine(SearcherGrid):
+    """ Searcher for adaptive grid refinement, which zooms in on the best region of a grid over several rounds.
+
+    The first round is a coarse grid search over the values given, as in SearcherGrid.
+    Each following round reads the results of the previous round through the savers read method,
+    takes the top_k configurations, and creates a finer grid around each of them.
+    For each numeric parameter the finer grid has num_points values spanning from the best value's neighbour below to its neighbour above
+    in the previous grid (evenly spaced, or evenly spaced on a log scale for parameters with scale 'log'),
+    so the spacing shrinks every round. Non-numeric parameters are fixed at their best value.
+    Values never leave the range of the values given for the first round.
+
+    Like SearcherHalving, the searcher doesn't hold any state between rounds,
+    it works out which round we are at from the results in storage each time check_existing_runs is called
+    (sbatchit calls it when given a saver), and returns the configurations of that round that have no results yet.
+    So the coarse sweep and the refinements are a loop of sbatchit calls, waiting for the jobs of each round to finish before the next call,
+    until the searcher has no configurations left.
+
+    Attributes:
+        - configs (dict): Parameters and values of the first round.
+        - metric_name (str): Name of the metric to optimise.
+        - num_rounds (int): Number of refinement rounds after the first round.
+        - top_k (int): Number of best configurations to refine around in each round.
+        - num_points (int): Number of values of each numeric parameter around each best configuration.
+        - scales (dict): Scale ('linear' or 'log') of each numeric parameter.
+        - select_by (str): How to select the value of the metric from the log of a run, see the savers read method.
+        - mode (str): 'max' to maximise the metric, 'min' to minimise it.
+        - round (int): Index of the round the searcher returns configurations from.
+        - grid (list of dict): Configurations of the current round that have no results yet.
+        - grid_index (int): Index of the current configuration in the grid.
+
+    """
+
+    def __init__(self, configs: dict, metric_name: str, num_rounds: int = 2, top_k: int = 1, num_points: int = 3,
+                 scale: Union[str, dict] = 'linear', select_by: str = 'max', mode: str = 'max',
+                 shard_index: int = 0, num_shards: int = 1, shard_strategy: str = 'strided'):
+        """ Initializes the searcher.
+
+        Args:
+            - configs (dict): Dictionary of parameters and values to try in the first round.
+                Structure of dictionary should be: { "parameter_name" : [Value_1, Value_2, ...], ... }
+            - metric_name (str): Name of the metric to optimise.
+            - num_rounds (int, optional): Number of refinement rounds after the first round, default is 2.
+            - top_k (int, optional): Number of best configurations to refine around in each round, default is 1.
+            - num_points (int, optional): Number of values of each numeric parameter around each best configuration, default is 3.
+            - scale (str or dict, optional): Scale used to refine numeric parameters, 'linear' or 'log',
+                or a dictionary of the scale of each parameter (missing parameters are 'linear'), default is 'linear'.
+            - select_by (str, optional): How to select the value of the metric from the log of a run, see the savers read method, default is 'max'.
+            - mode (str, optional): 'max' to maximise the metric, 'min' to minimise it, default is 'max'.
+            - shard_index (int, optional): Index of the shard of each round to return configurations from, default is 0.
+            - num_shards (int, optional): Number of shards to split each round into, default is 1 (no sharding).
+            - shard_strategy (str, optional): How to split each round into shards, 'strided' or 'contiguous', default is 'strided'.
+
+        """
+
+        if mode not in ['max', 'min']:
+            raise ValueError(f"mode must be 'max' or 'min', got {mode}")
+        self.metric_name = metric_name
+        self.num_rounds = num_rounds
+        self.top_k = top_k
+        self.num_points = num_points
+        self.select_by = select_by
+        self.mode = mode
+        self.shard_strategy = shard_strategy
+        self.scales = {}
+        for name, values in configs.items():
+            if is_numeric(values):
+                self.scales[name] = scale if isinstance(scale, str) else scale.get(name, 'linear')
+                if self.scales[name] not in SCALES:
+                    raise ValueError(f"scale must be one of {SCALES}, got {self.scales[name]} for {name}")
+                if (self.scales[name] == 'log') and (min(values) <= 0):
+                    raise ValueError(f"Values of {name} must be > 0 to refine it on a log scale")
+        self.round = 0
+        super(SearcherRefine, self).__init__(configs, runs=1, shard_index=shard_index, num_shards=num_shards, shard_strategy=shard_strategy)
+
+    def get_grid(self, param_dict: dict) -> Grid:
+        """ Creates the coarse grid of the first round. """
+
+        self.round = 0
+        return Grid(param_dict)
+
+    def get_neighbours(self, value: Union[int, float], values: list) -> Tuple[Union[int, float], Union[int, float]]:
+        """ Returns the values either side of a value in a sorted list of values, or the value itself at the ends of the list. """
+
+        below = [v for v in values if v < value]
+        above = [v for v in values if v > value]
+        return (max(below) if below else value), (min(above) if above else value)
+
+    def refine(self, config: dict, values: dict) -> Tuple[Grid, dict]:
+        """ Creates a finer grid around a configuration.
+
+        Args:
+            - config (dict): The configuration to refine around.
+            - values (dict): Values of each parameter in the grid the configuration came from.
+
+        Returns:
+            - grid (Grid): The finer grid.
+            - values (dict): Values of each parameter in the finer grid.
+
+        """
+
+        refined = {}
+        for name, value in config.items():
+            if name in self.scales:
+                low, high = self.get_neighbours(value, values[name])
+                integer = all(isinstance(v, int) for v in self.configs[name])
+                refined[name] = refine_values(value, low, high, self.num_points, self.scales[name], integer)
+            else:
+                refined[name] = [value]
+        return Grid(refined), refined
+
+    def get_pending(self, lookup: Optional[Callable] = None) -> List[dict]:
+        """ Finds the first unfinished round and returns its configurations that have no results yet.
+
+        Sets the round attribute to the index of that round.
+
+        Args:
+            - lookup (function, optional): Returns the result of a configuration, see get_results_lookup, default is None (no results).
+
+        Returns:
+            - pending (list of dict): Configurations with no results yet, empty if every round is finished.
+
+        """
+
+        # Each configuration is kept with the values of the grid it came from
+        grids = [(Grid(self.configs), {name: sorted(values) if name in self.scales else values for name, values in self.configs.items()})]
+        for round in range(self.num_rounds + 1):
+            self.round = round
+            configs, seen = [], set()
+            for grid, values in grids:
+                for config in grid:
+                    if str(config) not in seen:
+                        seen.add(str(config))
+                        configs.append((config, values))
+            if lookup is None:
+                return [config for config, _ in configs]
+            results = [lookup(config) for config, _ in configs]
+            pending = [config for (config, _), result in zip(configs, results) if result is None]
+            if pending != [] or round == self.num_rounds:
+                return pending
+            ranked = sorted(range(len(configs)), key=lambda i: results[i], reverse=(self.mode == 'max'))
+            grids = [self.refine(*configs[i]) for i in ranked[:self.top_k]]
+        return []
+
+    def check_existing_runs(self, saver: BaseSaver):
+        """ Reads the results in storage to find the configurations to run next.
+
+        Finds the first round that isn't finished, see get_pending,
+        and sets the searcher to return the configurations of that round that have no results yet.
+
+        Args:
+            - saver (BaseSaver): Saver whose read method is used to read the results, eg. SaverCsv.
+
+        """
+
+        pending = self.get_pending(get_results_lookup(saver, {}, self.metric_name, self.select_by))
+        self.grid = pending[get_shard(len(pending), self.shard_index, self.num_shards, self.shard_strategy)]
+        self.grid_index = None
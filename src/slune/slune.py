@@ -1,12 +1,17 @@
-from typing import List, Optional, Tuple
-from slune.base import BaseSearcher, BaseSaver
-import subprocess
+from typing import Callable, List, Optional, Tuple, Union
+from slune.base import BaseSearcher, BaseSaver, BaseExecutor
 import sys
+import os
+import time
 from slune.savers.csv import SaverCsv
 from slune.loggers.default import LoggerDefault
-from slune.utils import dict_to_strings
+from slune.executors.slurm import ExecutorSlurm
+from slune.executors.report import SubmissionReport
+from slune.utils import write_manifest, read_manifest
+from slune.runners import pack, pilot
+from slune.workqueue import WorkQueue
 
-def submit_job(sh_path: str, script_path:str = None , args: dict = {}):
+def submit_job(sh_path: str, script_path:str = None , args: dict = {}, executor: Optional[BaseExecutor] = None) -> SubmissionReport:
     """ Submits a job using specified Bash script.
 
     Args:
@@ -15,33 +20,104 @@ def submit_job(sh_path: str, script_path:str = None , args: dict = {}):
         - script_path (string): Path to the script (of the model) to be run for each job, default is None.
 
         - args (dict): Contains (key, value) pairs for all the arguments to be passed to the Bash script.
+
+        - executor (Executor, optional): Executor used to run the job, default is None which submits the job to SLURM using sbatch.
+
+    Returns:
+        - report (SubmissionReport): Outcome of the submission (or run, depending on the executor),
+            if given an executor this also holds any jobs submitted to it since its wait method was last called.
+            Waits for the job to be handed off (or to finish), to submit many jobs at once use the executor directly, or sbatchit.
     
     """
     
-    args = dict_to_strings(args, ready_for_cl=True)
-    try:
-        # Run the Bash script using subprocess
-        if script_path == None:
-            command = [sh_path] + args
-        else:
-            command = [sh_path, script_path] + args
-        subprocess.run(['sbatch'] + command, check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Error running sbatch: {e}")
-
-def sbatchit(script_path: str, sbatch_path: str, searcher: BaseSearcher, cargs: Optional[dict]={}, saver: Optional[BaseSaver]=None):
+    if executor == None:
+        executor = ExecutorSlurm()
+    executor.submit(sh_path, script_path, args)
+    return executor.wait()
+
+def submit_array_job(sh_path: str, manifest_path: str, num_tasks: int, script_path: str = None, max_concurrent: Optional[int] = None) -> SubmissionReport:
+    """ Submits a SLURM job array using specified Bash script, one array task per configuration in the manifest.
+
+    Every array task is given the argument '--slune_manifest=<manifest_path>',
+    lsargs then uses SLURM_ARRAY_TASK_ID to replace it with the arguments stored for that task in the manifest.
+
+    Args:
+        - sh_path (string): Path to the Bash script to be run.
+
+        - manifest_path (string): Path to the manifest holding the arguments for each array task, see write_manifest.
+
+        - num_tasks (int): Number of array tasks to submit, ie. the number of configurations in the manifest.
+
+        - script_path (string, optional): Path to the script (of the model) to be run for each task, default is None.
+
+        - max_concurrent (int, optional): Maximum number of array tasks SLURM will run at once (the '%K' throttle), default is None (no limit).
+
+    Returns:
+        - report (SubmissionReport): Outcome of the submission, with one entry for the whole array,
+            its config holds the '--array' argument and the manifest path, and its message is the output (or error) of sbatch.
+
+    """
+
+    if num_tasks < 1:
+        raise ValueError(f"num_tasks must be at least 1, got {num_tasks}")
+    array = f'--array=0-{num_tasks - 1}'
+    if max_concurrent is not None:
+        if max_concurrent < 1:
+            raise ValueError(f"max_concurrent must be at least 1, got {max_concurrent}")
+        array += f'%{max_concurrent}'
+    manifest_arg = f'--slune_manifest={manifest_path}'
+    if script_path == None:
+        command = [sh_path, manifest_arg]
+    else:
+        command = [sh_path, script_path, manifest_arg]
+    report = SubmissionReport()
+    report.add({'array': array, 'slune_manifest': manifest_path}, *ExecutorSlurm().sbatch(['sbatch', array] + command))
+    report.finish()
+    return report
+
+def sbatchit(script_path: Union[str, Callable], sbatch_path: str, searcher: BaseSearcher, cargs: Optional[dict]={}, saver: Optional[BaseSaver]=None,
+             array: bool=False, max_concurrent: Optional[int]=None, manifest_path: Optional[str]=None, executor: Optional[BaseExecutor]=None,
+             pack_size: Optional[int]=None, target_walltime: Optional[float]=None, config_walltime: Optional[float]=None, pack_workers: Optional[int]=1,
+             pack_in_process: bool=False, pilots: Optional[int]=None, queue_dir: Optional[str]=None, state_path: Optional[str]=None) -> SubmissionReport:
     """ Submits jobs based on arguments given by searcher.
 
     For each job runs the script stored at script_path with selected parameter values given by searcher
     and the arguments given by cargs.
 
     Uses the sbatch script with path sbatch_path to submit each job to the cluster. 
+    If given an Executor object, uses it to run each job instead, eg. ExecutorLocal runs the jobs on the local machine,
+    and ExecutorSlurm(max_workers=N) runs up to N sbatch calls at once, which speeds up submitting large sweeps.
+    ExecutorSlurmWindow keeps at most a given number of our jobs in the queue and retries rejected submissions,
+    which is useful if the cluster limits the number of jobs a user can submit.
+    ExecutorCallable calls a Python function (given in place of script_path) for each job in the current process.
+
+    If array is True, instead writes every configuration to a manifest and submits them all as a single SLURM job array,
+    so the scheduler is contacted once regardless of the number of configurations.
+    The script should then read its arguments using lsargs, which resolves them from the manifest for each array task.
+
+    If pack_size (or target_walltime and config_walltime) is given, configurations are packed into jobs,
+    each job runs slune's pack runner (slune/runners/pack.py) which runs the script for pack_size configurations from a manifest,
+    pack_workers at a time. This saves paying scheduler latency and start up costs for every configuration when each one is short.
+    The pack runner still starts a new Python interpreter for each configuration, unless pack_in_process is True.
+
+    If pilots is given, configurations are instead added to a WorkQueue on disk and pilots jobs are submitted,
+    each running slune's pilot runner (slune/runners/pilot.py) which claims and runs configurations from the queue until it is empty.
+    As pilots take work as they become free, configurations with very different run times are balanced across jobs automatically.
+    If given a saver with a root_dir, pilots skip configurations that already have enough runs when they claim them.
 
     If given a Saver object, uses it to check if there are existing runs for each job and skips them,
     based on the number of runs we would like for each job (which is stored in the saver).
 
+    If given a state_path, the searcher's state is saved there as jobs are handed off by the executor (see BaseSearcher.save_state and BaseExecutor.get_handed_off),
+    and if the file exists when we start, the searcher resumes from it, so a launcher that died part way through
+    carries on from the first configuration that wasn't handed off, without resubmitting jobs that were.
+    Existing runs are then not checked for (which would mean reading all the results in storage),
+    the configurations after the saved position are all submitted.
+    The file is removed once every configuration has been submitted.
+
     Args:
-        - script_path (str): Path to the script (of the model) to be run for each job.
+        - script_path (str or callable): Path to the script (of the model) to be run for each job,
+            or a function to call for each job if using ExecutorCallable.
 
         - sbatch_path (str): Path to the sbatch script that will be used to submit each job.
             Examples of sbatch scripts can be found in the templates folder.
@@ -53,18 +129,162 @@ def sbatchit(script_path: str, sbatch_path: str, searcher: BaseSearcher, cargs:
         - saver (Saver, optional): Saver object used if we want to check if there are existing runs so we don't rerun.
             Can simply not give a Saver object if you want to rerun all jobs.
 
+        - array (bool, optional): If True submits all jobs as one SLURM job array, default is False.
+
+        - max_concurrent (int, optional): Maximum number of array tasks to run at once, only used if array is True, default is None (no limit).
+
+        - manifest_path (str, optional): Path to write the manifest to, only used if array is True,
+            default is a new time stamped file in the directory 'slune_manifests'.
+
+        - executor (Executor, optional): Executor used to run each job, default is None which submits each job to SLURM using sbatch.
+            Can't be used together with array.
+
+        - pack_size (int, optional): Number of configurations to run in each job, default is None (one configuration per job).
+
+        - target_walltime (float, optional): Time in seconds we would like each job to run for,
+            used with config_walltime to choose pack_size if pack_size is not given, see get_pack_size.
+
+        - config_walltime (float, optional): Estimate of the time in seconds it takes to run one configuration.
+
+        - pack_workers (int, optional): Number of configurations each job runs at once, default is 1 (one after the other).
+            If None, each job runs one configuration per core allocated to it.
+
+        - pack_in_process (bool, optional): If True, each job runs its configurations one after the other inside the pack runner's interpreter,
+            so the script's imports are only paid once per job, see slune.runners.pack.run_in_process, default is False.
+            pack_workers must then be 1.
+
+        - pilots (int, optional): Number of pilot jobs to submit, default is None (don't use pilot jobs).
+            Each pilot runs pack_workers configurations at once (one if pack_workers is None).
+
+        - queue_dir (str, optional): Path to the directory holding the queue used by the pilots,
+            default is '.slune_queue' in the saver's root directory (or in './slune_results' if there is no saver).
+
+        - state_path (str, optional): Path to a file to save the searcher's state to, and resume it from, default is None (don't save state).
+            With a job array, packing or pilots, every configuration is submitted at once, so the state is only used to resume.
+
+    Returns:
+        - report (SubmissionReport): Outcome of each job's submission (or run, depending on the executor), in the order they were submitted.
+            Use report.get_failed() to find configurations that need resubmitting and report.get_throughput() for the jobs submitted per second.
+            If array is True, there is one entry for the whole array (none if there were no configurations), see submit_array_job.
+            If packing or using pilots, there is one entry per job (not per configuration).
+
     """
 
-    if saver != None:
+    if (pack_size == None) and (target_walltime != None):
+        if config_walltime == None:
+            raise ValueError("config_walltime must be given to choose pack_size from target_walltime.")
+        pack_size = get_pack_size(target_walltime, config_walltime, workers=pack_workers if pack_workers != None else 1)
+    # A saved state already tells us where to carry on from, so we only look for existing runs when there isn't one
+    resumed = (state_path != None) and searcher.load_state(state_path)
+    if (state_path != None) and not resumed:
+        # Fail before submitting anything if the searcher can't save its state
+        searcher.get_state()
+    if (saver != None) and not resumed:
         searcher.check_existing_runs(saver)
+    if (array or (pack_size != None)) and (manifest_path == None):
+        manifest_path = os.path.join('slune_manifests', f'manifest_{time.strftime("%Y%m%d-%H%M%S")}_{os.getpid()}.jsonl')
+    if array:
+        if executor != None:
+            raise ValueError("Can't use an executor when submitting a job array, job arrays are always submitted using sbatch.")
+        if (pack_size != None) or (pilots != None):
+            raise ValueError("Can't pack configurations into jobs or use pilot jobs when submitting a job array.")
+        # Array tasks may not start in the submission directory, so we give them an absolute path
+        manifest_path = os.path.abspath(manifest_path)
+        num_tasks = write_manifest((dict(cargs, **args) for args in searcher), manifest_path)
+        report = SubmissionReport()
+        if num_tasks > 0:
+            report = submit_array_job(sbatch_path, manifest_path, num_tasks, script_path=script_path, max_concurrent=max_concurrent)
+        report.finish()
+        remove_state(searcher, state_path)
+        return report
+    if executor == None:
+        if callable(script_path):
+            raise ValueError("Given a function in place of the script path, please also give an executor that can call it, eg. ExecutorCallable.")
+        executor = ExecutorSlurm()
+    if pilots != None:
+        if pilots < 1:
+            raise ValueError(f"pilots must be at least 1, got {pilots}")
+        if pack_size != None:
+            raise ValueError("Can't pack configurations into jobs when using pilot jobs.")
+        root_dir = getattr(saver, 'root_dir', None)
+        if queue_dir == None:
+            queue_dir = os.path.join(root_dir if root_dir != None else os.path.join('.', 'slune_results'), '.slune_queue')
+        queue_dir = os.path.abspath(queue_dir)
+        runs = getattr(searcher, 'runs', 0)
+        WorkQueue(queue_dir).put({'args': dict(cargs, **args), 'params': args, 'runs': runs} for args in searcher)
+        pilot_args = {'slune_script': script_path, 'slune_queue': queue_dir, 'slune_workers': pack_workers if pack_workers != None else 1}
+        if (root_dir != None) and (getattr(saver, 'ext', None) != None):
+            pilot_args['slune_results'] = os.path.abspath(root_dir)
+            pilot_args['slune_ext'] = saver.ext
+            pilot_args['slune_layout'] = getattr(saver, 'layout', 'nested')
+        for _ in range(pilots):
+            executor.submit(sbatch_path, pilot.__file__, pilot_args)
+        remove_state(searcher, state_path)
+        return executor.wait()
+    if pack_size != None:
+        if pack_size < 1:
+            raise ValueError(f"pack_size must be at least 1, got {pack_size}")
+        manifest_path = os.path.abspath(manifest_path)
+        num_configs = write_manifest((dict(cargs, **args) for args in searcher), manifest_path)
+        for start in range(0, num_configs, pack_size):
+            pack_args = {'slune_script': script_path, 'slune_manifest': manifest_path,
+                         'slune_start': start, 'slune_stop': min(start + pack_size, num_configs)}
+            if pack_workers != None:
+                pack_args['slune_workers'] = pack_workers
+            if pack_in_process:
+                pack_args['slune_in_process'] = True
+            executor.submit(sbatch_path, pack.__file__, pack_args)
+        remove_state(searcher, state_path)
+        return executor.wait()
+    # States of the searcher after each job that hasn't been handed off yet, and the number of jobs handed off so far
+    states, handed_off = [], 0
     # Create sbatch script for each job
     for args in searcher:
         # Submit job
         d = dict(cargs, **args)
-        submit_job(sbatch_path, script_path, d)
+        executor.submit(sbatch_path, script_path, d)
+        if state_path != None:
+            # Only save the state once the executor has handed the job off, a job that is only queued in this process is lost if we are killed
+            states.append(searcher.get_state())
+            num_jobs = executor.get_handed_off()
+            if num_jobs > handed_off:
+                searcher.save_state(state_path, states[num_jobs - handed_off - 1])
+                del states[:num_jobs - handed_off]
+                handed_off = num_jobs
+    remove_state(searcher, state_path)
+    return executor.wait()
+
+def remove_state(searcher: BaseSearcher, state_path: Optional[str]):
+    """ Removes a searcher's state file once every configuration has been submitted, if there is one. """
+
+    if state_path != None:
+        searcher.remove_state(state_path)
+
+def get_pack_size(target_walltime: float, config_walltime: float, workers: int = 1) -> int:
+    """ Returns the number of configurations to pack into each job so that it runs for about target_walltime.
+
+    Args:
+        - target_walltime (float): Time in seconds we would like each job to run for.
+        - config_walltime (float): Estimate of the time in seconds it takes to run one configuration.
+        - workers (int, optional): Number of configurations each job runs at once, default is 1.
+
+    Returns:
+        - pack_size (int): Number of configurations to run in each job, at least 1.
+
+    """
+
+    if (target_walltime <= 0) or (config_walltime <= 0):
+        raise ValueError("target_walltime and config_walltime must be positive.")
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    return max(1, int(target_walltime // config_walltime) * workers)
 
 def lsargs() -> Tuple[str, List[str]]:
     """ Returns the script name and the list of the arguments passed to the script.
+
+    If the script was launched as a task of a job array submitted by sbatchit,
+    the '--slune_manifest=<path>' argument is replaced by the arguments stored in the manifest for this task,
+    which is found using the SLURM_ARRAY_TASK_ID environment variable.
     
     Returns:
         - script_name (str): Name of the script.
@@ -74,7 +294,18 @@ def lsargs() -> Tuple[str, List[str]]:
     """
 
     args = sys.argv
-    return args[0], args[1:]
+    script_name, args = args[0], args[1:]
+    manifest_args = [a for a in args if a.startswith('--slune_manifest=')]
+    if manifest_args == []:
+        return script_name, args
+    if len(manifest_args) > 1:
+        raise ValueError("Only one '--slune_manifest=' argument can be given.")
+    task_id = os.environ.get('SLURM_ARRAY_TASK_ID')
+    if task_id is None:
+        raise ValueError("Given a '--slune_manifest=' argument but SLURM_ARRAY_TASK_ID is not set, are we running in a job array?")
+    manifest_path = manifest_args[0].split('=', 1)[1]
+    args = [a for a in args if a != manifest_args[0]] + read_manifest(manifest_path, int(task_id))
+    return script_name, args
 
 def get_csv_saver(params: Optional[dict]= None, root_dir: Optional[str]='slune_results') -> BaseSaver:
     """ Returns a SaverCsv object with the given parameters and root directory.
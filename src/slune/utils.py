@@ -1,7 +1,18 @@
 import os
-from typing import List, Optional, Tuple
+import json
+import hashlib
+import struct
+from array import array
+from typing import Iterable, List, Optional, Tuple
 
-def find_directory_path(strings: List[str], root_directory: Optional[str]='.') -> Tuple[int, str]:
+def list_dirs(path: str, tree: Optional[dict]=None) -> List[str]:
+    """ Returns the names of the subdirectories of a directory, from the tree given if there is one, otherwise from the file system. """
+
+    if tree is not None:
+        return list(tree.get(path, []))
+    return [entry.name for entry in os.scandir(path) if entry.is_dir()]
+
+def find_directory_path(strings: List[str], root_directory: Optional[str]='.', tree: Optional[dict]=None) -> Tuple[int, str]:
     """ Searches the root directory for a path of directories that matches the strings given in any order.
     If only a partial match is found, returns the deepest matching path.
     If no matches are found returns root_directory.
@@ -10,6 +21,7 @@ def find_directory_path(strings: List[str], root_directory: Optional[str]='.') -
     Args:
         - strings (list of str): List of strings to be matched in any order. Each string in list must be in the form '--string='.
         - root_directory (string, optional): Path to the root directory to be searched, default is current working directory.
+        - tree (dict, optional): Subdirectory names of each directory (see ResultsIndex.get_tree), searched instead of the file system, default is None.
     
     Returns:
         - max_depth (int): Depth of the deepest matching path.
@@ -18,7 +30,7 @@ def find_directory_path(strings: List[str], root_directory: Optional[str]='.') -
     """
 
     def _find_directory_path(curr_strings, curr_root, depth, max_depth, max_path):
-        dir_list = [entry.name for entry in os.scandir(curr_root) if entry.is_dir()]
+        dir_list = list_dirs(curr_root, tree)
         stripped_dir_list = [d.split('=')[0].strip() +"=" for d in dir_list]
         stripped_dir_list = list(set(stripped_dir_list))
         for string in curr_strings:
@@ -41,12 +53,13 @@ def find_directory_path(strings: List[str], root_directory: Optional[str]='.') -
         max_path = os.path.join(root_directory, max_path)
     return max_path
 
-def get_numeric_equiv(og_path: str, root_directory: Optional[str]='.') -> str:
+def get_numeric_equiv(og_path: str, root_directory: Optional[str]='.', tree: Optional[dict]=None) -> str:
     """ Replaces directories in path with existing directories with the same numerical value.
 
     Args:
         - og_path (str): Path we want to check against existing paths, must be a subdirectory of root_directory and each directory must have form '--string=value'.
         - root_directory (str, optional): Path to the root directory to be searched, default is current working directory.
+        - tree (dict, optional): Subdirectory names of each directory (see ResultsIndex.get_tree), searched instead of the file system, default is None.
     
     Returns:
         - equiv (str): Path with values changed to match existing directories if values are numerically equivalent, with root directory at beginning.
@@ -64,7 +77,7 @@ def get_numeric_equiv(og_path: str, root_directory: Optional[str]='.') -> str:
     equiv = root_directory
     for d in dirs:
         next_dir = os.path.join(equiv, d)
-        if os.path.exists(next_dir):
+        if (next_dir in tree) if tree is not None else os.path.exists(next_dir):
             equiv = next_dir
         else:
             if not '=' in d: # We only consider directories with the form '--string=value'
@@ -76,8 +89,8 @@ def get_numeric_equiv(og_path: str, root_directory: Optional[str]='.') -> str:
                 raise ValueError("'=' cannot be at the beginning or end of a directory name.")
             if is_numeric(dir_value):
                 dir_value = float(dir_value)
-                if os.path.exists(equiv):
-                    existing_dirs = [entry.name for entry in os.scandir(equiv) if entry.is_dir()]
+                if (equiv in tree) if tree is not None else os.path.exists(equiv):
+                    existing_dirs = list_dirs(equiv, tree)
                     for existing_dir in existing_dirs:
                         if not '=' in existing_dir: # We only consider directories with the form '--string=value'
                             continue
@@ -162,17 +175,44 @@ def strings_to_dict(ls:List[str])->dict:
         d[key] = value
     return d
 
-def find_ext_files(ext: str, root_directory: Optional[str]='.') -> List[str]:
+def strings_to_flags(ls: List[str]) -> dict:
+    """ Converts a list of command line arguments in the form of '--key=value' into a dictionary, keeping the values as strings.
+
+    Unlike strings_to_dict, each argument is only split at its first '=', so values can contain '='
+    (eg. paths through results directories named "name=value"), and values are not converted to numbers.
+    Used to parse the arguments of slune's runners.
+
+    Args:
+        - ls (list of str): List of strings in the form of '--key=value'.
+
+    Returns:
+        - d (dict): Dictionary containing the key-value pairs, with '--' or '-' stripped from the keys.
+
+    """
+
+    d = {}
+    for item in ls:
+        if '=' not in item:
+            raise ValueError(f"Each argument must contain an '=' between the key and value, got {item}")
+        key, value = item.split('=', 1)
+        d[key[2:] if key[:2] == '--' else key[1:] if key[:1] == '-' else key] = value
+    return d
+
+def find_ext_files(ext: str, root_directory: Optional[str]='.', files: Optional[List[str]]=None) -> List[str]:
     """ Recursively finds all files with 'ext' extension in all subdirectories of the root directory and returns their paths.
 
     Args:
         - ext (str): Extension of the files we want to find.
         - root_directory (str, optional): Path to the root directory to be searched, default is current working directory.
+        - files (list of str, optional): Paths of the files under the root directory (see ResultsIndex.get_files),
+            searched instead of walking the file system, default is None.
 
     Returns:
         - files (list of str): List of strings containing the paths to all files with ext as the extension found.
 
     """
+    if files is not None:
+        return [file for file in files if file.endswith(ext)]
     ext_files = []
     for root, dirs, files in os.walk(root_directory):
         for file in files:
@@ -180,7 +220,7 @@ def find_ext_files(ext: str, root_directory: Optional[str]='.') -> List[str]:
                 ext_files.append(os.path.join(root, file))
     return ext_files
 
-def get_all_paths(ext:str, dirs: List[str], root_directory: Optional[str]='.') -> List[str]:
+def get_all_paths(ext:str, dirs: List[str], root_directory: Optional[str]='.', files: Optional[List[str]]=None) -> List[str]:
     """ Find all possible paths of files with 'ext' extension that have directory matching one of each of all the parameters given.
     
     Finds all paths of files ending with 'ext' in all subdirectories of the root directory that have a directory in their path matching one of each of all the parameters given.
@@ -189,35 +229,306 @@ def get_all_paths(ext:str, dirs: List[str], root_directory: Optional[str]='.') -
         - ext (str): Extension of the files we want to find.
         - dirs (list of str): List of directory names we want returned paths to have in their path. Checks equivalence of values if the directory name is in the form '--string=value'.
         - root_directory (str, optional): Path to the root directory to be searched, default is current working directory.
+        - files (list of str, optional): Paths of the files under the root directory, searched instead of walking the file system, default is None.
 
     Returns:
         - matches (list of str): List of strings containing the paths to all files ending with 'ext' found.
 
     """
 
-    all_files = find_ext_files(ext, root_directory)
+    all_files = find_ext_files(ext, root_directory, files)
     matches = []
     for file in all_files:
         path = file.split(os.path.sep)
-        contains = []
-        if dirs in [None, []]:
+        if match_params(dirs, path):
             matches.append(file)
-            continue
-        else:
-            for p in dirs:
-                if '=' in p:
-                    param, value = p.split('=')
-                    for dir in path:
-                        if dir.startswith(param + '='):
-                            _, dir_value = dir.split('=')
-                            try:
-                                if float(value) == float(dir_value):
-                                    contains.append(p)
-                            except ValueError:
-                                if value == dir_value:
-                                    contains.append(p)
-                elif p in path:
-                    contains.append(p)
-            if len(contains) == len(dirs):
-                matches.append(file)
-    return matches
\ No newline at end of file
+    return matches
+
+def match_params(dirs: List[str], path: List[str]) -> bool:
+    """ Checks if a list of directory names (or 'name=value' strings) has a match for each of the parameters given.
+
+    Args:
+        - dirs (list of str): Parameters to match, in the form 'name=value', or other directory names that must be in path.
+            Values are compared as numbers if they are numeric.
+        - path (list of str): Directory names (or 'name=value' strings) to search for the parameters.
+
+    Returns:
+        - match (bool): True if every parameter has a match.
+
+    """
+
+    if dirs in [None, []]:
+        return True
+    contains = []
+    for p in dirs:
+        if '=' in p:
+            param, value = p.split('=')
+            for dir in path:
+                if dir.startswith(param + '='):
+                    _, dir_value = dir.split('=')
+                    try:
+                        if float(value) == float(dir_value):
+                            contains.append(p)
+                    except ValueError:
+                        if value == dir_value:
+                            contains.append(p)
+        elif p in path:
+            contains.append(p)
+    return len(contains) == len(dirs)
+
+def get_config_hash(params: List[str]) -> str:
+    """ Returns a stable hash of a configuration, used to name its directory in the flat results layout.
+
+    Parameters are sorted by name and numeric values are converted to floats first,
+    so the hash doesn't depend on the order of the parameters and numerically equal values (eg. '0.1' and '0.10') have the same hash.
+
+    Args:
+        - params (list of str): Parameters of the configuration, in the form ['name=value', ...].
+
+    Returns:
+        - hash (str): 16 hexadecimal characters.
+
+    """
+
+    canonical = []
+    for p in params:
+        name, value = p.split('=', 1)
+        try:
+            value = repr(float(value))
+        except ValueError:
+            pass
+        canonical.append([name.strip(), value])
+    return hashlib.sha256(json.dumps(sorted(canonical)).encode('utf-8')).hexdigest()[:16]
+
+
+LINE_INDEX_HEADER = struct.Struct('<QQQ')
+
+def get_line_index_path(path: str) -> str:
+    """ Returns the path of the line index of a file, which is stored next to it with the extension '.idx' added. """
+
+    return path + '.idx'
+
+def write_line_index(path: str, offsets: Iterable[int], skip_lines: int = 0) -> str:
+    """ Writes a line index for a file, holding the byte offset of each line so any line can be read without reading the ones before it.
+
+    The index starts with a header holding the size and modification time of the file, and the number of lines skipped,
+    so we can tell if the index is out of date. Then holds each offset as an 8 byte unsigned integer.
+    Written to a temporary file then renamed, so processes reading (or building) the same index at once always see a whole index.
+
+    Args:
+        - path (str): Path to the file that was indexed, which must not change after the offsets were found.
+        - offsets (iterable of int): Byte offset of the start of each line.
+        - skip_lines (int, optional): Number of lines at the start of the file that are not indexed (eg. a header), default is 0.
+
+    Returns:
+        - index_path (str): Path to the index.
+
+    """
+
+    index_path = get_line_index_path(path)
+    tmp_path = f'{index_path}.{os.getpid()}.tmp'
+    stat = os.stat(path)
+    with open(tmp_path, 'wb') as f:
+        f.write(LINE_INDEX_HEADER.pack(stat.st_size, stat.st_mtime_ns, skip_lines))
+        chunk = array('Q')
+        for offset in offsets:
+            chunk.append(offset)
+            if len(chunk) == 65536:
+                f.write(chunk.tobytes())
+                chunk = array('Q')
+        f.write(chunk.tobytes())
+    os.replace(tmp_path, index_path)
+    return index_path
+
+def get_line_offsets(path: str, skip_lines: int = 0) -> Iterable[int]:
+    """ Yields the byte offset of each non-blank line of a file, reading it one line at a time. """
+
+    with open(path, 'rb') as f:
+        for _ in range(skip_lines):
+            f.readline()
+        offset = f.tell()
+        for line in f:
+            if line.strip() != b'':
+                yield offset
+            offset += len(line)
+
+def get_line_index(path: str, skip_lines: int = 0) -> Tuple[str, int]:
+    """ Returns the line index of a file, building it first if it doesn't exist or is out of date.
+
+    Blank lines are not indexed. Building the index reads the file once, one line at a time, so uses constant memory.
+
+    Args:
+        - path (str): Path to the file.
+        - skip_lines (int, optional): Number of lines at the start of the file not to index (eg. a header), default is 0.
+
+    Returns:
+        - index_path (str): Path to the index.
+        - num_lines (int): Number of lines in the index.
+
+    """
+
+    index_path = get_line_index_path(path)
+    stat = os.stat(path)
+    if os.path.exists(index_path):
+        with open(index_path, 'rb') as f:
+            header = f.read(LINE_INDEX_HEADER.size)
+        if (len(header) == LINE_INDEX_HEADER.size) and (LINE_INDEX_HEADER.unpack(header) == (stat.st_size, stat.st_mtime_ns, skip_lines)):
+            return index_path, (os.path.getsize(index_path) - LINE_INDEX_HEADER.size) // 8
+    write_line_index(path, get_line_offsets(path, skip_lines), skip_lines)
+    return index_path, (os.path.getsize(index_path) - LINE_INDEX_HEADER.size) // 8
+
+def get_line_offset(index_path: str, index: int) -> int:
+    """ Reads the byte offset of a line from a line index. """
+
+    with open(index_path, 'rb') as f:
+        f.seek(LINE_INDEX_HEADER.size + 8 * index)
+        data = f.read(8)
+    if len(data) != 8:
+        raise IndexError(f"Line index {index_path} has no line with index {index}")
+    return struct.unpack('<Q', data)[0]
+
+def read_lines(path: str, start: int, stop: int, skip_lines: int = 0) -> List[str]:
+    """ Reads a range of (non-blank) lines of a file, using its line index to go straight to the first one.
+
+    Args:
+        - path (str): Path to the file.
+        - start (int): Index of the first line to read (starting at 0, after any skipped lines).
+        - stop (int): Index one past the last line to read, the range is cut short if the file ends before stop.
+        - skip_lines (int, optional): Number of lines at the start of the file that are not indexed, default is 0.
+
+    Returns:
+        - lines (list of str): The lines, without their line endings.
+
+    """
+
+    if (start < 0) or (stop < start):
+        raise IndexError(f"Invalid line range [{start}, {stop})")
+    index_path, num_lines = get_line_index(path, skip_lines)
+    lines = []
+    if start >= min(stop, num_lines):
+        return lines
+    with open(path, 'rb') as f:
+        f.seek(get_line_offset(index_path, start))
+        while len(lines) < min(stop, num_lines) - start:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"{path} is shorter than its line index, it changed after the index was built")
+            if line.strip() != b'':
+                lines.append(line.decode('utf-8').rstrip('\r\n'))
+    return lines
+
+def write_json(obj, path: str):
+    """ Writes an object to a json file, directories are created if they don't exist.
+
+    Writes to a temporary file first then renames it, so the file is always complete even if we are killed while writing.
+
+    Args:
+        - obj (object): Object to write, must be serialisable with json.
+        - path (str): Path to the file.
+
+    """
+
+    dir_path = os.path.dirname(path)
+    if dir_path != '':
+        os.makedirs(dir_path, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, path)
+
+def write_manifest(configs: Iterable[dict], manifest_path: str) -> int:
+    """ Writes configurations to a manifest file, one line per configuration.
+
+    Each line of the manifest is a JSON list of the command-line arguments for one configuration,
+    ie. ["--argument_name=argument_value", ...]. The line number of a configuration is its index in the manifest,
+    which lets SLURM array tasks look up their arguments using SLURM_ARRAY_TASK_ID.
+    A line index is written next to the manifest (see write_line_index), so each task can read its line without reading the ones before it.
+
+    Args:
+        - configs (iterable of dict): Configurations to write, each containing (argument, value) pairs.
+        - manifest_path (str): Path to the manifest file, directories are created if they don't exist.
+
+    Returns:
+        - num_configs (int): Number of configurations written to the manifest.
+
+    """
+
+    manifest_dir = os.path.dirname(manifest_path)
+    if manifest_dir != '':
+        os.makedirs(manifest_dir, exist_ok=True)
+    offsets = array('Q')
+    offset = 0
+    with open(manifest_path, 'wb') as f:
+        for config in configs:
+            line = (json.dumps(dict_to_strings(config, ready_for_cl=True)) + '\n').encode('utf-8')
+            f.write(line)
+            offsets.append(offset)
+            offset += len(line)
+    write_line_index(manifest_path, offsets)
+    return len(offsets)
+
+def read_manifest(manifest_path: str, index: int) -> List[str]:
+    """ Reads the command-line arguments of one configuration from a manifest file.
+
+    Args:
+        - manifest_path (str): Path to the manifest file, as written by write_manifest.
+        - index (int): Index of the configuration in the manifest (starting at 0).
+
+    Returns:
+        - args (list of str): Command-line arguments for the configuration, in form ["--argument_name=argument_value", ...].
+
+    """
+
+    if index < 0:
+        raise IndexError(f"Manifest index must be non-negative, got {index}")
+    lines = read_lines(manifest_path, index, index + 1)
+    if lines == []:
+        raise IndexError(f"Manifest {manifest_path} has no configuration with index {index}")
+    return json.loads(lines[0])
+
+def read_manifest_range(manifest_path: str, start: int, stop: int) -> List[List[str]]:
+    """ Reads the command-line arguments of a range of configurations from a manifest file.
+
+    Args:
+        - manifest_path (str): Path to the manifest file, as written by write_manifest.
+        - start (int): Index of the first configuration to read (starting at 0).
+        - stop (int): Index one past the last configuration to read, the range is cut short if the manifest ends before stop.
+
+    Returns:
+        - args (list of list of str): Command-line arguments for each configuration in the range.
+
+    """
+
+    if (start < 0) or (stop < start):
+        raise IndexError(f"Invalid manifest range [{start}, {stop})")
+    return [json.loads(line) for line in read_lines(manifest_path, start, stop)]
+
+def get_shard(num_items: int, shard_index: int = 0, num_shards: int = 1, strategy: str = 'strided') -> slice:
+    """ Returns a slice selecting one shard's share of a sequence, so several launchers can split a search space between them.
+
+    The shards are disjoint and together cover the whole sequence, and each shard's share only depends on its index,
+    so a restarted shard always gets the same share.
+
+    Args:
+        - num_items (int): Length of the sequence to be split.
+        - shard_index (int, optional): Index of the shard, from 0 to num_shards - 1, default is 0.
+        - num_shards (int, optional): Number of shards the sequence is split into, default is 1.
+        - strategy (str, optional): How to split the sequence, default is 'strided'.
+            'strided' -> shard k gets items k, k + num_shards, k + 2 * num_shards, ...
+            'contiguous' -> shard k gets the k-th of num_shards consecutive blocks of (almost) equal size.
+
+    Returns:
+        - shard (slice): Slice selecting the shard's share of the sequence.
+
+    """
+
+    if num_shards < 1:
+        raise ValueError(f"num_shards must be at least 1, got {num_shards}")
+    if not (0 <= shard_index < num_shards):
+        raise ValueError(f"shard_index must be between 0 and num_shards - 1, got {shard_index}")
+    if strategy == 'strided':
+        return slice(shard_index, None, num_shards)
+    elif strategy == 'contiguous':
+        return slice((num_items * shard_index) // num_shards, (num_items * (shard_index + 1)) // num_shards)
+    else:
+        raise ValueError(f"strategy must be 'strided' or 'contiguous', got {strategy}")
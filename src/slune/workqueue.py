@@ -0,0 +1,151 @@
+from typing import Iterable, List, Optional, Tuple
+import os
+import json
+import threading
+import time
+
+class WorkQueue:
+    """ A queue of configurations stored on disk, that many workers (eg. pilot jobs) can safely take work from at once.
+
+    Each item in the queue is a small json file, which moves between the following directories of the queue directory:
+    - 'pending' - items waiting to be run.
+    - 'claimed' - items a worker has taken and is running.
+    - 'done' - items that ran successfully (or were skipped as they already had results).
+    - 'failed' - items that ran but failed.
+
+    Workers claim an item by renaming it from 'pending' to 'claimed'. 
+    Renaming is atomic, so if two workers try to claim the same item only one of them succeeds and the other moves on to the next item.
+    New items are written to a temporary file first and then renamed into 'pending', so workers never see half written items.
+    This means the queue works on shared filesystems without any locking or server, as long as rename is atomic (as on NFS and Lustre).
+
+    Items are claimed in the order they were added.
+    The pending directory is only listed when the names from the last listing have all been tried,
+    so claiming every item in a large queue doesn't list the whole directory for each item.
+    Items moved back to pending by requeue are claimed once the names from the last listing run out.
+
+    Attributes:
+        - queue_dir (str): Path to the directory holding the queue.
+        - pending (list of str): Names of pending items from the last listing of the pending directory not tried yet, the next one last.
+
+    """
+
+    STATES = ['pending', 'claimed', 'done', 'failed']
+
+    def __init__(self, queue_dir: str):
+        """ Initialises the queue, creating its directories if they don't exist.
+
+        Args:
+            - queue_dir (str): Path to the directory holding the queue.
+
+        """
+
+        self.queue_dir = queue_dir
+        for state in self.STATES:
+            os.makedirs(os.path.join(self.queue_dir, state), exist_ok=True)
+        self.pending = []
+        # Workers in the same process (eg. the threads of a pilot) share the listing
+        self.lock = threading.Lock()
+
+    def get_state_dir(self, state: str) -> str:
+        """ Returns the path to the directory holding the items with the given state. """
+
+        if state not in self.STATES:
+            raise ValueError(f"state must be one of {self.STATES}, got {state}")
+        return os.path.join(self.queue_dir, state)
+
+    def put(self, items: Iterable[dict]) -> int:
+        """ Adds items to the end of the queue.
+
+        Args:
+            - items (iterable of dict): Items to add, each must be serializable as json.
+
+        Returns:
+            - num_items (int): Number of items added.
+
+        """
+
+        # Items are named so that sorting by name gives the order they were added in
+        batch = f'{time.time_ns():020d}_{os.getpid()}'
+        pending_dir = self.get_state_dir('pending')
+        num_items = 0
+        for i, item in enumerate(items):
+            name = f'{batch}_{i:09d}.json'
+            tmp_path = os.path.join(self.queue_dir, '.' + name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(item, f)
+            os.rename(tmp_path, os.path.join(pending_dir, name))
+            num_items += 1
+        return num_items
+
+    def claim(self) -> Optional[Tuple[str, dict]]:
+        """ Claims the next pending item, so no other worker will run it.
+
+        Returns:
+            - name (str): Name of the item claimed, used to complete it, None if there are no pending items.
+            - item (dict): The item claimed, None if there are no pending items.
+
+        """
+
+        pending_dir = self.get_state_dir('pending')
+        claimed_dir = self.get_state_dir('claimed')
+        while True:
+            with self.lock:
+                if self.pending == []:
+                    self.pending = sorted(os.listdir(pending_dir), reverse=True)
+                    if self.pending == []:
+                        return None, None
+                name = self.pending.pop()
+            try:
+                os.rename(os.path.join(pending_dir, name), os.path.join(claimed_dir, name))
+            except (FileNotFoundError, FileExistsError):
+                # Another worker claimed it first
+                continue
+            with open(os.path.join(claimed_dir, name), 'r') as f:
+                return name, json.load(f)
+
+    def complete(self, name: str, success: bool = True):
+        """ Marks a claimed item as done or failed.
+
+        Args:
+            - name (str): Name of the item, as returned by claim.
+            - success (bool, optional): Whether the item ran successfully, default is True.
+
+        """
+
+        state = 'done' if success else 'failed'
+        os.rename(os.path.join(self.get_state_dir('claimed'), name), os.path.join(self.get_state_dir(state), name))
+
+    def requeue(self, state: str = 'claimed') -> int:
+        """ Moves all items with the given state back to pending.
+
+        Useful for recovering items claimed by workers that died before completing them, 
+        or for retrying failed items. Only call this for claimed items when no workers are running.
+
+        Args:
+            - state (str, optional): State of the items to move, default is 'claimed'.
+
+        Returns:
+            - num_items (int): Number of items moved back to pending.
+
+        """
+
+        state_dir = self.get_state_dir(state)
+        pending_dir = self.get_state_dir('pending')
+        num_items = 0
+        for name in os.listdir(state_dir):
+            try:
+                os.rename(os.path.join(state_dir, name), os.path.join(pending_dir, name))
+                num_items += 1
+            except FileNotFoundError:
+                continue
+        return num_items
+
+    def count(self, state: str = 'pending') -> int:
+        """ Returns the number of items with the given state. """
+
+        return len(os.listdir(self.get_state_dir(state)))
+
+    def __len__(self) -> int:
+        """ Returns the number of pending items. """
+
+        return self.count('pending')
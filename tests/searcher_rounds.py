@@ -0,0 +1,62 @@
+""" Shared scaffolding for the tests of searchers that are run round after round, each round reading the results of the previous ones. """
+
+import os
+import shutil
+import tempfile
+from slune import sbatchit, get_csv_saver
+from slune.executors.callable import ExecutorCallable
+
+class SearcherRoundsTestCase:
+    """ Mixin for unittest.TestCase, runs searchers in process on the results in a temporary root directory.
+
+    Test cases set metric and define objective, or override train if training has to do more than log the objective once.
+
+    Attributes:
+        - metric (str): Name of the metric logged by train.
+        - test_dir (str): Temporary directory removed after each test.
+        - root_dir (str): Root directory of the results, in test_dir.
+        - calls (list of dict): Configurations train was called with, in order.
+
+    """
+
+    metric = None
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root_dir = os.path.join(self.test_dir, 'slune_results')
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def objective(self, config):
+        """ Returns the value of the metric logged for a configuration. """
+
+        raise NotImplementedError('Test cases must define objective or override train')
+
+    def train(self, config, saver):
+        self.calls.append(config)
+        saver.log({self.metric: self.objective(config)})
+
+    def run_round(self, searcher):
+        """ Runs the configurations of the searcher that don't have results yet, returns the saver used. """
+
+        saver = get_csv_saver(root_dir=self.root_dir)
+        sbatchit(self.train, None, searcher, saver=saver, executor=ExecutorCallable(saver))
+        return saver
+
+    def run_rounds(self, make_searcher):
+        """ Runs rounds with a new searcher from make_searcher each time, until a searcher has nothing left to run.
+
+        Returns:
+            - rounds (list of list of dict): Configurations of each round that was run.
+
+        """
+
+        rounds = []
+        while True:
+            searcher = make_searcher()
+            self.run_round(searcher)
+            if len(searcher) == 0:
+                return rounds
+            rounds.append(list(searcher.grid))
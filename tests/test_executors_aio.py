@@ -0,0 +1,62 @@
+import unittest
+import os
+import shutil
+import tempfile
+from slune.executors.aio import ExecutorAsync
+
+SCRIPT = """import sys
+args = dict(a.lstrip('-').split('=') for a in sys.argv[1:])
+with open(args['out'], 'w') as f:
+    f.write(args['value'])
+sys.exit(int(args['value']) % 2)
+"""
+
+class TestExecutorAsync(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.script_path = os.path.join(self.test_dir, 'script.py')
+        with open(self.script_path, 'w') as f:
+            f.write(SCRIPT)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_runs_all_jobs(self):
+        # Arrange
+        executor = ExecutorAsync(max_workers=2)
+
+        # Act
+        for i in range(4):
+            executor.submit('template.sh', self.script_path, {'out': os.path.join(self.test_dir, f'out_{i}.txt'), 'value': i})
+        report = executor.wait()
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0, 1, 0, 1])
+        self.assertEqual(len(report.get_failed()), 2)
+        for i in range(4):
+            with open(os.path.join(self.test_dir, f'out_{i}.txt')) as f:
+                self.assertEqual(f.read(), str(i))
+
+    def test_no_limit(self):
+        executor = ExecutorAsync()
+        for i in range(3):
+            executor.submit('template.sh', self.script_path, {'out': os.path.join(self.test_dir, f'out_{i}.txt'), 'value': 2})
+        self.assertEqual(executor.wait().exit_codes, [0, 0, 0])
+
+    def test_invalid_max_workers(self):
+        with self.assertRaises(ValueError):
+            ExecutorAsync(max_workers=0)
+
+    def test_command_that_cant_start(self):
+        # A job whose command can't be started is reported as failed, and the other jobs still run
+        executor = ExecutorAsync(max_workers=2)
+        executor.submit(os.path.join(self.test_dir, 'missing.sh'))
+        executor.submit('template.sh', self.script_path, {'out': os.path.join(self.test_dir, 'a.txt'), 'value': 2})
+        report = executor.wait()
+        self.assertEqual(report.exit_codes, [127, 0])
+        self.assertIn('missing.sh', report.messages[0])
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, 'a.txt')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import os
+import shutil
+import tempfile
+from slune import sbatchit, get_csv_saver
+from slune.executors.callable import ExecutorCallable
+from slune.searchers.grid import SearcherGrid
+
+class TestExecutorCallable(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root_dir = os.path.join(self.test_dir, 'slune_results')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_runs_in_process(self):
+        # Arrange
+        calls = []
+        def train(config, saver):
+            calls.append(config)
+            saver.log({'score': config['alpha'] * 2})
+            saver.log({'score': config['alpha'] * 3})
+        saver = get_csv_saver(root_dir=self.root_dir)
+        executor = ExecutorCallable(saver)
+
+        # Act
+        report = sbatchit(train, None, SearcherGrid({'alpha': [1, 2, 3]}), executor=executor)
+
+        # Assert
+        self.assertEqual(calls, [{'alpha': 1}, {'alpha': 2}, {'alpha': 3}])
+        self.assertEqual(report.exit_codes, [0, 0, 0])
+        for alpha in [1, 2, 3]:
+            self.assertEqual(saver.exists({'alpha': alpha}), 1)
+        # Each configuration only saves its own results
+        params, values = saver.read({'alpha': 2}, 'score', select_by='max')
+        self.assertEqual(values, [6])
+        self.assertEqual(len(saver.logger.results), 2)
+
+    def test_failure(self):
+        # Arrange
+        def train(config, saver):
+            if config['alpha'] == 2:
+                raise RuntimeError('diverged')
+            saver.log({'score': 1})
+        saver = get_csv_saver(root_dir=self.root_dir)
+
+        # Act
+        report = sbatchit(train, None, SearcherGrid({'alpha': [1, 2, 3]}), executor=ExecutorCallable(saver))
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0, 1, 0])
+        self.assertIn('diverged', report.get_failed()[0][2])
+        self.assertEqual(saver.exists({'alpha': 2}), 0)
+        self.assertEqual(saver.exists({'alpha': 3}), 1)
+
+    def test_without_saver(self):
+        calls = []
+        executor = ExecutorCallable()
+        executor.submit(None, lambda config, saver: calls.append((config, saver)), {'a': 1})
+        self.assertEqual(calls, [({'a': 1}, None)])
+        self.assertEqual(executor.wait().exit_codes, [0])
+
+    def test_not_callable(self):
+        with self.assertRaises(TypeError):
+            ExecutorCallable().submit(None, 'script.py', {'a': 1})
+
+    def test_sbatchit_needs_executor(self):
+        with self.assertRaises(ValueError):
+            sbatchit(lambda config, saver: None, None, SearcherGrid({'a': [1]}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from slune.executors.local import ExecutorLocal, get_local_command
+
+SCRIPT = """import sys
+args = dict(a.lstrip('-').split('=') for a in sys.argv[1:])
+with open(args['out'], 'w') as f:
+    f.write(args['value'])
+sys.exit(int(args['value']) % 2)
+"""
+
+class TestGetLocalCommand(unittest.TestCase):
+    def test_script(self):
+        command = get_local_command('template.sh', 'script.py', {'arg1': 1}, interpreter='python')
+        self.assertEqual(command, ['python', 'script.py', '--arg1=1'])
+
+    def test_no_script(self):
+        command = get_local_command('run.sh', args={'arg1': 1})
+        self.assertEqual(command, ['run.sh', '--arg1=1'])
+
+class TestExecutorLocal(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.script_path = os.path.join(self.test_dir, 'script.py')
+        with open(self.script_path, 'w') as f:
+            f.write(SCRIPT)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_runs_all_jobs(self):
+        # Arrange
+        executor = ExecutorLocal(max_workers=2)
+
+        # Act
+        for i in range(4):
+            executor.submit('template.sh', self.script_path, {'out': os.path.join(self.test_dir, f'out_{i}.txt'), 'value': i})
+        report = executor.wait()
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0, 1, 0, 1])
+        self.assertEqual(len(report.get_failed()), 2)
+        for i in range(4):
+            with open(os.path.join(self.test_dir, f'out_{i}.txt')) as f:
+                self.assertEqual(f.read(), str(i))
+
+    def test_reuse_after_wait(self):
+        executor = ExecutorLocal(max_workers=1)
+        executor.submit('template.sh', self.script_path, {'out': os.path.join(self.test_dir, 'a.txt'), 'value': 2})
+        self.assertEqual(executor.wait().exit_codes, [0])
+        executor.submit('template.sh', self.script_path, {'out': os.path.join(self.test_dir, 'b.txt'), 'value': 3})
+        self.assertEqual(executor.wait().exit_codes, [1])
+
+    def test_command_that_cant_start(self):
+        # A job whose command can't be started is reported as failed, and the other jobs still run
+        executor = ExecutorLocal(max_workers=2)
+        executor.submit(os.path.join(self.test_dir, 'missing.sh'))
+        executor.submit('template.sh', self.script_path, {'out': os.path.join(self.test_dir, 'a.txt'), 'value': 2})
+        report = executor.wait()
+        self.assertEqual(report.exit_codes, [127, 0])
+        self.assertIn('missing.sh', report.messages[0])
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, 'a.txt')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from slune.executors.report import SubmissionReport
+
+class TestSubmissionReport(unittest.TestCase):
+    def test_empty(self):
+        report = SubmissionReport()
+        self.assertEqual(len(report), 0)
+        self.assertEqual(report.get_elapsed(), 0.0)
+        self.assertEqual(report.get_throughput(), 0.0)
+
+    def test_add(self):
+        # Arrange
+        report = SubmissionReport()
+
+        # Act
+        report.add({'a': 1}, 0, 'Submitted batch job 1')
+        report.add({'a': 2}, 1, 'error')
+        report.finish()
+
+        # Assert
+        self.assertEqual(len(report), 2)
+        self.assertEqual(report.get_succeeded(), [{'a': 1}])
+        self.assertEqual(report.get_failed(), [({'a': 2}, 1, 'error')])
+        self.assertGreaterEqual(report.get_elapsed(), 0.0)
+        self.assertEqual(report.get_elapsed(), report.end_time - report.start_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
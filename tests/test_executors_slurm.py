@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch
+import subprocess
+import threading
+import time
+import os
+from slune.executors.slurm import ExecutorSlurm
+
+def completed(returncode, stdout='', stderr=''):
+    return subprocess.CompletedProcess([], returncode, stdout=stdout, stderr=stderr)
+
+class TestExecutorSlurm(unittest.TestCase):
+    @patch('subprocess.run')
+    def test_submit(self, mock_run):
+        # Arrange
+        executor = ExecutorSlurm()
+        sh_path = os.path.join('path','to','bash','script')
+        script_path = os.path.join('path','to','script')
+        mock_run.return_value = completed(0, stdout='Submitted batch job 1\n')
+
+        # Act
+        executor.submit(sh_path, script_path, {'arg1': 1, 'arg2': 'two'})
+        report = executor.wait()
+
+        # Assert
+        mock_run.assert_called_once_with(['sbatch', sh_path, script_path, '--arg1=1', '--arg2=two'], capture_output=True, text=True)
+        self.assertEqual(report.exit_codes, [0])
+        self.assertEqual(report.messages, ['Submitted batch job 1'])
+
+    @patch('subprocess.run')
+    def test_failed_submission(self, mock_run):
+        # Arrange
+        executor = ExecutorSlurm()
+        mock_run.side_effect = [completed(0), completed(1, stderr='QOSMaxSubmitJobPerUserLimit\n'), completed(0)]
+
+        # Act
+        for i in range(3):
+            executor.submit('template.sh', args={'arg': i})
+        report = executor.wait()
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0, 1, 0])
+        self.assertEqual(report.get_succeeded(), [{'arg': 0}, {'arg': 2}])
+        self.assertEqual(report.get_failed(), [({'arg': 1}, 1, 'QOSMaxSubmitJobPerUserLimit')])
+        self.assertEqual(len(executor.wait()), 0)
+
+    @patch('subprocess.run')
+    def test_sbatch_missing(self, mock_run):
+        executor = ExecutorSlurm()
+        mock_run.side_effect = FileNotFoundError('sbatch')
+        executor.submit('template.sh')
+        self.assertEqual(executor.wait().exit_codes, [127])
+
+    @patch('subprocess.run')
+    def test_concurrent(self, mock_run):
+        # Arrange
+        executor = ExecutorSlurm(max_workers=4)
+        mock_run.side_effect = lambda command, **kwargs: completed(0 if command[-1] != '--arg=3' else 1)
+
+        # Act
+        for i in range(20):
+            executor.submit('template.sh', args={'arg': i})
+        report = executor.wait()
+
+        # Assert
+        self.assertEqual(mock_run.call_count, 20)
+        self.assertEqual(report.configs, [{'arg': i} for i in range(20)])
+        self.assertEqual(report.exit_codes, [0, 0, 0, 1] + [0] * 16)
+        self.assertGreater(report.get_throughput(), 0)
+
+    def test_handed_off_in_order(self):
+        # Arrange, sbatch for the second job doesn't return until released
+        executor = ExecutorSlurm(max_workers=4)
+        release = threading.Event()
+        def run(command, **kwargs):
+            if command[-1] == '--arg=1':
+                release.wait(10)
+            return completed(0)
+
+        # Act
+        with patch('subprocess.run', side_effect=run):
+            for i in range(3):
+                executor.submit('template.sh', args={'arg': i})
+            while not (executor._pending[0][1].done() and executor._pending[2][1].done()):
+                time.sleep(0.01)
+            blocked = executor.get_handed_off()
+            release.set()
+            report = executor.wait()
+
+        # Assert, only jobs before the one still running count
+        self.assertEqual(blocked, 1)
+        self.assertEqual(len(report), 3)
+        self.assertEqual(executor.get_handed_off(), 0)
+
+    def test_invalid_max_workers(self):
+        with self.assertRaises(ValueError):
+            ExecutorSlurm(max_workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+from unittest.mock import patch
+import subprocess
+from slune.executors.window import ExecutorSlurmWindow
+
+def completed(returncode, stdout='', stderr=''):
+    return subprocess.CompletedProcess([], returncode, stdout=stdout, stderr=stderr)
+
+class FakeCluster:
+    """ Pretends to be sbatch and squeue, each squeue call finishes the oldest queued job. """
+
+    def __init__(self, limit=None, rejections=0):
+        self.limit = limit
+        self.rejections = rejections
+        self.queue = []
+        self.next_id = 100
+        self.squeue_calls = 0
+        self.sbatch_calls = []
+
+    def __call__(self, command, **kwargs):
+        if command[0] == 'sbatch':
+            self.sbatch_calls.append(command)
+            if self.rejections > 0:
+                self.rejections -= 1
+                return completed(1, stderr='sbatch: error: QOSMaxSubmitJobPerUserLimit')
+            if (self.limit is not None) and (len(self.queue) >= self.limit):
+                return completed(1, stderr='sbatch: error: QOSMaxSubmitJobPerUserLimit')
+            self.queue.append(str(self.next_id))
+            self.next_id += 1
+            return completed(0, stdout=self.queue[-1] + '\n')
+        elif command[0] == 'squeue':
+            self.squeue_calls += 1
+            if self.queue:
+                self.queue.pop(0)
+            return completed(0, stdout=''.join(job_id + '\n' for job_id in self.queue))
+        raise ValueError(command)
+
+class TestExecutorSlurmWindow(unittest.TestCase):
+    @patch('time.sleep')
+    @patch('subprocess.run')
+    def test_window(self, mock_run, mock_sleep):
+        # Arrange
+        cluster = FakeCluster()
+        mock_run.side_effect = cluster
+        executor = ExecutorSlurmWindow(max_queued=3, user='me')
+
+        # Act
+        for i in range(10):
+            executor.submit('template.sh', 'script.py', {'arg': i})
+            # Assert
+            self.assertLessEqual(len(cluster.queue), 3)
+        report = executor.wait()
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0] * 10)
+        self.assertEqual(cluster.sbatch_calls[0], ['sbatch', '--parsable', 'template.sh', 'script.py', '--arg=0'])
+        # Only check the queue once the window is full
+        self.assertEqual(cluster.squeue_calls, 7)
+
+    @patch('time.sleep')
+    @patch('subprocess.run')
+    def test_retry_with_backoff(self, mock_run, mock_sleep):
+        # Arrange
+        cluster = FakeCluster(rejections=3)
+        mock_run.side_effect = cluster
+        executor = ExecutorSlurmWindow(max_queued=10, backoff=2, max_backoff=5, user='me')
+
+        # Act
+        executor.submit('template.sh', args={'arg': 0})
+        report = executor.wait()
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0])
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [2, 4, 5])
+
+    @patch('time.sleep')
+    @patch('subprocess.run')
+    def test_gives_up(self, mock_run, mock_sleep):
+        # Arrange
+        cluster = FakeCluster(rejections=10)
+        mock_run.side_effect = cluster
+        executor = ExecutorSlurmWindow(max_retries=2, user='me')
+
+        # Act
+        executor.submit('template.sh', args={'arg': 0})
+        executor.submit('template.sh', args={'arg': 1})
+        report = executor.wait()
+
+        # Assert
+        self.assertEqual(len(cluster.sbatch_calls), 6)
+        self.assertEqual(report.get_failed(), [({'arg': 0}, 1, 'sbatch: error: QOSMaxSubmitJobPerUserLimit'),
+                                               ({'arg': 1}, 1, 'sbatch: error: QOSMaxSubmitJobPerUserLimit')])
+
+    @patch('time.sleep')
+    @patch('subprocess.run')
+    def test_squeue_failure_keeps_window(self, mock_run, mock_sleep):
+        # Arrange
+        responses = [completed(0, stdout='1'), completed(1, stderr='squeue: error'), completed(0, stdout=''), completed(0, stdout='2')]
+        mock_run.side_effect = responses
+        executor = ExecutorSlurmWindow(max_queued=1, user='me')
+
+        # Act
+        executor.submit('template.sh', args={'arg': 0})
+        executor.submit('template.sh', args={'arg': 1})
+
+        # Assert
+        self.assertEqual(mock_sleep.call_count, 1)
+        self.assertEqual(executor.queued, {'2'})
+
+    @patch('time.sleep')
+    @patch('subprocess.run')
+    def test_squeue_keeps_failing(self, mock_run, mock_sleep):
+        # Arrange
+        def run(command, **kwargs):
+            if command[0] == 'squeue':
+                return completed(1, stderr='squeue: error: slurm_load_jobs error')
+            return completed(0, stdout='1')
+        mock_run.side_effect = run
+        executor = ExecutorSlurmWindow(max_queued=1, max_retries=0, max_poll_failures=3, user='me')
+
+        # Act
+        executor.submit('template.sh', args={'arg': 0})
+        executor.submit('template.sh', args={'arg': 1})
+        report = executor.wait()
+
+        # Assert, we give up on the job instead of waiting forever
+        self.assertEqual(report.exit_codes, [0, 1])
+        self.assertIn('squeue failed 3 times', report.messages[1])
+        self.assertEqual(mock_sleep.call_count, 2)
+        # squeue's default states are used, so eg. completing or suspended jobs are still counted
+        squeue = [c.args[0] for c in mock_run.call_args_list if c.args[0][0] == 'squeue'][0]
+        self.assertEqual(squeue, ['squeue', '-h', '-u', 'me', '-o', '%A'])
+
+    @patch('time.sleep')
+    @patch('time.monotonic')
+    @patch('subprocess.run')
+    def test_max_wait(self, mock_run, mock_monotonic, mock_sleep):
+        # Arrange, the first job never leaves the queue
+        mock_run.side_effect = lambda command, **kwargs: completed(0, stdout='1\n')
+        mock_monotonic.side_effect = [0.0, 30.0, 61.0]
+        executor = ExecutorSlurmWindow(max_queued=1, max_retries=0, poll_interval=30, max_wait=60, user='me')
+
+        # Act
+        executor.submit('template.sh', args={'arg': 0})
+        executor.submit('template.sh', args={'arg': 1})
+        report = executor.wait()
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0, 1])
+        self.assertEqual(report.messages[1], 'No space in the window after waiting 60 seconds')
+
+    @patch('time.sleep')
+    @patch('subprocess.run')
+    def test_permanent_error_not_retried(self, mock_run, mock_sleep):
+        # Arrange
+        mock_run.return_value = completed(1, stderr='sbatch: error: Batch job submission failed: Invalid account or account/partition combination specified')
+        executor = ExecutorSlurmWindow(max_retries=5, user='me')
+
+        # Act
+        executor.submit('template.sh', args={'arg': 0})
+        report = executor.wait()
+
+        # Assert
+        self.assertEqual(mock_run.call_count, 1)
+        mock_sleep.assert_not_called()
+        self.assertEqual(report.exit_codes, [1])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            ExecutorSlurmWindow(max_queued=0, user='me')
+        with self.assertRaises(ValueError):
+            ExecutorSlurmWindow(max_retries=-1, user='me')
+        with self.assertRaises(ValueError):
+            ExecutorSlurmWindow(max_poll_failures=0, user='me')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -50,6 +50,12 @@ class TestLoggerDefaultWrite(unittest.TestCase):
         self.assertEqual(row['metric2'], 99)
         self.assertEqual(row['time_stamp'].round('s'), rounded_timestamp)
 
+    def test_reset(self):
+        self.logger.log({'metric1': 42})
+        self.logger.reset()
+        self.assertTrue(self.logger.results.empty)
+        self.assertEqual(self.logger.num_resets, 1)
+
 
 class TestLoggerDefaultRead(unittest.TestCase):
     def setUp(self):
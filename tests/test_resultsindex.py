@@ -0,0 +1,158 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+import pandas as pd
+from slune.resultsindex import ResultsIndex, main
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+from slune.utils import find_directory_path, get_numeric_equiv
+
+class TestResultsIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root_dir = os.path.join(self.test_dir, 'results')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def make_file(self, *parts):
+        path = os.path.join(self.root_dir, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write('a\n1\n')
+        return path
+
+    def test_rebuilds_when_missing(self):
+        a = self.make_file('alpha=1', 'beta=2', 'results_0.csv')
+        b = self.make_file('alpha=1', 'results_0.csv')
+        self.make_file('alpha=1', 'notes.txt')
+        index = ResultsIndex(self.root_dir)
+        self.assertEqual(sorted(index.get_files()), sorted([a, b]))
+        self.assertTrue(os.path.exists(os.path.join(self.root_dir, '.slune_index')))
+        self.assertEqual(index.get_files('.parquet'), [])
+
+    def test_add_is_appended_and_seen_by_other_readers(self):
+        index = ResultsIndex(self.root_dir)
+        other = ResultsIndex(self.root_dir)
+        self.assertEqual(other.get_files(), [])
+        a = self.make_file('alpha=1', 'results_0.csv')
+        index.add(a)
+        index.add(a)
+        # Only the new line is read by the other reader
+        self.assertEqual(other.get_files(), [a])
+        b = self.make_file('alpha=2', 'results_0.csv')
+        other.add(b)
+        self.assertEqual(index.get_files(), [a, b])
+        with open(index.shard_path, 'r') as f:
+            self.assertEqual(len(f.readlines()), 2)
+        with self.assertRaises(ValueError):
+            index.add(os.path.join(self.test_dir, 'results_0.csv'))
+
+    def test_each_writer_has_its_own_shard(self):
+        # Writers on different nodes never append to the same file
+        index, other = ResultsIndex(self.root_dir), ResultsIndex(self.root_dir)
+        other.shard_path = index.path + '.othernode.1'
+        self.assertEqual(index.get_files(), [])
+        a, b = self.make_file('alpha=1', 'results_0.csv'), self.make_file('alpha=2', 'results_0.csv')
+        index.add(a)
+        other.add(b)
+        for shard, path in [(index.shard_path, a), (other.shard_path, b)]:
+            with open(shard, 'r') as f:
+                self.assertEqual(f.readlines(), [json.dumps(os.path.relpath(path, self.root_dir).split(os.path.sep)) + '\n'])
+        self.assertEqual(sorted(index.get_files()), [a, b])
+        self.assertEqual(sorted(ResultsIndex(self.root_dir).get_files()), [a, b])
+        # Rebuilding folds the shards into the index
+        self.assertEqual(index.rebuild(), 2)
+        self.assertEqual(sorted(os.listdir(self.root_dir)), ['.slune_index', 'alpha=1', 'alpha=2'])
+        self.assertEqual(sorted(other.get_files()), [a, b])
+
+    def test_partial_line_is_ignored(self):
+        index = ResultsIndex(self.root_dir)
+        a = self.make_file('alpha=1', 'results_0.csv')
+        index.add(a)
+        with open(index.path, 'a') as f:
+            f.write('["alpha=2", "resu')
+        self.assertEqual(ResultsIndex(self.root_dir).get_files(), [a])
+
+    def test_missing_index_is_not_replaced(self):
+        a = self.make_file('alpha=1', 'results_0.csv')
+        index = ResultsIndex(self.root_dir)
+        other = ResultsIndex(self.root_dir)
+        walk = other.walk
+        def racing_walk():
+            tmp_path = walk()
+            # Another job builds the index and adds a file to it while we walk the tree
+            index.add(b)
+            return tmp_path
+        b = self.make_file('alpha=2', 'results_0.csv')
+        other.walk = racing_walk
+        self.assertEqual(sorted(other.get_files()), sorted([a, b]))
+        self.assertEqual([f for f in os.listdir(self.root_dir) if f.endswith('.tmp')], [])
+
+    def test_rebuild_after_changes_by_hand(self):
+        index = ResultsIndex(self.root_dir)
+        a = self.make_file('alpha=1', 'results_0.csv')
+        index.add(a)
+        b = self.make_file('alpha=2', 'results_0.csv')
+        os.remove(a)
+        self.assertEqual(index.get_files(), [a])
+        self.assertEqual(main([f'--slune_results={self.root_dir}']), 0)
+        self.assertEqual(index.get_files(), [b])
+
+    def test_tree_matches_file_system(self):
+        for parts in [('alpha=1', 'beta=2', 'results_0.csv'), ('alpha=1', 'gamma=0.10', 'results_0.csv'), ('delta=x', 'results_0.csv')]:
+            self.make_file(*parts)
+        tree = ResultsIndex(self.root_dir).get_tree()
+        self.assertEqual(sorted(tree[self.root_dir]), ['alpha=1', 'delta=x'])
+        for strings in [['alpha=', 'beta='], ['beta=', 'alpha=', 'gamma='], ['gamma=', 'alpha='], ['zeta=']]:
+            self.assertEqual(find_directory_path(strings, self.root_dir, tree=tree), find_directory_path(strings, self.root_dir))
+        for path in [os.path.join('alpha=1.0', 'gamma=0.1'), os.path.join('alpha=1', 'beta=2.0'), 'delta=x', 'alpha=3']:
+            self.assertEqual(get_numeric_equiv(path, self.root_dir, tree=tree), get_numeric_equiv(path, self.root_dir))
+        # Files added later are added to the same tree
+        index = ResultsIndex(self.root_dir)
+        index.get_tree()
+        ResultsIndex(self.root_dir).add(self.make_file('alpha=1', 'beta=3', 'results_0.csv'))
+        tree = index.get_tree()
+        self.assertEqual(sorted(tree[os.path.join(self.root_dir, 'alpha=1')]), ['beta=2', 'beta=3', 'gamma=0.10'])
+
+class TestSaverCsvIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_saver_uses_index(self):
+        for params, loss in [({'alpha': 1, 'beta': 2}, 0.5), ({'alpha': 1.0, 'beta': 2}, 0.7), ({'beta': 3, 'alpha': 2}, 0.9)]:
+            saver = SaverCsv(LoggerDefault(), params=params, root_dir=self.test_dir, index=True)
+            saver.save_collated_from_results(pd.DataFrame({'loss': [loss]}))
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, index=True)
+        files = saver.index.get_files()
+        self.assertEqual(len(files), 3)
+        # Numerically equal values share a directory, and files are numbered from the index
+        self.assertEqual(os.path.basename(files[1]), 'results_1.csv')
+        self.assertEqual(os.path.dirname(files[0]), os.path.dirname(files[1]))
+        # The directory order of an existing path is reused
+        self.assertEqual(os.path.relpath(files[2], self.test_dir), os.path.join('alpha=2', 'beta=3', 'results_0.csv'))
+        self.assertEqual(saver.exists({'alpha': 1, 'beta': 2}), 2)
+        self.assertEqual(saver.exists_snapshot()({'alpha': 1}), 2)
+        params, values = saver.read({'alpha': 1}, 'loss')
+        self.assertEqual(params, [['alpha=1', 'beta=2']])
+        self.assertAlmostEqual(values[0], 0.6)
+        # Files added behind the index's back are not seen until it is rebuilt
+        os.makedirs(os.path.join(self.test_dir, 'alpha=5'))
+        pd.DataFrame({'loss': [0.1]}).to_csv(os.path.join(self.test_dir, 'alpha=5', 'results_0.csv'), index=False)
+        self.assertEqual(saver.exists({'alpha': 5}), 0)
+        saver.index.rebuild()
+        self.assertEqual(saver.exists({'alpha': 5}), 1)
+        # The same answers as walking the tree
+        walker = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        for params in [{}, {'alpha': 1}, {'beta': 3}, {'alpha': 5}]:
+            self.assertEqual(saver.exists(params), walker.exists(params))
+        self.assertEqual(sorted(saver.read({}, 'loss', collate_by='all')[1]), sorted(walker.read({}, 'loss', collate_by='all')[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
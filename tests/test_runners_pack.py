@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import sys
+import tempfile
+from slune import sbatchit, get_pack_size
+from slune.executors.local import ExecutorLocal
+from slune.runners.pack import run_pack, main, get_num_workers, run_in_process
+from slune.searchers.grid import SearcherGrid
+from slune.utils import write_manifest
+
+SCRIPT = """import sys
+args = dict(a.lstrip('-').split('=') for a in sys.argv[1:])
+with open(args['out'] + '_' + args['value'] + '.txt', 'w') as f:
+    f.write(args['value'])
+sys.exit(int(args['value']) == 3)
+"""
+
+class TestRunPack(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.script_path = os.path.join(self.test_dir, 'script.py')
+        with open(self.script_path, 'w') as f:
+            f.write(SCRIPT)
+        self.out = os.path.join(self.test_dir, 'out')
+        self.manifest_path = os.path.join(self.test_dir, 'manifest.jsonl')
+        write_manifest([{'out': self.out, 'value': i} for i in range(6)], self.manifest_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_run_pack(self):
+        # Act
+        report = run_pack(self.script_path, self.manifest_path, 2, 5, workers=2)
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0, 1, 0])
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['manifest.jsonl', 'manifest.jsonl.idx', 'out_2.txt', 'out_3.txt', 'out_4.txt', 'script.py'])
+
+    def test_main(self):
+        argv = ['--slune_script=' + self.script_path, '--slune_manifest=' + self.manifest_path, '--slune_start=0', '--slune_stop=2', '--slune_workers=1']
+        self.assertEqual(main(argv), 0)
+        argv = ['--slune_script=' + self.script_path, '--slune_manifest=' + self.manifest_path, '--slune_start=3', '--slune_stop=4']
+        self.assertEqual(main(argv), 1)
+
+    def test_main_path_with_equals(self):
+        # Paths through results directories contain '='
+        run_dir = os.path.join(self.test_dir, 'alpha=0.1')
+        os.makedirs(run_dir)
+        manifest_path = os.path.join(run_dir, 'manifest.jsonl')
+        write_manifest([{'out': self.out, 'value': i} for i in range(2)], manifest_path)
+        argv = ['--slune_script=' + self.script_path, '--slune_manifest=' + manifest_path, '--slune_start=0', '--slune_stop=2', '--slune_in_process=False']
+        self.assertEqual(main(argv), 0)
+        self.assertTrue(os.path.exists(self.out + '_1.txt'))
+
+    def test_run_pack_in_process(self):
+        argv = list(sys.argv)
+        report = run_pack(self.script_path, self.manifest_path, 2, 5, in_process=True)
+        self.assertEqual(report.exit_codes, [0, 1, 0])
+        self.assertEqual(report.configs[0], {'out': self.out, 'value': '2'})
+        self.assertTrue(all(os.path.exists(self.out + f'_{value}.txt') for value in [2, 3, 4]))
+        self.assertEqual(sys.argv, argv)
+        argv = ['--slune_script=' + self.script_path, '--slune_manifest=' + self.manifest_path, '--slune_start=0', '--slune_stop=2', '--slune_in_process=True']
+        self.assertEqual(main(argv), 0)
+        with self.assertRaises(ValueError):
+            run_pack(self.script_path, self.manifest_path, 0, 2, workers=2, in_process=True)
+
+    def test_run_in_process_exception(self):
+        path = os.path.join(self.test_dir, 'bad.py')
+        with open(path, 'w') as f:
+            f.write("raise RuntimeError('bad')\n")
+        with patch('traceback.print_exc'):
+            self.assertEqual(run_in_process(path, []), 1)
+
+    def test_num_workers(self):
+        with patch.dict(os.environ, {'SLURM_CPUS_PER_TASK': '7'}):
+            self.assertEqual(get_num_workers(), 7)
+
+class TestSbatchitPack(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.script_path = os.path.join(self.test_dir, 'script.py')
+        with open(self.script_path, 'w') as f:
+            f.write(SCRIPT)
+        self.out = os.path.join(self.test_dir, 'out')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_pack_locally(self):
+        # Arrange
+        searcher = SearcherGrid({'value': [0, 1, 2, 4, 5]})
+        manifest_path = os.path.join(self.test_dir, 'manifest.jsonl')
+
+        # Act
+        report = sbatchit(self.script_path, 'template.sh', searcher, cargs={'out': self.out}, manifest_path=manifest_path,
+                          executor=ExecutorLocal(max_workers=2), pack_size=2)
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0, 0, 0])
+        self.assertEqual([c['slune_start'] for c in report.configs], [0, 2, 4])
+        for value in [0, 1, 2, 4, 5]:
+            self.assertTrue(os.path.exists(self.out + f'_{value}.txt'))
+
+    def test_pack_in_process(self):
+        manifest_path = os.path.join(self.test_dir, 'manifest.jsonl')
+        report = sbatchit(self.script_path, 'template.sh', SearcherGrid({'value': [0, 1, 2]}), cargs={'out': self.out}, manifest_path=manifest_path,
+                          executor=ExecutorLocal(max_workers=2), pack_size=2, pack_in_process=True)
+        self.assertEqual(report.exit_codes, [0, 0])
+        self.assertTrue(report.configs[0]['slune_in_process'])
+        for value in [0, 1, 2]:
+            self.assertTrue(os.path.exists(self.out + f'_{value}.txt'))
+
+    def test_pack_with_array(self):
+        with self.assertRaises(ValueError):
+            sbatchit(self.script_path, 'template.sh', SearcherGrid({'value': [0]}), array=True, pack_size=2)
+
+    def test_target_walltime_needs_config_walltime(self):
+        with self.assertRaises(ValueError):
+            sbatchit(self.script_path, 'template.sh', SearcherGrid({'value': [0]}), target_walltime=3600)
+
+class TestGetPackSize(unittest.TestCase):
+    def test_pack_size(self):
+        self.assertEqual(get_pack_size(3600, 30), 120)
+        self.assertEqual(get_pack_size(3600, 30, workers=4), 480)
+        self.assertEqual(get_pack_size(10, 30), 1)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            get_pack_size(0, 30)
+        with self.assertRaises(ValueError):
+            get_pack_size(3600, 30, workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import os
+import shutil
+import tempfile
+from slune import sbatchit, get_csv_saver
+from slune.executors.local import ExecutorLocal
+from slune.runners.pilot import run_pilot, main, get_saver
+from slune.searchers.grid import SearcherGrid
+from slune.workqueue import WorkQueue
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+
+SCRIPT = """import sys
+from slune import lsargs, get_csv_saver
+from slune.utils import strings_to_dict
+_, args = lsargs()
+args = strings_to_dict(args)
+root_dir = args.pop('root_dir')
+saver = get_csv_saver(params=args, root_dir=root_dir)
+saver.log({'score': args['value']})
+saver.save_collated()
+sys.exit(args['value'] == 3)
+"""
+
+class TestRunPilot(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.script_path = os.path.join(self.test_dir, 'script.py')
+        with open(self.script_path, 'w') as f:
+            f.write(SCRIPT)
+        self.root_dir = os.path.join(self.test_dir, 'slune_results')
+        self.queue_dir = os.path.join(self.root_dir, '.slune_queue')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_run_pilot(self):
+        # Arrange
+        queue = WorkQueue(self.queue_dir)
+        queue.put({'args': {'root_dir': self.root_dir, 'value': i}, 'params': {'value': i}, 'runs': 1} for i in range(5))
+
+        # Act
+        counts = run_pilot(self.script_path, self.queue_dir, root_dir=self.root_dir, workers=2)
+
+        # Assert
+        self.assertEqual(counts, {'run': 5, 'skipped': 0, 'failed': 1})
+        self.assertEqual(queue.count('done'), 4)
+        self.assertEqual(queue.count('failed'), 1)
+        saver = get_csv_saver(root_dir=self.root_dir)
+        self.assertEqual(saver.exists({'value': 2}), 1)
+
+    def test_skips_existing(self):
+        # Arrange
+        queue = WorkQueue(self.queue_dir)
+        queue.put({'args': {'root_dir': self.root_dir, 'value': 1}, 'params': {'value': 1}, 'runs': 1} for _ in range(3))
+
+        # Act
+        argv = ['--slune_script=' + self.script_path, '--slune_queue=' + self.queue_dir, '--slune_results=' + self.root_dir, '--slune_ext=.csv']
+        exit_code = main(argv)
+
+        # Assert
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(queue.count('done'), 3)
+        self.assertEqual(get_csv_saver(root_dir=self.root_dir).exists({'value': 1}), 1)
+
+    def test_main_paths_with_equals(self):
+        # Arrange, paths through results directories contain '='
+        run_dir = os.path.join(self.test_dir, 'sweep=1')
+        os.makedirs(run_dir)
+        script_path = os.path.join(run_dir, 'script.py')
+        shutil.copy(self.script_path, script_path)
+        queue_dir = os.path.join(run_dir, '.slune_queue')
+        queue = WorkQueue(queue_dir)
+        queue.put([{'args': {'root_dir': self.root_dir, 'value': 1}, 'params': {'value': 1}, 'runs': 1}])
+
+        # Act
+        argv = ['--slune_script=' + script_path, '--slune_queue=' + queue_dir, '--slune_results=' + self.root_dir, '--slune_workers=1']
+        exit_code = main(argv)
+
+        # Assert
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(queue.count('done'), 1)
+        self.assertEqual(get_csv_saver(root_dir=self.root_dir).exists({'value': 1}), 1)
+
+    def test_skips_existing_flat_layout(self):
+        # Arrange
+        saver = SaverCsv(LoggerDefault(), params={'value': 1}, root_dir=self.root_dir, layout='flat')
+        saver.log({'score': 1})
+        saver.save_collated()
+        queue = WorkQueue(self.queue_dir)
+        queue.put([{'args': {'root_dir': self.root_dir, 'value': 1}, 'params': {'value': 1}, 'runs': 1}])
+
+        # Act
+        argv = ['--slune_script=' + self.script_path, '--slune_queue=' + self.queue_dir, '--slune_results=' + self.root_dir, '--slune_layout=flat']
+        exit_code = main(argv)
+
+        # Assert
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(queue.count('done'), 1)
+        # The script wasn't run, it would have saved its results in the nested layout
+        self.assertFalse(os.path.exists(os.path.join(self.root_dir, 'value=1')))
+
+    def test_get_saver(self):
+        self.assertIsInstance(get_saver(self.root_dir, ext='.csv', layout='flat'), SaverCsv)
+        self.assertEqual(get_saver(self.root_dir, ext='.parquet').ext, '.parquet')
+        with self.assertRaises(ValueError):
+            get_saver(self.root_dir, ext='.txt')
+
+    def test_sbatchit_pilots_locally(self):
+        # Arrange
+        searcher = SearcherGrid({'value': [0, 1, 2, 4]}, runs=1)
+        saver = get_csv_saver(root_dir=self.root_dir)
+
+        # Act
+        report = sbatchit(self.script_path, 'template.sh', searcher, cargs={'root_dir': self.root_dir}, saver=saver,
+                          executor=ExecutorLocal(max_workers=2), pilots=2)
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0, 0])
+        for value in [0, 1, 2, 4]:
+            self.assertEqual(saver.exists({'value': value}), 1)
+        self.assertEqual(WorkQueue(self.queue_dir).count('done'), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,11 @@
 import unittest
 import os
+import json
+import shutil
+import tempfile
 import pandas as pd
 from slune.savers.csv import SaverCsv
+from slune.savers.ext import SaverExt
 from slune.loggers.default import LoggerDefault
 import numpy as np
 
@@ -168,6 +172,18 @@ class TestSaverCsvGetPath(unittest.TestCase):
         path = saver.get_path(["--folder3=0.3", "--folder2=0.2", "--folder1=0.1"]) 
         self.assertEqual(path, os.path.join(*[self.test_dir, '--folder1=0.1','--folder2=0.2','--folder3=0.3','results_1.csv']))
 
+    def test_results_numbered_past_nine(self):
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        dir_path = os.path.join(self.test_dir, '--folder1=0.1', '--folder2=0.2', '--folder3=0.3')
+        # "results_10.csv" sorts before "results_9.csv" by name, the next file should still be number 11
+        for n in [9, 10]:
+            with open(os.path.join(dir_path, f'results_{n}.csv'), 'w') as f:
+                f.write('')
+        path = saver.get_path(["--folder3=0.3", "--folder2=0.2", "--folder1=0.1"])
+        self.assertEqual(path, os.path.join(dir_path, 'results_11.csv'))
+        for n in [9, 10]:
+            os.remove(os.path.join(dir_path, f'results_{n}.csv'))
+
 class TestSaverCsvSaveCollatedFromResults(unittest.TestCase):
     def setUp(self):
         # Check if the test directory already exists, if it does remove it and all its contents
@@ -270,6 +286,82 @@ class TestSaverCsvSaveCollatedFromResults(unittest.TestCase):
         # Remove the results file
         os.remove(os.path.join(self.test_dir, 'folder1=0.1', 'folder2=0.2', 'folder3=0.3', 'results_1.csv'))
 
+    def test_save_sets_current_path(self):
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        saver.current_params = {'folder3':0.3, 'folder2':0.2, 'folder1':0.1}
+        saver.save_collated_from_results(pd.DataFrame({'a': [1]}))
+        path = os.path.join(self.test_dir, 'folder1=0.1', 'folder2=0.2', 'folder3=0.3', 'results_1.csv')
+        self.assertEqual(saver.current_path, path)
+        self.assertEqual(pd.read_csv(path)['a'].tolist(), [1])
+        # Remove the results file
+        os.remove(path)
+
+    def test_appends_without_rewriting(self):
+        saver = SaverCsv(LoggerDefault(), params={'folder3':0.3, 'folder2':0.2, 'folder1':0.1}, root_dir=self.test_dir)
+        path = os.path.join(self.test_dir, 'folder1=0.1', 'folder2=0.2', 'folder3=0.3', 'results_1.csv')
+        saver.save_collated_from_results(pd.DataFrame({'a': [1,2], 'b': [3,4]}))
+        with open(path, 'r') as f:
+            before = f.read()
+        inode = os.stat(path).st_ino
+        # Columns in a different order, and a missing column, are matched to the header
+        saver.save_collated_from_results(pd.DataFrame({'b': [5], 'a': [6]}))
+        saver.save_collated_from_results(pd.DataFrame({'a': [7]}))
+        with open(path, 'r') as f:
+            after = f.read()
+        # Rows were appended to the same file, the old rows were left as they were
+        self.assertEqual(os.stat(path).st_ino, inode)
+        self.assertTrue(after.startswith(before))
+        self.assertEqual(after, 'a,b\n1,3\n2,4\n6,5\n7,\n')
+        os.remove(path)
+
+    def test_drops_partial_row(self):
+        saver = SaverCsv(LoggerDefault(), params={'folder3':0.3, 'folder2':0.2, 'folder1':0.1}, root_dir=self.test_dir)
+        path = os.path.join(self.test_dir, 'folder1=0.1', 'folder2=0.2', 'folder3=0.3', 'results_1.csv')
+        # A row torn by a crash is dropped before appending
+        with open(path, 'w') as f:
+            f.write('a,b\n1,3\n2')
+        saver.save_collated_from_results(pd.DataFrame({'a': [6], 'b': [5]}))
+        with open(path, 'r') as f:
+            self.assertEqual(f.read(), 'a,b\n1,3\n6,5\n')
+        # And before rewriting the file with new columns
+        with open(path, 'a') as f:
+            f.write('7,' + '8' * 5000)
+        saver.save_collated_from_results(pd.DataFrame({'c': [9]}))
+        self.assertEqual(pd.read_csv(path).fillna(0).values.tolist(), [[1, 3, 0], [6, 5, 0], [0, 0, 9]])
+        # A header without a line break is finished off
+        with open(path, 'w') as f:
+            f.write('a,b')
+        saver.save_collated_from_results(pd.DataFrame({'a': [1], 'b': [2]}))
+        with open(path, 'r') as f:
+            self.assertEqual(f.read(), 'a,b\n1,2\n')
+        os.remove(path)
+
+    def test_save_collated_only_saves_new_rows(self):
+        logger = LoggerDefault()
+        saver = SaverCsv(logger, params={'folder3':0.3, 'folder2':0.2, 'folder1':0.1}, root_dir=self.test_dir)
+        path = os.path.join(self.test_dir, 'folder1=0.1', 'folder2=0.2', 'folder3=0.3', 'results_1.csv')
+        saver.log({'a': 1})
+        saver.log({'a': 2})
+        saver.save_collated()
+        saver.save_collated()
+        saver.log({'a': 3, 'b': 4})
+        saver.save_collated()
+        read_results = pd.read_csv(path)
+        self.assertEqual(read_results['a'].tolist(), [1, 2, 3])
+        self.assertEqual(read_results.columns.tolist(), ['a', 'time_stamp', 'b'])
+        # After the logger is reset, its rows are saved from the start again
+        logger.reset()
+        saver.log({'a': 5})
+        saver.save_collated()
+        self.assertEqual(pd.read_csv(path)['a'].tolist(), [1, 2, 3, 5])
+        # Even if more rows are logged after the reset than were saved before it
+        logger.reset()
+        for a in [10, 11, 12]:
+            saver.log({'a': a})
+        saver.save_collated()
+        self.assertEqual(pd.read_csv(path)['a'].tolist(), [1, 2, 3, 5, 10, 11, 12])
+        os.remove(path)
+
 
 class TestSaverCsvExists(unittest.TestCase):
 
@@ -361,6 +453,35 @@ class TestSaverCsvExists(unittest.TestCase):
         # Assert
         self.assertEqual(result, 0)
 
+    def test_snapshot_matches_exists(self):
+        # Arrange
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        exists = saver.exists_snapshot()
+        all_params = [{'dir2':None, 'subdir2':None, 'subdir3':None}, {'dir2':None}, {'dir3':None}, {'dir1':None},
+                      {'subdir2':None, 'dir2':None}, {}]
+
+        # Act & Assert
+        for params in all_params:
+            self.assertEqual(exists(params), saver.exists(params))
+
+    def test_snapshot_numeric_values(self):
+        # Arrange
+        for path in [os.path.join('alpha=0.5', 'beta=1'), os.path.join('alpha=0.50', 'beta=2'), os.path.join('beta=1', 'alpha=0.5')]:
+            os.makedirs(os.path.join(self.test_dir, path))
+            pd.DataFrame({'a': [1]}).to_csv(os.path.join(self.test_dir, path, 'results_0.csv'), index=False)
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+
+        # Act
+        exists = saver.exists_snapshot()
+
+        # Assert
+        self.assertEqual(exists({'alpha': 0.5, 'beta': 1}), 2)
+        self.assertEqual(exists({'alpha': 0.5}), 3)
+        self.assertEqual(exists({'beta': 2.0}), 1)
+        self.assertEqual(exists({'alpha': 0.5, 'beta': 3}), 0)
+        for params in [{'alpha': 0.5, 'beta': 1}, {'alpha': 0.5}, {'beta': 2.0}]:
+            self.assertEqual(exists(params), saver.exists(params))
+
 
 class TestSaverCsvRead(unittest.TestCase):
     
@@ -651,6 +772,39 @@ class TestSaverCsvRead(unittest.TestCase):
             self.assertEqual(param,[['param1=1', 'param2=False', 'param3=3']])
             self.assertEqual(value, [5])
 
+        def test_collate_by_mean_absolute_root(self):
+            # Runs are grouped by their directory, so an absolute root directory gives the same parameters
+            saver = SaverCsv(LoggerDefault(), root_dir=os.path.abspath(self.test_dir))
+            param, value = saver.read({'param2': True}, 'a', select_by='max', collate_by='mean')
+            self.assertEqual(param, [['param1=1', 'param2=True', 'param3=3']])
+            self.assertEqual(value, [3.5])
+
+        def test_collate_by_mean_includes_deeper_runs(self):
+            # The mean for a directory's parameters includes the runs in directories below it with more parameters
+            path = os.path.join(self.test_dir, 'param1=1', 'param2=False', 'param3=3', 'param4=4', 'results_0.csv')
+            os.makedirs(os.path.dirname(path))
+            pd.DataFrame({'a': [7]}).to_csv(path, index=False)
+            saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+            param, value = saver.read({'param2': False}, 'a', select_by='max', collate_by='mean')
+            results = dict(zip(map(tuple, param), value))
+            self.assertEqual(results, {('param1=1', 'param2=False', 'param3=3'): 6, ('param1=1', 'param2=False', 'param3=3', 'param4=4'): 7})
+
+        def test_read_file_only_reads_metric(self):
+            saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+            path = os.path.join(self.test_dir, self.csv_files[0])
+            self.assertEqual(list(saver.read_file(path, 'a').columns), ['a'])
+            self.assertEqual(list(saver.read_file(path, 'c').columns), [])
+
+        def test_ext_saver_default_read_file(self):
+            # Savers that only implement the baseline's save_collated can be created, and read files with pandas
+            saver = SaverExt(LoggerDefault(), '.csv', root_dir=self.test_dir)
+            param, value = saver.read({'param2': True}, 'a', select_by='max', collate_by='mean')
+            self.assertEqual(value, [3.5])
+            with self.assertRaises(NotImplementedError):
+                saver.save_collated_from_results(pd.DataFrame({'a': [1]}))
+            with self.assertRaises(NotImplementedError):
+                saver.read_file(os.path.join(self.test_dir, 'results_0.txt'), 'a')
+
 
 class TestSaverCsvGetSetCurrentPath(unittest.TestCase):
     
@@ -758,5 +912,80 @@ class TestSaverCsvGetCurrentParams(unittest.TestCase):
         self.assertEqual(params, saver.get_current_params())
 
 
+class TestSaverCsvFlatLayout(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def save(self, params, loss, **kwargs):
+        saver = SaverCsv(LoggerDefault(), params=params, root_dir=self.test_dir, layout='flat', **kwargs)
+        saver.save_collated_from_results(pd.DataFrame({'loss': [loss]}))
+        return saver.getset_current_path()
+
+    def test_layout(self):
+        with self.assertRaises(ValueError):
+            SaverCsv(LoggerDefault(), root_dir=self.test_dir, layout='deep')
+        path = self.save({'alpha': 0.1, 'beta': 'adam'}, 0.5)
+        # The directory depends only on the parameters, not their order or the form of numeric values
+        self.assertEqual(os.path.dirname(self.save({'beta': 'adam', 'alpha': 0.10}, 0.7)), os.path.dirname(path))
+        self.assertEqual(os.path.dirname(os.path.dirname(path)), self.test_dir)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(path))), ['params.json', 'results_0.csv', 'results_1.csv'])
+        with open(os.path.join(os.path.dirname(path), 'params.json'), 'r') as f:
+            self.assertEqual(json.load(f), {'alpha': '0.1', 'beta': 'adam'})
+
+    def test_exists_and_read(self):
+        self.save({'alpha': 0.1, 'beta': 'adam'}, 0.5)
+        self.save({'alpha': 0.1, 'beta': 'adam'}, 0.7)
+        self.save({'alpha': 0.2, 'beta': 'adam'}, 0.9)
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, layout='flat')
+        self.assertEqual(saver.exists({'beta': 'adam', 'alpha': '0.10'}), 2)
+        self.assertEqual(saver.exists({'alpha': 0.3, 'beta': 'adam'}), 0)
+        exists = saver.exists_snapshot()
+        self.assertEqual(exists({'alpha': 0.1, 'beta': 'adam'}), 2)
+        self.assertEqual(exists({'beta': 'adam'}), 0)
+        params, values = saver.read({'beta': 'adam'}, 'loss')
+        results = dict(zip(map(tuple, params), values))
+        self.assertEqual(set(results.keys()), {('alpha=0.1', 'beta=adam'), ('alpha=0.2', 'beta=adam')})
+        self.assertAlmostEqual(results[('alpha=0.1', 'beta=adam')], 0.6)
+        params, values = saver.read({'alpha': 0.1}, 'loss', collate_by='all')
+        self.assertEqual(sorted(p[-1] for p in params), ['results_0', 'results_1'])
+
+    def test_reads_nested_results(self):
+        # Results saved in the nested layout under the same root directory are still found
+        nested = SaverCsv(LoggerDefault(), params={'alpha': 0.1, 'beta': 'adam'}, root_dir=self.test_dir)
+        nested.save_collated_from_results(pd.DataFrame({'loss': [0.3]}))
+        self.save({'alpha': 0.1, 'beta': 'adam'}, 0.5)
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, layout='flat')
+        # Only runs saved in the flat layout are counted
+        self.assertEqual(saver.exists({'alpha': 0.1, 'beta': 'adam'}), 1)
+        self.assertEqual(saver.exists_snapshot()({'alpha': 0.1, 'beta': 'adam'}), 1)
+        params, values = saver.read({}, 'loss', collate_by='all')
+        self.assertEqual(sorted(values), [0.3, 0.5])
+        self.assertEqual(sorted(p[:2] for p in params), [['alpha=0.1', 'beta=adam']] * 2)
+
+    def test_snapshot_agrees_with_exists(self):
+        for layout in ['nested', 'flat']:
+            for index in [False, True]:
+                root_dir = os.path.join(self.test_dir, f'{layout}_{index}')
+                for params in [{'a': 1, 'b': 2}, {'a': 1, 'b': 2}, {'a': 1.0, 'b': 3}, {'a': 2}]:
+                    saver = SaverCsv(LoggerDefault(), params=params, root_dir=root_dir, layout=layout, index=index)
+                    saver.save_collated_from_results(pd.DataFrame({'loss': [0.5]}))
+                saver = SaverCsv(LoggerDefault(), root_dir=root_dir, layout=layout, index=index)
+                exists = saver.exists_snapshot()
+                for params in [{'a': 1}, {'a': 1, 'b': 2}, {'b': 2.0, 'a': '1.0'}, {'a': 1, 'b': 3}, {'a': 2}, {'a': 3}, {'c': 1}]:
+                    self.assertEqual(exists(params), saver.exists(params), (layout, index, params))
+                self.assertEqual(saver.exists({'a': 1}), 3 if layout == 'nested' else 0)
+
+    def test_flat_layout_with_index(self):
+        self.save({'alpha': 0.1}, 0.5, index=True)
+        self.save({'alpha': 0.1}, 0.7, index=True)
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, layout='flat', index=True)
+        self.assertEqual(len(saver.index.get_files()), 2)
+        self.assertEqual(saver.exists({'alpha': 0.1}), 2)
+        self.assertAlmostEqual(saver.read({}, 'loss')[1][0], 0.6)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import os
+import shutil
+import tempfile
+import pandas as pd
+from slune.savers.parquet import SaverParquet
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+@unittest.skipIf(pq is None, "pyarrow is not installed")
+class TestSaverParquet(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_save_and_append(self):
+        saver = SaverParquet(LoggerDefault(), params={'alpha': 1, 'beta': 0.5}, root_dir=self.test_dir)
+        path = saver.getset_current_path()
+        self.assertTrue(path.endswith(os.path.join('alpha=1', 'beta=0.5', 'results_0.parquet')))
+        saver.save_collated_from_results(pd.DataFrame({'loss': [0.5, 0.4], 'step': [1, 2]}))
+        saver.save_collated_from_results(pd.DataFrame({'loss': [0.3], 'acc': [0.9]}))
+        table = pq.read_table(path)
+        self.assertEqual(table.column_names, ['loss', 'step', 'acc'])
+        self.assertEqual(table.column('loss').to_pylist(), [0.5, 0.4, 0.3])
+        self.assertEqual(table.column('acc').to_pylist(), [None, None, 0.9])
+        # Columns are typed, not stored as text
+        self.assertEqual(str(table.schema.field('loss').type), 'double')
+        # No temporary files are left behind
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['results_0.parquet'])
+
+    def test_save_collated_only_saves_new_rows(self):
+        saver = SaverParquet(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        saver.log({'loss': 1.0})
+        saver.save_collated()
+        saver.log({'loss': 2.0})
+        saver.save_collated()
+        saver.save_collated()
+        self.assertEqual(pq.read_table(saver.getset_current_path()).column('loss').to_pylist(), [1.0, 2.0])
+
+    def test_read_matches_csv(self):
+        runs = [({'alpha': 1, 'beta': 1}, [0.1, 0.5]), ({'alpha': 1, 'beta': 1}, [0.3, 0.2]), ({'alpha': 2, 'beta': 1}, [0.7, 0.6])]
+        csv_dir = os.path.join(self.test_dir, 'csv')
+        parquet_dir = os.path.join(self.test_dir, 'parquet')
+        for params, losses in runs:
+            for saver in [SaverCsv(LoggerDefault(), params=params, root_dir=csv_dir), SaverParquet(LoggerDefault(), params=params, root_dir=parquet_dir)]:
+                saver.save_collated_from_results(pd.DataFrame({'loss': losses, 'other': ['a', 'b']}))
+        for select_by in ['max', 'min', 'last']:
+            for collate_by in ['mean', 'all']:
+                csv_params, csv_values = SaverCsv(LoggerDefault(), root_dir=csv_dir).read({}, 'loss', select_by, collate_by)
+                parquet_params, parquet_values = SaverParquet(LoggerDefault(), root_dir=parquet_dir).read({}, 'loss', select_by, collate_by)
+                self.assertEqual(sorted(zip(map(str, csv_params), csv_values)), sorted(zip(map(str, parquet_params), parquet_values)))
+        params, values = SaverParquet(LoggerDefault(), root_dir=parquet_dir).read({'alpha': 1}, 'loss', 'max')
+        self.assertEqual(params, [['alpha=1', 'beta=1']])
+        self.assertAlmostEqual(values[0], 0.4)
+        self.assertEqual(SaverParquet(LoggerDefault(), root_dir=parquet_dir).exists({'alpha': 1, 'beta': 1}), 2)
+
+    def test_read_only_loads_metric_column(self):
+        saver = SaverParquet(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        saver.save_collated_from_results(pd.DataFrame({'loss': [0.5], 'other': ['a']}))
+        self.assertEqual(saver.read_file(saver.getset_current_path(), 'loss').columns.tolist(), ['loss'])
+        with self.assertRaises(KeyError):
+            saver.read({}, 'missing')
+
+
+if __name__ == '__main__':
+    unittest.main()
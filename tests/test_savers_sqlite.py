@@ -0,0 +1,111 @@
+import unittest
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import pandas as pd
+from slune.savers.sqlite import SaverSqlite, canonical_key
+from slune.loggers.default import LoggerDefault
+from slune.searchers.halving import get_results_lookup
+
+def save_runs(db_path, worker, num_runs):
+    # Saves runs from a separate process, to check concurrent writers
+    saver = SaverSqlite(LoggerDefault(), db_path=db_path, timeout=10)
+    for i in range(num_runs):
+        saver.getset_current_path({'worker': worker, 'i': i})
+        saver.log({'loss': float(worker * 100 + i)})
+        saver.save_collated()
+
+class TestSaverSqlite(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, 'results', 'slune.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_canonical_key(self):
+        self.assertEqual(canonical_key('0.1'), canonical_key('0.10'))
+        self.assertEqual(canonical_key('1'), canonical_key('1.0'))
+        self.assertEqual(canonical_key('adam'), 'adam')
+
+    def test_wal_mode(self):
+        SaverSqlite(LoggerDefault(), db_path=self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        # Lookups by parameter value use the index
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT run_id FROM params WHERE name = 'a' AND key = '1.0'").fetchall()
+        self.assertIn('params_by_value', str(plan))
+        conn.close()
+
+    def test_save_exists_and_read(self):
+        saver = SaverSqlite(LoggerDefault(), params={'alpha': 0.1, 'beta': 'adam'}, db_path=self.db_path)
+        saver.save_collated_from_results(pd.DataFrame({'loss': [0.5, 0.3], 'acc': [0.1, None]}))
+        # Later saves add to the same run
+        saver.save_collated_from_results(pd.DataFrame({'loss': [0.4]}))
+        saver.getset_current_path({'alpha': 0.10, 'beta': 'adam'})
+        saver.save_collated_from_results(pd.DataFrame({'loss': [0.7]}))
+        saver.getset_current_path({'alpha': 0.2, 'beta': 'adam'})
+        saver.save_collated_from_results(pd.DataFrame({'loss': [0.9]}))
+        self.assertEqual(saver.exists({'alpha': 0.1, 'beta': 'adam'}), 2)
+        self.assertEqual(saver.exists({'alpha': '0.10'}), 2)
+        self.assertEqual(saver.exists({'beta': 'adam'}), 3)
+        self.assertEqual(saver.exists({}), 3)
+        self.assertEqual(saver.exists({'alpha': 0.3}), 0)
+        exists = saver.exists_snapshot()
+        for params in [{'alpha': 0.1, 'beta': 'adam'}, {'alpha': '0.10'}, {'beta': 'adam'}, {'alpha': 0.3}, {'gamma': 1}]:
+            self.assertEqual(exists(params), saver.exists(params))
+        # Runs of the same parameters are averaged
+        params, values = saver.read({'beta': 'adam'}, 'loss', select_by='min')
+        results = dict(zip(map(tuple, params), values))
+        self.assertEqual(results, {('alpha=0.1', 'beta=adam'): 0.5, ('alpha=0.2', 'beta=adam'): 0.9})
+        params, values = saver.read({'alpha': 0.1}, 'loss', select_by='last', collate_by='all')
+        self.assertEqual(sorted(values), [0.4, 0.7])
+        self.assertTrue(all(p[-1].startswith('results_') for p in params))
+        # Rows without a value of the metric are left out
+        self.assertEqual(saver.read({'alpha': 0.1}, 'acc', select_by='last', collate_by='all')[1], [0.1])
+        self.assertEqual(saver.read({}, 'missing'), (None, None))
+
+    def test_save_collated_only_saves_new_rows(self):
+        saver = SaverSqlite(LoggerDefault(), params={'alpha': 1}, db_path=self.db_path)
+        saver.log({'loss': 1.0})
+        saver.save_collated()
+        saver.log({'loss': 2.0})
+        saver.save_collated()
+        saver.save_collated()
+        self.assertEqual(saver.read({}, 'loss', select_by='all', collate_by='all')[1][0].tolist(), [1.0, 2.0])
+        self.assertEqual(saver.exists({'alpha': 1}), 1)
+        # Rows logged after a reset are saved, even if there are more of them than were saved before it
+        saver.logger.reset()
+        for loss in [3.0, 4.0, 5.0]:
+            saver.log({'loss': loss})
+        saver.save_collated()
+        self.assertEqual(saver.read({}, 'loss', select_by='all', collate_by='all')[1][0].tolist(), [1.0, 2.0, 3.0, 4.0, 5.0])
+
+    def test_results_lookup(self):
+        saver = SaverSqlite(LoggerDefault(), db_path=self.db_path)
+        for x in [1, 2, 3]:
+            saver.getset_current_path({'x': x, 'budget': 9})
+            saver.save_collated_from_results(pd.DataFrame({'score': [x * 10]}))
+        lookup = get_results_lookup(saver, {}, 'score')
+        self.assertEqual(lookup({'x': 2, 'budget': 9}), 20)
+        self.assertEqual(lookup({'x': 2.0}), 20)
+        self.assertIsNone(lookup({'x': 4}))
+
+    def test_concurrent_writers(self):
+        SaverSqlite(LoggerDefault(), db_path=self.db_path)
+        processes = [multiprocessing.Process(target=save_runs, args=(self.db_path, worker, 10)) for worker in range(4)]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+            self.assertEqual(p.exitcode, 0)
+        saver = SaverSqlite(LoggerDefault(), db_path=self.db_path)
+        self.assertEqual(saver.exists({}), 40)
+        params, values = saver.read({'worker': 3}, 'loss')
+        self.assertEqual(sorted(values), [300.0 + i for i in range(10)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import numpy as np
+from slune import get_csv_saver
+from slune.searchers.bayes import SearcherBayes, fit_gp, predict_gp, parzen_density
+from tests.searcher_rounds import SearcherRoundsTestCase
+
+class TestModels(unittest.TestCase):
+
+    def test_gp_interpolates(self):
+        X = np.linspace(0, 1, 8)[:, None]
+        y = np.sin(6 * X[:, 0])
+        mu, sigma = predict_gp(fit_gp(X, y), X)
+        np.testing.assert_allclose(mu, y, atol=1e-2)
+        self.assertTrue(np.all(sigma < 0.05))
+        _, far_sigma = predict_gp(fit_gp(X[:2], y[:2]), np.array([[1.0]]))
+        self.assertGreater(far_sigma[0], 0.1)
+
+    def test_parzen_density(self):
+        x = np.array([[0.1], [0.9]])
+        np.testing.assert_allclose(parzen_density(x, np.zeros((0, 1)), 0.1), [1, 1])
+        density = parzen_density(x, np.array([[0.1]]), 0.1)
+        self.assertGreater(density[0], density[1])
+
+class TestSearcherBayes(SearcherRoundsTestCase, unittest.TestCase):
+
+    metric = 'loss'
+
+    def setUp(self):
+        super().setUp()
+        self.configs = {'x': ('uniform', -2.0, 2.0), 'y': ('uniform', -2.0, 2.0), 'opt': ['adam', 'sgd']}
+
+    def objective(self, config):
+        penalty = 0 if config['opt'] == 'adam' else 1
+        return (config['x'] - 1) ** 2 + (config['y'] + 0.5) ** 2 + penalty
+
+    def run_batches(self, num_batches, **kwargs):
+        for _ in range(num_batches):
+            self.run_round(SearcherBayes(self.configs, 'loss', mode='min', select_by='min', **kwargs))
+        params, values = get_csv_saver(root_dir=self.root_dir).read({}, 'loss', select_by='min')
+        return values
+
+    def test_cold_start(self):
+        searcher = SearcherBayes(self.configs, 'loss', batch_size=4, seed=3)
+        configs = list(searcher)
+        self.assertEqual(len(configs), 4)
+        self.assertEqual(configs, list(SearcherBayes(self.configs, 'loss', batch_size=4, seed=3)))
+        self.assertNotEqual(configs, list(SearcherBayes(self.configs, 'loss', batch_size=4, seed=4)))
+        # With no results in storage we also get a random batch
+        searcher = SearcherBayes(self.configs, 'loss', batch_size=4, seed=3)
+        searcher.check_existing_runs(get_csv_saver(root_dir=self.root_dir))
+        self.assertEqual(list(searcher), configs)
+
+    def test_tpe_improves_on_random(self):
+        values = self.run_batches(8, batch_size=4, method='tpe', seed=1)
+        self.assertEqual(len(values), 32)
+        # The first two batches are random
+        self.assertLess(min(values), 0.1)
+        self.assertLess(np.mean(sorted(values)[:8]), 0.3)
+
+    def test_gp_improves_on_random(self):
+        values = self.run_batches(6, batch_size=4, method='gp', seed=1)
+        self.assertEqual(len(values), 24)
+        self.assertLess(min(values), 0.1)
+
+    def test_batch_is_spread_out(self):
+        self.run_batches(2, batch_size=4, seed=2)
+        for method in ['tpe', 'gp']:
+            searcher = SearcherBayes(self.configs, 'loss', batch_size=4, method=method, mode='min', select_by='min', seed=2)
+            searcher.check_existing_runs(get_csv_saver(root_dir=self.root_dir))
+            self.assertEqual(searcher.num_observations, 8)
+            proposals = list(searcher)
+            self.assertEqual(len(proposals), 4)
+            self.assertEqual(len(set(str(p) for p in proposals)), 4)
+
+    def test_reproducible_and_sharded(self):
+        self.run_batches(2, batch_size=4, seed=5)
+        batches = []
+        for shard_index, num_shards in [(0, 1), (0, 1), (1, 2)]:
+            searcher = SearcherBayes(self.configs, 'loss', batch_size=4, mode='min', select_by='min', seed=5,
+                                     shard_index=shard_index, num_shards=num_shards)
+            searcher.check_existing_runs(get_csv_saver(root_dir=self.root_dir))
+            batches.append(list(searcher))
+        self.assertEqual(batches[0], batches[1])
+        self.assertEqual(batches[2], batches[0][1::2])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            SearcherBayes(self.configs, 'loss', method='random')
+        with self.assertRaises(ValueError):
+            SearcherBayes(self.configs, 'loss', mode='best')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import os
+import json
+import pickle
+import shutil
+import tempfile
+from unittest.mock import patch
+from slune import get_csv_saver
+from slune.searchers.file import SearcherFile, ConfigFile
+
+class TestConfigFile(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.test_dir, 'configs.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write('lr,layers,optimizer,momentum\n')
+            f.write('0.1,2,adam,\n')
+            f.write('0.01,3,sgd,0.9\n')
+            f.write('\n')
+            f.write('1e-3,4,"sgd",0.5\n')
+        self.jsonl_path = os.path.join(self.test_dir, 'configs.jsonl')
+        with open(self.jsonl_path, 'w') as f:
+            for i in range(100):
+                f.write(json.dumps({'seed': i, 'name': f'run{i}'}) + '\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_csv(self):
+        configs = ConfigFile(self.csv_path)
+        self.assertEqual(configs, [
+            {'lr': 0.1, 'layers': 2, 'optimizer': 'adam'},
+            {'lr': 0.01, 'layers': 3, 'optimizer': 'sgd', 'momentum': 0.9},
+            {'lr': 0.001, 'layers': 4, 'optimizer': 'sgd', 'momentum': 0.5},
+        ])
+        self.assertEqual(configs[2]['lr'], 0.001)
+
+    def test_jsonl(self):
+        configs = ConfigFile(self.jsonl_path)
+        self.assertEqual(len(configs), 100)
+        self.assertEqual(configs[57], {'seed': 57, 'name': 'run57'})
+        self.assertEqual(list(configs[10:13]), [{'seed': i, 'name': f'run{i}'} for i in range(10, 13)])
+        self.assertEqual(list(configs[::40]), [{'seed': i, 'name': f'run{i}'} for i in [0, 40, 80]])
+        self.assertTrue(os.path.exists(self.jsonl_path + '.idx'))
+
+    def test_decode_opens_files_once(self):
+        configs = ConfigFile(self.jsonl_path)
+        configs[0]
+        with patch('builtins.open', side_effect=AssertionError('opened again')):
+            self.assertEqual([configs[i] for i in [99, 3, 42]], [{'seed': i, 'name': f'run{i}'} for i in [99, 3, 42]])
+        # Copies (eg. slices) map the files again when they are needed
+        self.assertEqual(pickle.loads(pickle.dumps(configs[5:7]))[1], {'seed': 6, 'name': 'run6'})
+
+    def test_close(self):
+        with ConfigFile(self.jsonl_path) as configs:
+            self.assertEqual(configs[1], {'seed': 1, 'name': 'run1'})
+            maps = configs.maps
+        self.assertIsNone(configs.maps)
+        self.assertTrue(all(m.closed for m in maps))
+        # Reading again maps the files again
+        self.assertEqual(configs[2], {'seed': 2, 'name': 'run2'})
+        configs.close()
+
+    def test_file_shorter_than_index(self):
+        configs = ConfigFile(self.jsonl_path)
+        with open(self.jsonl_path, 'r+') as f:
+            f.truncate(100)
+        with self.assertRaises(ValueError):
+            list(configs)
+        with self.assertRaises(ValueError):
+            configs[99]
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            ConfigFile(os.path.join(self.test_dir, 'configs.txt'))
+        bad_path = os.path.join(self.test_dir, 'bad.csv')
+        with open(bad_path, 'w') as f:
+            f.write('a,b\n1,2,3\n')
+        with self.assertRaises(ValueError):
+            ConfigFile(bad_path)[0]
+
+class TestSearcherFile(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'configs.jsonl')
+        with open(self.path, 'w') as f:
+            for i in range(10):
+                f.write(json.dumps({'alpha': i}) + '\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_runs_and_shards(self):
+        configs = list(SearcherFile(self.path, runs=2))
+        self.assertEqual(len(configs), 20)
+        self.assertEqual(configs[:3], [{'alpha': 0}, {'alpha': 0}, {'alpha': 1}])
+        shard = list(SearcherFile(self.path, shard_index=1, num_shards=3))
+        self.assertEqual(shard, [{'alpha': i} for i in [1, 4, 7]])
+
+    def test_check_existing_runs(self):
+        root_dir = os.path.join(self.test_dir, 'slune_results')
+        for i in [0, 1, 2, 5]:
+            saver = get_csv_saver(params={'alpha': i}, root_dir=root_dir)
+            saver.log({'loss': 1.0})
+            saver.save_collated()
+        searcher = SearcherFile(self.path, runs=1)
+        searcher.check_existing_runs(get_csv_saver(root_dir=root_dir))
+        self.assertEqual([c['alpha'] for c in searcher], [3, 4, 6, 7, 8, 9])
+
+
+if __name__ == '__main__':
+    unittest.main()
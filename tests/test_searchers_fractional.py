@@ -0,0 +1,72 @@
+import unittest
+import itertools
+from collections import Counter
+from slune.searchers.fractional import SearcherFractional, FractionalFactorial, get_generators
+from slune.searchers.grid import Grid
+
+def get_strength(design, names):
+    """ Largest t such that every combination of values of any t arguments appears equally often. """
+
+    runs = list(design)
+    strength = 0
+    for t in range(1, len(names) + 1):
+        for subset in itertools.combinations(names, t):
+            counts = Counter(tuple(run[name] for name in subset) for run in runs)
+            num_levels = len(design.values[0])
+            if len(counts) != num_levels ** t or len(set(counts.values())) != 1:
+                return strength
+        strength = t
+    return strength
+
+class TestFractionalFactorial(unittest.TestCase):
+
+    def setUp(self):
+        self.configs = {f'p{i}': [False, True] for i in range(12)}
+
+    def test_run_counts(self):
+        self.assertEqual(len(Grid(self.configs)), 4096)
+        self.assertEqual(len(FractionalFactorial(self.configs, resolution=3)), 16)
+        self.assertEqual(len(FractionalFactorial(self.configs, resolution=4)), 32)
+        self.assertEqual(get_generators(8, 2, 5)[0], 6)
+        self.assertEqual(get_generators(4, 3, 3)[0], 2)
+
+    def test_orthogonal(self):
+        # A design of resolution R is an orthogonal array of strength R - 1
+        for configs, resolution in [(self.configs, 3), (self.configs, 4), ({f'p{i}': [0, 1] for i in range(8)}, 5),
+                                    ({f'p{i}': ['a', 'b', 'c'] for i in range(4)}, 3), ({f'p{i}': [1, 2, 3] for i in range(5)}, 4)]:
+            design = FractionalFactorial(configs, resolution=resolution)
+            self.assertGreaterEqual(get_strength(design, design.names), resolution - 1)
+
+    def test_full_factorial_when_needed(self):
+        configs = {'a': [0, 1], 'b': [0, 1]}
+        self.assertEqual(sorted(map(str, FractionalFactorial(configs, resolution=5))), sorted(map(str, Grid(configs))))
+
+    def test_runs_are_distinct_and_from_grid(self):
+        design = FractionalFactorial(self.configs, resolution=4)
+        runs = [str(run) for run in design]
+        self.assertEqual(len(set(runs)), len(runs))
+        self.assertEqual(design[0], {name: False for name in self.configs})
+        self.assertEqual(design[17], list(design)[17])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            FractionalFactorial({'a': [0, 1], 'b': [0, 1, 2]})
+        with self.assertRaises(ValueError):
+            FractionalFactorial({'a': [0, 1, 2, 3]})
+        with self.assertRaises(ValueError):
+            FractionalFactorial(self.configs, resolution=2)
+
+class TestSearcherFractional(unittest.TestCase):
+
+    def test_searcher(self):
+        configs = {f'p{i}': [0, 1] for i in range(7)}
+        searcher = SearcherFractional(configs, resolution=3, runs=2)
+        runs = list(searcher)
+        self.assertEqual(len(runs), 16)
+        self.assertEqual(runs[0], runs[1])
+        shard = list(SearcherFractional(configs, resolution=3, shard_index=1, num_shards=2))
+        self.assertEqual(shard, list(SearcherFractional(configs, resolution=3))[1::2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,18 @@
 import unittest
+import json
+import os
+import shutil
+import tempfile
+import pandas as pd
 
 # Import your SearcherGrid class here
-from slune.searchers.grid import SearcherGrid
+from slune.searchers.grid import SearcherGrid, Grid, ConditionalGrid
+from slune.searchers.random import SearcherRandom
+from slune.searchers.bayes import SearcherBayes
 from slune.base import BaseSaver, BaseLogger
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+from slune.utils import dict_to_strings
 
 # Create a mock Logger object to use in the tests
 class MockLogger(BaseLogger):
@@ -34,7 +44,7 @@ class MockSaver(BaseSaver):
         return 1
 
     def exists(self, params):
-        if "--param1=1" in params:
+        if "--param1=1" in dict_to_strings(params):
             return 1
         else:
             return 0
@@ -227,5 +237,284 @@ class TestSearcherGrid(unittest.TestCase):
             self.assertTrue(config in [{'--param1':1, '--param2':'a'}, {'--param1':1, '--param2':'b'}, {'--param1':2, '--param2':'a'}, {'--param1':2, '--param2':'b'}])
 
 
+    def test_long_stretch_of_existing_runs(self):
+        # Test that skipping a long stretch of existing runs doesn't hit the recursion limit
+
+        # Create an instance of SearcherGrid where every configuration but the last already exists
+        hyperparameters = {
+            "--param1": [1] * 5000 + [2],
+        }
+        searcher = SearcherGrid(hyperparameters, runs=1)
+        searcher.check_existing_runs(MockSaver(MockLogger()))
+
+        # Check that we skip straight to the last configuration
+        self.assertEqual(searcher.next_tune(), {'--param1':2})
+        with self.assertRaises(IndexError):
+            searcher.next_tune()
+
+    def test_check_existing_runs_with_saver(self):
+        # Configurations are given to the saver as dictionaries, the form BaseSaver.exists takes
+        root_dir = tempfile.mkdtemp()
+        try:
+            saver = SaverCsv(LoggerDefault(), params={'param1': 1, 'param2': 'a'}, root_dir=root_dir)
+            saver.save_collated_from_results(pd.DataFrame({'loss': [0.5]}))
+            searcher = SearcherGrid({'param1': [1, 2], 'param2': ['a']}, runs=1)
+            searcher.check_existing_runs(saver)
+            self.assertEqual(list(searcher), [{'param1': 2, 'param2': 'a'}])
+        finally:
+            shutil.rmtree(root_dir)
+
+    def test_check_existing_runs_uses_snapshot(self):
+        # Test that check_existing_runs takes a single snapshot from the saver
+
+        # Create a saver that counts how many snapshots are taken
+        class SnapshotSaver(MockSaver):
+            snapshots = 0
+            def exists_snapshot(self):
+                SnapshotSaver.snapshots += 1
+                return self.exists
+        hyperparameters = {
+            "--param1": [1, 2],
+            "--param2": ["a", "b"]
+        }
+        searcher = SearcherGrid(hyperparameters, runs=1)
+        searcher.check_existing_runs(SnapshotSaver(MockLogger()))
+
+        # Check that iterating through the grid only uses the one snapshot
+        self.assertEqual(list(searcher), [{'--param1':2, '--param2':'a'}, {'--param1':2, '--param2':'b'}])
+        self.assertEqual(SnapshotSaver.snapshots, 1)
+
+
+    def test_shards(self):
+        # Test that shards are disjoint and together cover the whole grid
+
+        hyperparameters = {
+            "--param1": [1, 2, 3],
+            "--param2": ["a", "b", "c"]
+        }
+        full = list(SearcherGrid(hyperparameters))
+        for strategy in ['strided', 'contiguous']:
+            shards = [list(SearcherGrid(hyperparameters, shard_index=i, num_shards=4, shard_strategy=strategy)) for i in range(4)]
+            self.assertEqual(sorted(sum(shards, []), key=full.index), full)
+            self.assertEqual(sum(len(shard) for shard in shards), len(full))
+        self.assertEqual(list(SearcherGrid(hyperparameters, shard_index=1, num_shards=4)), [full[1], full[5]])
+        self.assertEqual(list(SearcherGrid(hyperparameters, shard_index=1, num_shards=4, shard_strategy='contiguous')), [full[2], full[3]])
+
+    def test_shard_with_check_existing_runs(self):
+        # Test that a shard only skips existing runs within its own share of the grid
+        
+        hyperparameters = {
+            "--param1": [1, 2],
+            "--param2": ["a", "b"]
+        }
+        searcher = SearcherGrid(hyperparameters, runs=1, shard_index=0, num_shards=2)
+        searcher.check_existing_runs(MockSaver(MockLogger()))
+        self.assertEqual(list(searcher), [{'--param1':2, '--param2':'a'}])
+
+    def test_invalid_shard(self):
+        with self.assertRaises(ValueError):
+            SearcherGrid({"--param1": [1]}, shard_index=2, num_shards=2)
+        with self.assertRaises(ValueError):
+            SearcherGrid({"--param1": [1]}, num_shards=2, shard_strategy='random')
+
+
+class TestGrid(unittest.TestCase):
+
+    def setUp(self):
+        self.param_dict = {"a": [1, 2, 3], "b": ["x", "y"], "c": [0.1, 0.2]}
+        self.expected = [{"a": a, "b": b, "c": c} for a in [1, 2, 3] for b in ["x", "y"] for c in [0.1, 0.2]]
+
+    def test_len(self):
+        self.assertEqual(len(Grid(self.param_dict)), 12)
+        self.assertEqual(len(Grid({"a": [1], "b": []})), 0)
+        self.assertEqual(list(Grid({})), [{}])
+
+    def test_indexing(self):
+        grid = Grid(self.param_dict)
+        for i, config in enumerate(self.expected):
+            self.assertEqual(grid[i], config)
+        self.assertEqual(grid[-1], self.expected[-1])
+        with self.assertRaises(IndexError):
+            grid[12]
+
+    def test_iteration_order(self):
+        grid = Grid(self.param_dict)
+        self.assertEqual(list(grid), self.expected)
+        self.assertEqual(grid, self.expected)
+        self.assertEqual(list(grid[0].keys()), ["a", "b", "c"])
+
+    def test_slicing(self):
+        grid = Grid(self.param_dict)
+        self.assertIsInstance(grid[2:9:3], Grid)
+        self.assertEqual(grid[2:9:3], self.expected[2:9:3])
+        self.assertEqual(grid[1::2][1:3], self.expected[1::2][1:3])
+
+    def test_huge_grid(self):
+        # Test that a grid with far too many combinations to hold in memory can still be used
+        grid = Grid({f"p{i}": list(range(10)) for i in range(12)})
+        self.assertEqual(len(grid), 10 ** 12)
+        self.assertEqual(grid[123456789012], {f"p{i}": int(d) for i, d in enumerate("123456789012")})
+
+
+class TestConditionalGrid(unittest.TestCase):
+
+    def test_conditions(self):
+        grid = ConditionalGrid({'optimizer': ['adam', 'sgd'], 'momentum': [0.0, 0.9], 'lr': [0.1, 0.01]},
+                               conditions={'momentum': {'optimizer': 'sgd'}})
+        expected = [
+            {'optimizer': 'adam', 'lr': 0.1},
+            {'optimizer': 'adam', 'lr': 0.01},
+            {'optimizer': 'sgd', 'momentum': 0.0, 'lr': 0.1},
+            {'optimizer': 'sgd', 'momentum': 0.0, 'lr': 0.01},
+            {'optimizer': 'sgd', 'momentum': 0.9, 'lr': 0.1},
+            {'optimizer': 'sgd', 'momentum': 0.9, 'lr': 0.01},
+        ]
+        self.assertEqual(grid, expected)
+        self.assertEqual(grid[3], expected[3])
+        self.assertEqual(list(grid[1::2]), expected[1::2])
+
+    def test_nested_conditions(self):
+        grid = ConditionalGrid({'optimizer': ['adam', 'sgd'], 'momentum': [0.0, 0.9], 'nesterov': [True, False]},
+                               conditions={'momentum': {'optimizer': 'sgd'}, 'nesterov': lambda c: c['momentum'] > 0})
+        self.assertEqual(grid, [
+            {'optimizer': 'adam'},
+            {'optimizer': 'sgd', 'momentum': 0.0},
+            {'optimizer': 'sgd', 'momentum': 0.9, 'nesterov': True},
+            {'optimizer': 'sgd', 'momentum': 0.9, 'nesterov': False},
+        ])
+
+    def test_constraints_prune_early(self):
+        # Arrange, count how often the constraint is checked
+        checks = []
+        def fits(config):
+            checks.append(dict(config))
+            return config['batch_size'] * config.get('accum', 1) <= 64
+        params = {'batch_size': [32, 64, 128, 256], 'accum': [1, 2], 'seed': list(range(100))}
+
+        # Act
+        grid = ConditionalGrid(params, constraints=[fits])
+
+        # Assert
+        self.assertEqual(len(grid), 3 * 100)
+        self.assertTrue(all(c['batch_size'] * c['accum'] <= 64 for c in grid))
+        # Batch sizes that are too big are pruned before their seeds are expanded
+        self.assertFalse(any(c['batch_size'] > 64 and 'seed' in c for c in checks))
+
+    def test_constraint_waits_for_arguments(self):
+        grid = ConditionalGrid({'a': [1, 2, 3], 'b': [1, 2, 3]}, constraints=[lambda c: c['a'] < c['b']])
+        self.assertEqual(grid, [{'a': 1, 'b': 2}, {'a': 1, 'b': 3}, {'a': 2, 'b': 3}])
+
+    def test_invalid_conditions(self):
+        with self.assertRaises(ValueError):
+            ConditionalGrid({'a': [1]}, conditions={'b': {'a': 1}})
+        with self.assertRaises(ValueError):
+            ConditionalGrid({'a': [1], 'b': [1]}, conditions={'a': {'b': 1}})
+        with self.assertRaisesRegex(ValueError, 'optimiser'):
+            ConditionalGrid({'optimizer': ['sgd'], 'momentum': [0.9]}, conditions={'momentum': {'optimiser': 'sgd'}})
+
+    def test_unknown_constraint_argument(self):
+        with self.assertRaisesRegex(ValueError, 'batchsize'):
+            ConditionalGrid({'batch_size': [32, 64], 'accum': [1, 2]}, constraints=[lambda c: c['batchsize'] * c['accum'] <= 64])
+        # Inactive arguments are still known, so constraints using them don't apply
+        grid = ConditionalGrid({'optimizer': ['adam', 'sgd'], 'momentum': [0.0, 0.9]}, conditions={'momentum': {'optimizer': 'sgd'}},
+                               constraints=[lambda c: c['momentum'] > 0])
+        self.assertEqual(grid, [{'optimizer': 'adam'}, {'optimizer': 'sgd', 'momentum': 0.9}])
+
+    def test_combinations_are_not_stored(self):
+        # Arrange, count how many combinations are enumerated
+        checks = []
+        def count(config):
+            if 'seed' in config:
+                checks.append(config['seed'])
+            return True
+        grid = ConditionalGrid({'a': [1, 2], 'seed': list(range(50))}, constraints=[count])
+        expected = [{'a': a, 'seed': seed} for a in [1, 2] for seed in range(50)]
+        checks.clear()
+
+        # Act, accessing in order only enumerates the combinations once
+        configs = [grid[i] for i in range(len(grid))]
+
+        # Assert
+        self.assertEqual(configs, expected)
+        self.assertEqual(len(checks), 100)
+        self.assertFalse(hasattr(grid, 'combinations'))
+        # Earlier indices, reversed slices and slices with their own cursor still give the right combinations
+        self.assertEqual(grid[3], expected[3])
+        self.assertEqual(grid[-1], expected[-1])
+        self.assertEqual(list(grid[::-7]), expected[::-7])
+        first, second = grid[::2], grid[1::2]
+        self.assertEqual([(first[i], second[i]) for i in range(50)], list(zip(expected[::2], expected[1::2])))
+        self.assertEqual(grid[10:20], expected[10:20])
+        with self.assertRaises(IndexError):
+            grid[100]
+
+    def test_searcher(self):
+        searcher = SearcherGrid({'optimizer': ['adam', 'sgd'], 'momentum': [0.0, 0.9]}, runs=1,
+                                conditions={'momentum': {'optimizer': 'sgd'}}, constraints=[lambda c: c['momentum'] != 0.0])
+        self.assertEqual(list(searcher), [{'optimizer': 'adam'}, {'optimizer': 'sgd', 'momentum': 0.9}])
+        sharded = SearcherGrid({'a': [1, 2, 3], 'b': [1, 2, 3]}, constraints=[lambda c: c['a'] <= c['b']], shard_index=1, num_shards=2)
+        self.assertEqual(list(sharded), [{'a': 1, 'b': 2}, {'a': 2, 'b': 2}, {'a': 3, 'b': 3}])
+
+
+class TestSearcherState(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'state.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_resume_grid(self):
+        searcher = SearcherGrid({'a': [1, 2, 3], 'b': [1, 2]}, runs=2)
+        first = [searcher.next_tune() for _ in range(5)]
+        searcher.save_state(self.path)
+        resumed = SearcherGrid({'a': [1, 2, 3], 'b': [1, 2]}, runs=2)
+        self.assertTrue(resumed.load_state(self.path))
+        self.assertEqual(first + list(resumed), list(SearcherGrid({'a': [1, 2, 3], 'b': [1, 2]}, runs=2)))
+
+    def test_resume_list_grid(self):
+        # Searchers whose grid depends on results in storage resume with the same grid
+        searcher = SearcherBayes({'x': ('uniform', 0, 1)}, 'loss', batch_size=4, seed=1)
+        first = searcher.next_tune()
+        searcher.save_state(self.path)
+        resumed = SearcherBayes({'x': ('uniform', 0, 1)}, 'loss', batch_size=4, seed=2)
+        resumed.load_state(self.path)
+        self.assertEqual([first] + list(resumed), list(SearcherBayes({'x': ('uniform', 0, 1)}, 'loss', batch_size=4, seed=1)))
+
+    def test_list_grid_saved_once(self):
+        searcher = SearcherBayes({'x': ('uniform', 0, 1)}, 'loss', batch_size=4, seed=1)
+        searcher.next_tune()
+        searcher.save_state(self.path)
+        grid_path = searcher.get_grid_path(self.path)
+        mtime = os.stat(grid_path).st_mtime_ns
+        os.utime(grid_path, ns=(mtime - 10**9, mtime - 10**9))
+        searcher.next_tune()
+        searcher.save_state(self.path)
+        # Only the position in the grid is written again
+        self.assertEqual(os.stat(grid_path).st_mtime_ns, mtime - 10**9)
+        with open(self.path, 'r') as f:
+            state = json.load(f)
+        self.assertIsNone(state['grid'])
+        self.assertEqual(state['grid_index'], 1)
+        resumed = SearcherBayes({'x': ('uniform', 0, 1)}, 'loss', batch_size=4, seed=2)
+        resumed.load_state(self.path)
+        self.assertEqual(len(list(resumed)), 2)
+        resumed.remove_state(self.path)
+        self.assertEqual(os.listdir(self.test_dir), [])
+
+    def test_no_state(self):
+        searcher = SearcherGrid({'a': [1, 2]})
+        self.assertFalse(searcher.load_state(self.path))
+        self.assertEqual(list(searcher), [{'a': 1}, {'a': 2}])
+
+    def test_mismatched_state(self):
+        SearcherGrid({'a': [1, 2]}).save_state(self.path)
+        with self.assertRaises(ValueError):
+            SearcherGrid({'a': [1, 2, 3]}).load_state(self.path)
+        with self.assertRaises(ValueError):
+            SearcherRandom({'a': [1, 2]}, num_samples=2).load_state(self.path)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from slune import get_csv_saver
+from slune.searchers.halving import SearcherHalving, SearcherHyperband, get_budgets
+from tests.searcher_rounds import SearcherRoundsTestCase
+
+class TestGetBudgets(unittest.TestCase):
+
+    def test_budgets(self):
+        self.assertEqual(get_budgets(1, 81, 3), [1, 3, 9, 27, 81])
+        self.assertEqual(get_budgets(1, 100, 3), [1, 3, 9, 27, 81])
+        self.assertEqual(get_budgets(0.5, 2, 2), [0.5, 1.0, 2.0])
+        for args in [(0, 10, 3), (10, 1, 3), (1, 10, 1)]:
+            with self.assertRaises(ValueError):
+                get_budgets(*args)
+
+class TestSearcherHalving(SearcherRoundsTestCase, unittest.TestCase):
+
+    def train(self, config, saver):
+        # Larger alpha is better, and the metric grows with the number of epochs
+        self.calls.append(config)
+        for epoch in range(config['epochs']):
+            saver.log({'accuracy': config['alpha'] * (epoch + 1)})
+
+    def test_first_rung_without_results(self):
+        searcher = SearcherHalving({'alpha': [1, 2, 3]}, 'epochs', 1, 9, 'accuracy')
+        self.assertEqual(list(searcher), [{'alpha': 1, 'epochs': 1}, {'alpha': 2, 'epochs': 1}, {'alpha': 3, 'epochs': 1}])
+
+    def test_promotes_best(self):
+        alphas = list(range(1, 10))
+        rounds = self.run_rounds(lambda: SearcherHalving({'alpha': alphas}, 'epochs', 1, 9, 'accuracy'))
+        self.assertEqual(rounds, [
+            [{'alpha': a, 'epochs': 1} for a in alphas],
+            [{'alpha': a, 'epochs': 3} for a in [7, 8, 9]],
+            [{'alpha': 9, 'epochs': 9}],
+        ])
+        # 9 + 3*3 + 9 epochs instead of 9*9 for the full grid
+        self.assertEqual(sum(c['epochs'] for c in self.calls), 27)
+
+    def test_min_mode(self):
+        rounds = self.run_rounds(lambda: SearcherHalving({'alpha': [1, 2, 3, 4]}, 'epochs', 1, 4, 'accuracy', eta=2, mode='min'))
+        self.assertEqual(rounds[-1], [{'alpha': 1, 'epochs': 4}])
+
+    def test_reruns_missing(self):
+        # Only the first two configurations of the first rung have results
+        saver = self.run_round(SearcherHalving({'alpha': [1, 2]}, 'epochs', 1, 3, 'accuracy'))
+        searcher = SearcherHalving({'alpha': [1, 2, 3]}, 'epochs', 1, 3, 'accuracy')
+        searcher.check_existing_runs(saver)
+        self.assertEqual(searcher.rung, 0)
+        self.assertEqual(list(searcher), [{'alpha': 3, 'epochs': 1}])
+
+    def test_random_configs(self):
+        searcher = SearcherHalving({'alpha': ('uniform', 0, 1)}, 'epochs', 1, 9, 'accuracy', num_configs=5, seed=2)
+        configs = list(searcher)
+        self.assertEqual(len(configs), 5)
+        self.assertTrue(all(0 <= c['alpha'] <= 1 and c['epochs'] == 1 for c in configs))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            SearcherHalving({'alpha': [1]}, 'epochs', 1, 9, 'accuracy', mode='best')
+        with self.assertRaises(ValueError):
+            SearcherHalving({'epochs': [1]}, 'epochs', 1, 9, 'accuracy')
+
+class TestSearcherHyperband(SearcherRoundsTestCase, unittest.TestCase):
+
+    metric = 'accuracy'
+
+    def objective(self, config):
+        return config['alpha'] * config['epochs']
+
+    def test_brackets(self):
+        searcher = SearcherHyperband({'alpha': ('uniform', 0, 1)}, 'epochs', 1, 9, 'accuracy')
+        self.assertEqual([len(b.candidates) for b in searcher.brackets], [9, 5, 3])
+        self.assertEqual([b.budgets for b in searcher.brackets], [[1, 3, 9], [3, 9], [9]])
+        self.assertEqual(len(searcher), 17)
+
+    def test_runs_to_completion(self):
+        make_searcher = lambda: SearcherHyperband({'alpha': ('uniform', 0, 1)}, 'epochs', 1, 9, 'accuracy', seed=1)
+        self.assertEqual(len(self.run_rounds(make_searcher)), 3)
+        searcher = make_searcher()
+        searcher.check_existing_runs(get_csv_saver(root_dir=self.root_dir))
+        self.assertEqual([b.rung for b in searcher.brackets], [2, 1, 0])
+
+    def test_brackets_sharing_configs(self):
+        # Every bracket samples the same configurations, each must still run its own
+        searcher = SearcherHyperband({'alpha': [0.5]}, 'epochs', 1, 9, 'accuracy', seed=2)
+        self.assertEqual([b.seed for b in searcher.brackets], [8, 7, 6])
+        self.assertEqual(sorted(set(c['bracket'] for c in searcher.grid)), [0, 1, 2])
+        self.run_rounds(lambda: SearcherHyperband({'alpha': [0.5]}, 'epochs', 1, 9, 'accuracy', seed=2))
+        # Bracket 2 runs at budgets 1, 3 and 9, bracket 1 at 3 and 9 and bracket 0 at 9
+        self.assertEqual(sorted(set((c['bracket'], c['epochs']) for c in self.calls)), [(0, 9), (1, 3), (1, 9), (2, 1), (2, 3), (2, 9)])
+        with self.assertRaises(ValueError):
+            SearcherHyperband({'bracket': [1]}, 'epochs', 1, 9, 'accuracy')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import os
+import json
+import random
+from slune import get_csv_saver
+from slune.searchers.pbt import SearcherPBT, perturb, copy_checkpoint
+from tests.searcher_rounds import SearcherRoundsTestCase
+
+class TestPerturb(unittest.TestCase):
+
+    def test_perturb(self):
+        distributions = {'lr': ('uniform', 0.0, 1.0), 'layers': ('int', 1, 4), 'opt': ('categorical', ['adam', 'sgd'])}
+        rng = random.Random(0)
+        for _ in range(50):
+            params = perturb({'lr': 0.9, 'layers': 4, 'opt': 'adam'}, distributions, rng, resample_probability=0.0)
+            self.assertIn(params['lr'], [0.9 * 0.8, 1.0])
+            self.assertIn(params['layers'], [3, 4])
+            self.assertEqual(params['opt'], 'adam')
+        params = perturb({'lr': 0.9, 'layers': 4, 'opt': 'adam'}, distributions, rng, resample_probability=1.0)
+        self.assertTrue(0 <= params['lr'] <= 1 and 1 <= params['layers'] <= 4)
+
+class TestSearcherPBT(SearcherRoundsTestCase, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.configs = {'lr': ('uniform', 0.0, 1.0)}
+
+    def train(self, config, saver):
+        # The checkpoint holds the progress so far, which grows fastest for lr close to 0.5
+        load_dir = saver.get_checkpoint_dir(config['member'], config['generation'])
+        progress = 0.0
+        if os.path.exists(os.path.join(load_dir, 'model.json')):
+            with open(os.path.join(load_dir, 'model.json')) as f:
+                progress = json.load(f)['progress']
+        progress += 1 - abs(config['lr'] - 0.5)
+        saver.log({'progress': progress})
+        save_dir = saver.get_checkpoint_dir(config['member'], config['generation'] + 1)
+        os.makedirs(save_dir, exist_ok=True)
+        with open(os.path.join(save_dir, 'model.json'), 'w') as f:
+            json.dump({'progress': progress}, f)
+
+    def make_searcher(self):
+        return SearcherPBT(self.configs, 'progress', population_size=4, num_generations=3, seed=1)
+
+    def test_first_generation(self):
+        searcher = self.make_searcher()
+        configs = list(searcher)
+        self.assertEqual([c['member'] for c in configs], [0, 1, 2, 3])
+        self.assertTrue(all(c['generation'] == 0 for c in configs))
+
+    def test_generations(self):
+        generations = self.run_rounds(self.make_searcher)
+        self.assertEqual(len(generations), 3)
+        self.assertEqual([c['generation'] for c in generations[1]], [1] * 4)
+
+        # The worst member of generation 0 took the checkpoint and perturbed hyperparameters of the best
+        first = generations[0]
+        score = lambda c: 1 - abs(c['lr'] - 0.5)
+        best = max(range(4), key=lambda m: score(first[m]))
+        worst = min(range(4), key=lambda m: score(first[m]))
+        with open(os.path.join(self.root_dir + '_checkpoints', 'exploit_1.json')) as f:
+            decisions = json.load(f)
+        self.assertEqual(decisions[worst]['source'], best)
+        self.assertEqual(generations[1][worst]['lr'], decisions[worst]['params']['lr'])
+        self.assertNotEqual(generations[1][worst]['lr'], first[worst]['lr'])
+        for m in range(4):
+            if m != worst:
+                self.assertEqual(generations[1][m]['lr'], first[m]['lr'])
+        saver = get_csv_saver(root_dir=self.root_dir)
+        with open(os.path.join(saver.get_checkpoint_dir(worst, 1), 'model.json')) as f:
+            self.assertAlmostEqual(json.load(f)['progress'], score(first[best]))
+        # Checkpoints are kept out of the results root, and copies leave no temporary directories behind
+        self.assertNotIn('checkpoints', os.listdir(self.root_dir))
+        self.assertEqual(sorted(os.listdir(os.path.dirname(saver.get_checkpoint_dir(worst, 1)))), ['generation=1', 'generation=2', 'generation=3'])
+
+    def test_exploit_temporary_file_is_per_process(self):
+        # Another job's temporary file with the shared name doesn't get in the way
+        saver = self.run_round(self.make_searcher())
+        path = os.path.join(self.root_dir + '_checkpoints', 'exploit_1.json')
+        os.makedirs(path + '.tmp')
+        searcher = self.make_searcher()
+        searcher.check_existing_runs(saver)
+        with open(path) as f:
+            self.assertEqual([d['params'] for d in json.load(f)], searcher.population)
+
+    def test_default_select_by(self):
+        self.assertEqual(SearcherPBT(self.configs, 'loss', 4, 2, mode='min').select_by, 'min')
+        self.assertEqual(self.make_searcher().select_by, 'max')
+        self.assertEqual(SearcherPBT(self.configs, 'loss', 4, 2, select_by='last').select_by, 'last')
+
+    def test_copy_checkpoint(self):
+        src, dst = os.path.join(self.test_dir, 'src'), os.path.join(self.test_dir, 'member=1', 'generation=1')
+        for path, name in [(src, 'new.json'), (dst, 'old.json')]:
+            os.makedirs(path)
+            with open(os.path.join(path, name), 'w') as f:
+                f.write('{}')
+        copy_checkpoint(src, dst)
+        self.assertEqual(os.listdir(dst), ['new.json'])
+        self.assertEqual(os.listdir(os.path.dirname(dst)), ['generation=1'])
+        # A failed copy leaves the old checkpoint in place
+        with self.assertRaises(OSError):
+            copy_checkpoint(os.path.join(self.test_dir, 'missing'), dst)
+        self.assertEqual(os.listdir(dst), ['new.json'])
+        self.assertEqual(os.listdir(os.path.dirname(dst)), ['generation=1'])
+
+    def test_exploit_is_only_done_once(self):
+        saver = self.run_round(self.make_searcher())
+        first = self.make_searcher()
+        first.check_existing_runs(saver)
+        path = os.path.join(self.root_dir + '_checkpoints', 'exploit_1.json')
+        modified = os.path.getmtime(path)
+        second = self.make_searcher()
+        second.check_existing_runs(saver)
+        self.assertEqual(list(first), list(second))
+        self.assertEqual(os.path.getmtime(path), modified)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            SearcherPBT({'member': [1, 2]}, 'progress', 4, 2)
+        with self.assertRaises(ValueError):
+            SearcherPBT(self.configs, 'progress', 4, 2, quantile=0.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import numpy as np
+from slune.searchers.quasi import SearcherQuasiRandom, QuasiSamples, sobol, latin_hypercube, get_sobol_directions
+
+class TestSobol(unittest.TestCase):
+
+    def test_first_points(self):
+        # Unshifted Sobol points for 3 dimensions, same as scipy.stats.qmc.Sobol(3, scramble=False)
+        expected = [[0.0, 0.0, 0.0],
+                    [0.5, 0.5, 0.5],
+                    [0.75, 0.25, 0.25],
+                    [0.25, 0.75, 0.75],
+                    [0.375, 0.375, 0.625],
+                    [0.875, 0.875, 0.125]]
+        np.testing.assert_array_equal(sobol(np.arange(6), 3), expected)
+
+    def test_batches_match(self):
+        points = sobol(np.arange(100), 5)
+        np.testing.assert_array_equal(sobol(np.arange(37, 61), 5), points[37:61])
+
+    def test_stratified(self):
+        # Every block of 2^k points has exactly one point in each interval of width 2^-k, in every dimension
+        shift = np.random.default_rng(0).integers(0, 1 << 32, size=20, dtype=np.uint64)
+        points = sobol(np.arange(64), 20, shift=shift)
+        for d in range(20):
+            self.assertEqual(sorted(np.floor(points[:, d] * 64).astype(int)), list(range(64)))
+
+    def test_too_many_dimensions(self):
+        with self.assertRaises(ValueError):
+            get_sobol_directions(1000)
+
+class TestLatinHypercube(unittest.TestCase):
+
+    def test_stratified(self):
+        points = latin_hypercube(50, 4, np.random.default_rng(1))
+        self.assertEqual(points.shape, (50, 4))
+        for d in range(4):
+            self.assertEqual(sorted(np.floor(points[:, d] * 50).astype(int)), list(range(50)))
+
+class TestSearcherQuasiRandom(unittest.TestCase):
+
+    def setUp(self):
+        self.configs = {
+            "lr": ('loguniform', 1e-5, 1e-1),
+            "batch_size": ('int', 16, 256),
+            "dropout": ('uniform', 0.0, 0.5),
+            "optimizer": ['adam', 'sgd'],
+        }
+
+    def test_samples_in_range(self):
+        for method in ['sobol', 'lhs']:
+            configs = list(SearcherQuasiRandom(self.configs, num_samples=64, method=method, seed=3))
+            self.assertEqual(len(configs), 64)
+            for config in configs:
+                self.assertTrue(1e-5 <= config['lr'] <= 1e-1)
+                self.assertTrue(16 <= config['batch_size'] <= 256)
+                self.assertIsInstance(config['batch_size'], int)
+                self.assertTrue(0.0 <= config['dropout'] <= 0.5)
+                self.assertIn(config['optimizer'], ['adam', 'sgd'])
+            # Points are spread evenly, so categories are split evenly and every order of magnitude of lr is covered
+            self.assertEqual(sum(c['optimizer'] == 'adam' for c in configs), 32)
+            self.assertEqual(sorted(set(int(np.floor(np.log10(c['lr']))) for c in configs)), [-5, -4, -3, -2])
+
+    def test_reproducible(self):
+        for method in ['sobol', 'lhs']:
+            first = list(SearcherQuasiRandom(self.configs, num_samples=16, method=method, seed=7))
+            second = list(SearcherQuasiRandom(self.configs, num_samples=16, method=method, seed=7))
+            other = list(SearcherQuasiRandom(self.configs, num_samples=16, method=method, seed=8))
+            self.assertEqual(first, second)
+            self.assertNotEqual(first, other)
+
+    def test_random_access(self):
+        samples = QuasiSamples(self.configs, 3000, seed=1, batch_size=256)
+        self.assertEqual(samples[2617], list(samples)[2617])
+        self.assertEqual(samples[5], list(samples)[5])
+
+    def test_runs_and_shards(self):
+        configs = list(SearcherQuasiRandom(self.configs, num_samples=3, runs=2))
+        self.assertEqual(configs[0], configs[1])
+        self.assertEqual(len(configs), 6)
+        shard = list(SearcherQuasiRandom(self.configs, num_samples=10, method='lhs', shard_index=1, num_shards=2))
+        self.assertEqual(shard, list(SearcherQuasiRandom(self.configs, num_samples=10, method='lhs'))[1::2])
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            SearcherQuasiRandom(self.configs, num_samples=4, method='halton')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import os
+import shutil
+import tempfile
+from slune.searchers.random import SearcherRandom, Samples, check_distribution, from_unit, to_unit
+from slune import get_csv_saver
+
+class TestDistributions(unittest.TestCase):
+
+    def test_check_distribution(self):
+        self.assertEqual(check_distribution('a', ['x', 'y']), ('categorical', ['x', 'y']))
+        self.assertEqual(check_distribution('a', ('uniform', 0, 1)), ('uniform', 0, 1))
+        for spec in [('normal', 0, 1), ('uniform', 1, 0), ('loguniform', 0, 1), ('int', 1), [], 'uniform']:
+            with self.assertRaises(ValueError):
+                check_distribution('a', spec)
+
+    def test_from_unit(self):
+        self.assertEqual(from_unit(('uniform', 2, 4), 0.5), 3)
+        self.assertAlmostEqual(from_unit(('loguniform', 1e-4, 1), 0.5), 1e-2)
+        self.assertEqual([from_unit(('int', 1, 3), u) for u in [0, 0.34, 0.67, 0.9999]], [1, 2, 3, 3])
+        self.assertEqual([from_unit(('categorical', ['a', 'b']), u) for u in [0.1, 0.6]], ['a', 'b'])
+
+    def test_to_unit(self):
+        for spec, value in [(('uniform', 2, 4), 3.5), (('loguniform', 1e-4, 1), 0.003), (('int', 1, 3), 2), (('categorical', ['a', 'b']), 'b')]:
+            self.assertAlmostEqual(from_unit(spec, to_unit(spec, value)), value)
+        # Values read back from storage are strings
+        self.assertEqual(to_unit(('int', 1, 3), '3'), 2.5 / 3)
+        self.assertEqual(to_unit(('categorical', [1, 2]), '2'), 0.75)
+        with self.assertRaises(ValueError):
+            to_unit(('uniform', 0, 1), 2)
+        with self.assertRaises(ValueError):
+            to_unit(('categorical', ['a']), 'c')
+
+class TestSearcherRandom(unittest.TestCase):
+
+    def setUp(self):
+        self.configs = {
+            "lr": ('loguniform', 1e-5, 1e-1),
+            "batch_size": ('int', 16, 256),
+            "dropout": ('uniform', 0.0, 0.5),
+            "optimizer": ['adam', 'sgd'],
+        }
+
+    def test_samples_in_range(self):
+        searcher = SearcherRandom(self.configs, num_samples=200, seed=3)
+        configs = list(searcher)
+        self.assertEqual(len(configs), 200)
+        for config in configs:
+            self.assertTrue(1e-5 <= config['lr'] <= 1e-1)
+            self.assertTrue(16 <= config['batch_size'] <= 256)
+            self.assertIsInstance(config['batch_size'], int)
+            self.assertTrue(0.0 <= config['dropout'] <= 0.5)
+            self.assertIn(config['optimizer'], ['adam', 'sgd'])
+        # Log-uniform samples should be spread over the orders of magnitude
+        self.assertLess(min(c['lr'] for c in configs), 1e-4)
+
+    def test_reproducible(self):
+        first = list(SearcherRandom(self.configs, num_samples=20, seed=7))
+        second = list(SearcherRandom(self.configs, num_samples=20, seed=7))
+        other = list(SearcherRandom(self.configs, num_samples=20, seed=8))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        # Asking for more samples only adds to the end of the sequence
+        self.assertEqual(list(SearcherRandom(self.configs, num_samples=30, seed=7))[:20], first)
+
+    def test_random_access(self):
+        samples = Samples(self.configs, 1000, seed=1)
+        self.assertEqual(samples[617], list(samples)[617])
+        self.assertEqual(len(samples[10:20]), 10)
+
+    def test_runs_and_shards(self):
+        searcher = SearcherRandom(self.configs, num_samples=3, runs=2)
+        configs = list(searcher)
+        self.assertEqual(configs[0], configs[1])
+        self.assertEqual(len(configs), 6)
+        shard = list(SearcherRandom(self.configs, num_samples=10, shard_index=1, num_shards=2))
+        self.assertEqual(shard, list(SearcherRandom(self.configs, num_samples=10))[1::2])
+
+    def test_check_existing_runs(self):
+        # Arrange, save results for the first few samples as if an earlier sweep was interrupted
+        test_dir = tempfile.mkdtemp()
+        try:
+            root_dir = os.path.join(test_dir, 'slune_results')
+            for config in list(SearcherRandom(self.configs, num_samples=10, seed=5))[:4]:
+                saver = get_csv_saver(params=config, root_dir=root_dir)
+                saver.log({'loss': 1.0})
+                saver.save_collated()
+            searcher = SearcherRandom(self.configs, num_samples=10, runs=1, seed=5)
+
+            # Act
+            searcher.check_existing_runs(get_csv_saver(root_dir=root_dir))
+            remaining = list(searcher)
+
+            # Assert
+            self.assertEqual(remaining, list(SearcherRandom(self.configs, num_samples=10, seed=5))[4:])
+        finally:
+            shutil.rmtree(test_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from slune import get_csv_saver
+from slune.searchers.refine import SearcherRefine, refine_values
+from tests.searcher_rounds import SearcherRoundsTestCase
+
+class TestRefineValues(unittest.TestCase):
+
+    def test_linear(self):
+        self.assertEqual(refine_values(0.5, 0.0, 1.0, 5), [0.0, 0.25, 0.5, 0.75, 1.0])
+        # The best value is always included
+        self.assertEqual(refine_values(0.4, 0.0, 1.0, 3), [0.0, 0.4, 0.5, 1.0])
+
+    def test_log(self):
+        self.assertEqual(refine_values(0.01, 0.001, 0.1, 3, scale='log'), [0.001, 0.01, 0.1])
+
+    def test_integer(self):
+        self.assertEqual(refine_values(4, 2, 6, 5, integer=True), [2, 3, 4, 5, 6])
+        self.assertEqual(refine_values(4, 3, 5, 5, integer=True), [3, 4, 5])
+
+    def test_single_value(self):
+        self.assertEqual(refine_values(2.0, 2.0, 2.0, 3), [2.0])
+
+class TestSearcherRefine(SearcherRoundsTestCase, unittest.TestCase):
+
+    metric = 'score'
+
+    def objective(self, config):
+        bonus = 1 if config['act'] == 'relu' else 0
+        return bonus - (config['x'] - 3.3) ** 2
+
+    def test_first_round_is_grid(self):
+        searcher = SearcherRefine({'x': [0, 5, 10], 'act': ['relu', 'tanh']}, 'score')
+        self.assertEqual(len(searcher), 6)
+        self.assertEqual(searcher.round, 0)
+
+    def test_zooms_in(self):
+        rounds = self.run_rounds(lambda: SearcherRefine({'x': [0.0, 5.0, 10.0], 'act': ['relu', 'tanh']}, 'score', num_rounds=2, num_points=5))
+        self.assertEqual(len(rounds), 3)
+        # Refined around x=5 with relu, values that were already run aren't run again
+        self.assertEqual(rounds[1], [{'x': x, 'act': 'relu'} for x in [2.5, 7.5]])
+        self.assertEqual(rounds[2], [{'x': x, 'act': 'relu'} for x in [1.25, 3.75]])
+        params, values = get_csv_saver(root_dir=self.root_dir).read({}, 'score', select_by='max')
+        best = params[values.index(max(values))]
+        self.assertIn('x=3.75', best)
+
+    def test_top_k_and_min(self):
+        rounds = self.run_rounds(lambda: SearcherRefine({'x': [0, 4, 8], 'act': ['relu']}, 'score', num_rounds=1,
+                                                        top_k=2, mode='min'))
+        # The two worst are x=8 and x=0, refined with integer values
+        self.assertEqual(rounds[1], [{'x': x, 'act': 'relu'} for x in [6, 2]])
+
+    def test_log_scale(self):
+        searcher = SearcherRefine({'x': [0.1, 1.0, 10.0], 'act': ['relu']}, 'score', scale={'x': 'log'})
+        grid, values = searcher.refine({'x': 1.0, 'act': 'relu'}, {'x': [0.1, 1.0, 10.0], 'act': ['relu']})
+        self.assertEqual(values['x'], [0.1, 1.0, 10.0])
+        with self.assertRaises(ValueError):
+            SearcherRefine({'x': [0.0, 1.0]}, 'score', scale='log')
+        with self.assertRaises(ValueError):
+            SearcherRefine({'x': [0.0, 1.0]}, 'score', scale='cubic')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,16 @@
 import unittest
 from unittest.mock import patch, call, MagicMock
-from slune import submit_job, sbatchit
+from slune import submit_job, submit_array_job, sbatchit, lsargs
+from slune.utils import write_manifest
+from slune.base import BaseSearcher
 import os
+import sys
+import json
+import subprocess
+import threading
+import time
+import shutil
+import tempfile
 
 class TestSubmitJob(unittest.TestCase):
     @patch('subprocess.run')
@@ -11,10 +20,17 @@ class TestSubmitJob(unittest.TestCase):
         args = {"arg1": 1, "arg2": "two", "arg3": False}
 
         # Act
-        submit_job(sh_path, args=args)
+        report = submit_job(sh_path, args=args)
 
         # Assert
-        mock_run.assert_called_once_with(['sbatch', sh_path, '--arg1=1', '--arg2=two', '--arg3=False'], check=True)
+        mock_run.assert_called_once_with(['sbatch', sh_path, '--arg1=1', '--arg2=two', '--arg3=False'], capture_output=True, text=True)
+        self.assertEqual(report.configs, [args])
+
+    def test_executor(self):
+        # The outcome is returned whichever executor is used
+        from slune.executors.callable import ExecutorCallable
+        report = submit_job(None, lambda config, saver: None, {'arg1': 1}, executor=ExecutorCallable())
+        self.assertEqual(report.exit_codes, [0])
 
 class TestSbatchit(unittest.TestCase):
     @patch('subprocess.run')
@@ -31,10 +47,266 @@ class TestSbatchit(unittest.TestCase):
         sbatchit(script_path, template_path, searcher, cargs, saver)
 
         # Assert
-        calls = [call(['sbatch', template_path, script_path, '--carg1=str', '--carg2=str', '--arg1=1', '--arg2=two'], check=True),
-                 call(['sbatch', template_path, script_path, '--carg1=str', '--carg2=str', '--arg3=False', '--arg4=0.5'], check=True)]
+        calls = [call(['sbatch', template_path, script_path, '--carg1=str', '--carg2=str', '--arg1=1', '--arg2=two'], capture_output=True, text=True),
+                 call(['sbatch', template_path, script_path, '--carg1=str', '--carg2=str', '--arg3=False', '--arg4=0.5'], capture_output=True, text=True)]
         mock_run.assert_has_calls(calls, any_order=True)
 
+    def test_sbatchit_executor(self):
+        # Arrange
+        searcher = MagicMock()
+        searcher.__iter__.return_value = [{'arg1':1}, {'arg1':2}]
+        executor = MagicMock()
+        executor.wait.return_value = 'report'
+
+        # Act
+        report = sbatchit('script.py', 'template.sh', searcher, cargs={'carg':'c'}, executor=executor)
+
+        # Assert
+        executor.submit.assert_has_calls([call('template.sh', 'script.py', {'carg':'c', 'arg1':1}),
+                                          call('template.sh', 'script.py', {'carg':'c', 'arg1':2})])
+        self.assertEqual(report, 'report')
+
+    def test_sbatchit_resumes_from_state(self):
+        # Arrange, a launcher that dies while submitting the third job
+        from slune.searchers.grid import SearcherGrid
+        test_dir = tempfile.mkdtemp()
+        try:
+            state_path = os.path.join(test_dir, 'state.json')
+            submitted = []
+            def submit(sh_path, script_path, args):
+                if len(submitted) == 2:
+                    raise KeyboardInterrupt
+                submitted.append(args)
+            executor = MagicMock()
+            executor.submit.side_effect = submit
+            executor.get_handed_off.side_effect = lambda: len(submitted)
+            configs = {'alpha': [1, 2], 'beta': [1, 2]}
+            with self.assertRaises(KeyboardInterrupt):
+                sbatchit('script.py', 'template.sh', SearcherGrid(configs), executor=executor, state_path=state_path)
+            self.assertTrue(os.path.exists(state_path))
+
+            # Act, a new launcher carries on from the state file
+            executor.submit.side_effect = lambda sh_path, script_path, args: submitted.append(args)
+            executor.get_handed_off.side_effect = lambda: len(submitted) - 2
+            sbatchit('script.py', 'template.sh', SearcherGrid(configs), executor=executor, state_path=state_path)
+
+            # Assert
+            self.assertEqual(submitted, list(SearcherGrid(configs)))
+            self.assertFalse(os.path.exists(state_path))
+        finally:
+            shutil.rmtree(test_dir)
+
+    def test_sbatchit_state_needs_get_state(self):
+        # A searcher without get_state can still be created and used without a state path
+        class ListSearcher(BaseSearcher):
+            def __init__(self, configs):
+                self.configs = iter(configs)
+            def __len__(self):
+                return 2
+            def next_tune(self):
+                return next(self.configs)
+            def check_existing_runs(self, saver):
+                pass
+        executor = MagicMock()
+        sbatchit('script.py', 'template.sh', ListSearcher([{'a': 1}, {'a': 2}]), executor=executor)
+        self.assertEqual(executor.submit.call_count, 2)
+        executor = MagicMock()
+        test_dir = tempfile.mkdtemp()
+        try:
+            with self.assertRaises(NotImplementedError):
+                sbatchit('script.py', 'template.sh', ListSearcher([{'a': 1}]), executor=executor, state_path=os.path.join(test_dir, 'state.json'))
+        finally:
+            shutil.rmtree(test_dir)
+        executor.submit.assert_not_called()
+
+    def test_sbatchit_resume_skips_scan(self):
+        # Arrange
+        from slune.searchers.grid import SearcherGrid
+        test_dir = tempfile.mkdtemp()
+        try:
+            state_path = os.path.join(test_dir, 'state.json')
+            configs = {'alpha': [1, 2, 3]}
+            searcher = SearcherGrid(configs, runs=1)
+            searcher.next_tune()
+            searcher.save_state(state_path)
+            saver = MagicMock()
+            executor = MagicMock()
+            executor.get_handed_off.return_value = 0
+
+            # Act
+            sbatchit('script.py', 'template.sh', SearcherGrid(configs, runs=1), saver=saver, executor=executor, state_path=state_path)
+
+            # Assert, storage isn't read when resuming from a state
+            saver.exists_snapshot.assert_not_called()
+            saver.exists.assert_not_called()
+            self.assertEqual([c.args[2] for c in executor.submit.call_args_list], [{'alpha': 2}, {'alpha': 3}])
+        finally:
+            shutil.rmtree(test_dir)
+
+    def test_sbatchit_state_waits_for_sbatch(self):
+        # Arrange, a launcher that dies while sbatch is still running for the second job in a pool
+        from slune.searchers.grid import SearcherGrid
+        from slune.executors.slurm import ExecutorSlurm
+        test_dir = tempfile.mkdtemp()
+        release = threading.Event()
+        commands = []
+        def run(command, **kwargs):
+            if '--beta=2' in command and '--alpha=1' in command:
+                release.wait(10)
+            commands.append(command)
+            return subprocess.CompletedProcess(command, 0, stdout='1\n', stderr='')
+        try:
+            state_path = os.path.join(test_dir, 'state.json')
+            configs = {'alpha': [1, 2], 'beta': [1, 2]}
+            executor = ExecutorSlurm(max_workers=2)
+            submit = executor.submit
+            def die(sh_path, script_path, args):
+                if args == {'alpha': 2, 'beta': 1}:
+                    # Make sure the first job has been handed off before we get killed
+                    while executor.get_handed_off() < 1:
+                        time.sleep(0.01)
+                if args == {'alpha': 2, 'beta': 2}:
+                    raise KeyboardInterrupt
+                submit(sh_path, script_path, args)
+            with patch('subprocess.run', side_effect=run):
+                with patch.object(executor, 'submit', side_effect=die):
+                    with self.assertRaises(KeyboardInterrupt):
+                        sbatchit('script.py', 'template.sh', SearcherGrid(configs), executor=executor, state_path=state_path)
+                release.set()
+                executor.wait()
+
+                # Act, a new launcher carries on from the first job sbatch hadn't returned for
+                commands.clear()
+                sbatchit('script.py', 'template.sh', SearcherGrid(configs), executor=ExecutorSlurm(max_workers=2), state_path=state_path)
+
+            # Assert
+            self.assertEqual(sorted(c[3:] for c in commands), [['--alpha=1', '--beta=2'], ['--alpha=2', '--beta=1'], ['--alpha=2', '--beta=2']])
+            self.assertFalse(os.path.exists(state_path))
+        finally:
+            release.set()
+            shutil.rmtree(test_dir)
+
+    def test_sbatchit_executor_with_array(self):
+        searcher = MagicMock()
+        with self.assertRaises(ValueError):
+            sbatchit('script.py', 'template.sh', searcher, array=True, executor=MagicMock())
+
+
+class TestSubmitArrayJob(unittest.TestCase):
+    @patch('subprocess.run')
+    def test_regular(self, mock_run):
+        # Arrange
+        sh_path = os.path.join('path','to','bash','script')
+        script_path = os.path.join('path','to','script')
+
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout='Submitted batch job 7\n', stderr='')
+
+        # Act
+        report = submit_array_job(sh_path, 'manifest.jsonl', 3, script_path=script_path)
+
+        # Assert
+        mock_run.assert_called_once_with(['sbatch', '--array=0-2', sh_path, script_path, '--slune_manifest=manifest.jsonl'], capture_output=True, text=True)
+        self.assertEqual(report.configs, [{'array': '--array=0-2', 'slune_manifest': 'manifest.jsonl'}])
+        self.assertEqual(report.messages, ['Submitted batch job 7'])
+
+    @patch('subprocess.run')
+    def test_failure_is_reported(self, mock_run):
+        mock_run.return_value = subprocess.CompletedProcess([], 1, stdout='', stderr='sbatch: error: invalid partition\n')
+        report = submit_array_job('sh', 'manifest.jsonl', 3)
+        self.assertEqual(report.get_failed(), [({'array': '--array=0-2', 'slune_manifest': 'manifest.jsonl'}, 1, 'sbatch: error: invalid partition')])
+
+    @patch('subprocess.run')
+    def test_throttle(self, mock_run):
+        # Arrange
+        sh_path = os.path.join('path','to','bash','script')
+
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout='', stderr='')
+
+        # Act
+        submit_array_job(sh_path, 'manifest.jsonl', 10, max_concurrent=4)
+
+        # Assert
+        mock_run.assert_called_once_with(['sbatch', '--array=0-9%4', sh_path, '--slune_manifest=manifest.jsonl'], capture_output=True, text=True)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            submit_array_job('sh', 'manifest.jsonl', 0)
+        with self.assertRaises(ValueError):
+            submit_array_job('sh', 'manifest.jsonl', 2, max_concurrent=0)
+
+@unittest.skipIf(os.name == 'nt', "Stub sbatch is a shell script")
+class TestSbatchitArray(unittest.TestCase):
+    def setUp(self):
+        # Put a stub sbatch on the PATH that records the arguments it was called with
+        self.test_dir = tempfile.mkdtemp()
+        self.record_path = os.path.join(self.test_dir, 'sbatch_calls.txt')
+        stub_path = os.path.join(self.test_dir, 'sbatch')
+        with open(stub_path, 'w') as f:
+            f.write('#!/bin/sh\necho "$@" >> "{}"\n'.format(self.record_path))
+        os.chmod(stub_path, 0o755)
+        self.old_path = os.environ['PATH']
+        os.environ['PATH'] = self.test_dir + os.pathsep + self.old_path
+
+    def tearDown(self):
+        os.environ['PATH'] = self.old_path
+        shutil.rmtree(self.test_dir)
+
+    def test_sbatchit_array(self):
+        # Arrange
+        manifest_path = os.path.join(self.test_dir, 'manifest.jsonl')
+        searcher = MagicMock()
+        searcher.__iter__.return_value = [{'arg1':1}, {'arg1':2}, {'arg1':3}]
+
+        # Act
+        report = sbatchit('script.py', 'template.sh', searcher, cargs={'carg':'c'}, array=True, max_concurrent=2, manifest_path=manifest_path)
+
+        # Assert
+        self.assertEqual(report.exit_codes, [0])
+        with open(self.record_path) as f:
+            calls = f.read().splitlines()
+        self.assertEqual(calls, ['--array=0-2%2 template.sh script.py --slune_manifest={}'.format(manifest_path)])
+        with open(manifest_path) as f:
+            manifest = [json.loads(line) for line in f]
+        self.assertEqual(manifest, [['--carg=c', '--arg1=1'], ['--carg=c', '--arg1=2'], ['--carg=c', '--arg1=3']])
+
+    def test_sbatchit_array_empty(self):
+        # Arrange
+        manifest_path = os.path.join(self.test_dir, 'manifest.jsonl')
+        searcher = MagicMock()
+        searcher.__iter__.return_value = []
+
+        # Act
+        report = sbatchit('script.py', 'template.sh', searcher, array=True, manifest_path=manifest_path)
+
+        # Assert
+        self.assertFalse(os.path.exists(self.record_path))
+        self.assertEqual(len(report), 0)
+
+class TestLsargs(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(self.test_dir, 'manifest.jsonl')
+        write_manifest([{'arg1':1}, {'arg1':2, 'arg2':'b'}], self.manifest_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_no_manifest(self):
+        with patch.object(sys, 'argv', ['script.py', '--arg1=1']):
+            self.assertEqual(lsargs(), ('script.py', ['--arg1=1']))
+
+    def test_array_task(self):
+        argv = ['script.py', '--slune_manifest={}'.format(self.manifest_path)]
+        with patch.object(sys, 'argv', argv), patch.dict(os.environ, {'SLURM_ARRAY_TASK_ID': '1'}):
+            self.assertEqual(lsargs(), ('script.py', ['--arg1=2', '--arg2=b']))
+
+    def test_manifest_without_task_id(self):
+        argv = ['script.py', '--slune_manifest={}'.format(self.manifest_path)]
+        env = {k: v for k, v in os.environ.items() if k != 'SLURM_ARRAY_TASK_ID'}
+        with patch.object(sys, 'argv', argv), patch.dict(os.environ, env, clear=True):
+            with self.assertRaises(ValueError):
+                lsargs()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 import os
-from slune.utils import find_directory_path, dict_to_strings, strings_to_dict, find_ext_files, get_all_paths, get_numeric_equiv
+from slune.utils import find_directory_path, dict_to_strings, strings_to_dict, strings_to_flags, find_ext_files, get_all_paths, get_numeric_equiv, write_manifest, read_manifest, read_manifest_range, get_shard, get_line_index, read_lines, get_config_hash, match_params
+import shutil
+import tempfile
 
 class TestFindDirectoryPath(unittest.TestCase):
 
@@ -242,6 +244,22 @@ class TestStringsToDict(unittest.TestCase):
         with self.assertRaises(ValueError):
             strings_to_dict(s)
 
+class TestStringsToFlags(unittest.TestCase):
+
+    def test_common(self):
+        s = ['--arg1=1', '-arg2=0.5', 'arg3=True']
+        result = strings_to_flags(s)
+        self.assertEqual(result, {'arg1': '1', 'arg2': '0.5', 'arg3': 'True'})
+
+    def test_value_has_equals(self):
+        s = ['--slune_script=results/alpha=0.1/script.py', '--arg2==']
+        result = strings_to_flags(s)
+        self.assertEqual(result, {'slune_script': 'results/alpha=0.1/script.py', 'arg2': '='})
+
+    def test_no_equals(self):
+        with self.assertRaises(ValueError):
+            strings_to_flags(['--arg1'])
+
 class TestFindCSVFiles(unittest.TestCase):
 
     def setUp(self):
@@ -453,5 +471,95 @@ class TestGetAllPaths(unittest.TestCase):
         self.assertEqual(result, expected_result)
 
 
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(self.test_dir, 'sub', 'manifest.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_write_read(self):
+        num = write_manifest([{'a': 1, 'b': 'x'}, {'a': 2.5, 'b': 'y'}], self.manifest_path)
+        self.assertEqual(num, 2)
+        self.assertEqual(read_manifest(self.manifest_path, 0), ['--a=1', '--b=x'])
+        self.assertEqual(read_manifest(self.manifest_path, 1), ['--a=2.5', '--b=y'])
+
+    def test_out_of_range(self):
+        write_manifest([{'a': 1}], self.manifest_path)
+        with self.assertRaises(IndexError):
+            read_manifest(self.manifest_path, 1)
+        with self.assertRaises(IndexError):
+            read_manifest(self.manifest_path, -1)
+
+
+class TestLineIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'lines.txt')
+        with open(self.path, 'w') as f:
+            f.write('header\nfirst\n\nsecond\r\nthird\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_read_lines(self):
+        self.assertEqual(read_lines(self.path, 0, 10), ['header', 'first', 'second', 'third'])
+        self.assertEqual(read_lines(self.path, 2, 3), ['second'])
+        self.assertEqual(read_lines(self.path, 1, 3, skip_lines=1), ['second', 'third'])
+        self.assertEqual(read_lines(self.path, 4, 5), [])
+
+    def test_index_rebuilt_when_file_changes(self):
+        index_path, num_lines = get_line_index(self.path)
+        self.assertEqual((index_path, num_lines), (self.path + '.idx', 4))
+        with open(self.path, 'a') as f:
+            f.write('fourth\n')
+        self.assertEqual(get_line_index(self.path)[1], 5)
+        self.assertEqual(read_lines(self.path, 4, 5), ['fourth'])
+
+    def test_manifest_index(self):
+        manifest_path = os.path.join(self.test_dir, 'manifest.jsonl')
+        write_manifest(({'i': i} for i in range(1000)), manifest_path)
+        self.assertEqual(get_line_index(manifest_path)[1], 1000)
+        self.assertEqual(read_manifest(manifest_path, 777), ['--i=777'])
+        self.assertEqual(read_manifest_range(manifest_path, 998, 1005), [['--i=998'], ['--i=999']])
+
+
+class TestGetShard(unittest.TestCase):
+    def test_strided(self):
+        items = list(range(10))
+        self.assertEqual(items[get_shard(10, 1, 3)], [1, 4, 7])
+
+    def test_contiguous(self):
+        items = list(range(10))
+        shards = [items[get_shard(10, i, 3, 'contiguous')] for i in range(3)]
+        self.assertEqual(shards, [[0, 1, 2], [3, 4, 5], [6, 7, 8, 9]])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            get_shard(10, 0, 0)
+        with self.assertRaises(ValueError):
+            get_shard(10, -1, 2)
+        with self.assertRaises(ValueError):
+            get_shard(10, 0, 2, 'random')
+
+
+class TestConfigHash(unittest.TestCase):
+    def test_stable(self):
+        h = get_config_hash(['alpha=0.1', 'beta=adam'])
+        self.assertEqual(len(h), 16)
+        # Order of the parameters and the form of numeric values don't change the hash
+        self.assertEqual(get_config_hash(['beta=adam', 'alpha=0.10']), h)
+        self.assertEqual(get_config_hash(['alpha=1']), get_config_hash(['alpha=1.0']))
+        self.assertNotEqual(get_config_hash(['alpha=0.2', 'beta=adam']), h)
+        self.assertNotEqual(get_config_hash(['alpha=0.1']), h)
+
+    def test_match_params(self):
+        self.assertTrue(match_params(['a=1'], ['a=1.0', 'b=2']))
+        self.assertTrue(match_params([], ['a=1']))
+        self.assertFalse(match_params(['a=1', 'c=3'], ['a=1', 'b=2']))
+        self.assertFalse(match_params(['b=x'], ['b=y']))
+
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from unittest.mock import patch
+from slune.workqueue import WorkQueue
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.queue = WorkQueue(os.path.join(self.test_dir, '.slune_queue'))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_put_claim_complete(self):
+        # Arrange
+        self.assertEqual(self.queue.put([{'a': 1}, {'a': 2}]), 2)
+
+        # Act
+        name1, item1 = self.queue.claim()
+        name2, item2 = self.queue.claim()
+        name3, item3 = self.queue.claim()
+        self.queue.complete(name1)
+        self.queue.complete(name2, success=False)
+
+        # Assert
+        self.assertEqual([item1, item2], [{'a': 1}, {'a': 2}])
+        self.assertIsNone(name3)
+        self.assertIsNone(item3)
+        self.assertEqual(self.queue.count('done'), 1)
+        self.assertEqual(self.queue.count('failed'), 1)
+        self.assertEqual(len(self.queue), 0)
+
+    def test_order_across_puts(self):
+        self.queue.put([{'a': 1}])
+        self.queue.put([{'a': 2}])
+        self.assertEqual(self.queue.claim()[1], {'a': 1})
+        self.assertEqual(self.queue.claim()[1], {'a': 2})
+
+    def test_requeue(self):
+        self.queue.put([{'a': 1}, {'a': 2}])
+        self.queue.claim()
+        self.assertEqual(self.queue.count('claimed'), 1)
+        self.assertEqual(self.queue.requeue(), 1)
+        self.assertEqual(len(self.queue), 2)
+
+    def test_concurrent_claims(self):
+        # Arrange
+        self.queue.put({'a': i} for i in range(200))
+        claimed = []
+        lock = threading.Lock()
+
+        def work():
+            while True:
+                name, item = self.queue.claim()
+                if name is None:
+                    return
+                with lock:
+                    claimed.append(item['a'])
+                self.queue.complete(name)
+
+        # Act
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert, every item is claimed exactly once
+        self.assertEqual(sorted(claimed), list(range(200)))
+        self.assertEqual(self.queue.count('done'), 200)
+
+    def test_pending_listed_once(self):
+        self.queue.put({'a': i} for i in range(50))
+        other = WorkQueue(self.queue.queue_dir)
+        with patch('os.listdir', wraps=os.listdir) as mock_listdir:
+            claimed = [self.queue.claim()[1]['a'] for _ in range(10)]
+            # Items claimed by another worker are skipped
+            claimed += [other.claim()[1]['a'] for _ in range(10)]
+            claimed += [self.queue.claim()[1]['a'] for _ in range(30)]
+            self.assertEqual(self.queue.claim(), (None, None))
+        self.assertEqual(sorted(claimed), list(range(50)))
+        self.assertEqual(claimed[:10], list(range(10)))
+        self.assertLessEqual(mock_listdir.call_count, 4)
+
+    def test_invalid_state(self):
+        with self.assertRaises(ValueError):
+            self.queue.count('unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()